@@ -2,15 +2,38 @@
 LTA DataMall API client for fetching transport-related data.
 """
 
+import re
+import time
+import threading
+from types import MappingProxyType
+
 import requests
-import pandas as pd
 
-from config.settings import LTA_API_KEY, LTA_BASE_URL
+from config.settings import LTA_API_KEY, LTA_BASE_URL, ALERT_SNAPSHOT_TTL
+from utils.circuit_breaker import call_upstream, check_response
+from utils.deadline import call_timeout
+
+NO_ALERT_STATUS = "No train service issues at selected stations."
+
+# DataMall endpoints each have their own circuit breaker. Their last good data is cached
+# further up (the crowd poller snapshot, forecast grids, alert snapshot and volume store),
+# so failed calls here are reported rather than answered from a payload cache.
+
+# Shared station-indexed alert snapshot, rebuilt once per fetched payload
+_alert_lock = threading.Lock()
+_alert_cache = {"snapshot": None, "fetched_at": 0.0}
+
+
+def _get_json(url, headers):
+    """Make a DataMall request within the request's deadline, raising on an error status."""
+    response = requests.get(url, headers=headers, timeout=call_timeout())
+    check_response(response)
+    return response.json()
 
 
 def get_crowd_request(url_type, train_line):
     """
-    Get crowd data from LTA API.
+    Get crowd data from LTA API, through the endpoint's circuit breaker.
     
     Args:
         url_type (str): Type of crowd data ('RealTime' or 'Forecast')
@@ -25,36 +48,35 @@ def get_crowd_request(url_type, train_line):
     
     url = f"{LTA_BASE_URL}/PCD{url_type}?TrainLine={train_line}"
     
-    response = requests.get(url, headers=headers)
-    
-    # Check for response
-    if response.status_code == 200:
-        return response.json()
-    else:
-        return {"error": f"Failed to fetch data (status code: {response.status_code}), please try again later."}
+    try:
+        return call_upstream(f"datamall:PCD{url_type}", lambda: _get_json(url, headers))
+    except Exception as e:
+        return {"error": f"Failed to fetch data ({e}), please try again later."}
 
 
-def get_data_request(url_type):
+def get_data_request(url_type, date=None):
     """
-    Get various types of transit data from LTA API.
+    Get various types of transit data from LTA API, through the endpoint's circuit breaker.
     
     Args:
         url_type (str): Type of data to fetch ('vol_by_stn', 'vol_to_fro', 'alert')
+        date (str, optional): Month in 'YYYYMM' format for passenger volume data
         
     Returns:
         dict: JSON response from API or None if request failed
     """
     # URLs
-    vol_by_stn_url = f"{LTA_BASE_URL}/PV/Train"
-    vol_to_fro_url = f"{LTA_BASE_URL}/PV/ODTrain?$skip=500"
+    date_query = f"?Date={date}" if date else ""
+    vol_by_stn_url = f"{LTA_BASE_URL}/PV/Train{date_query}"
+    vol_to_fro_url = f"{LTA_BASE_URL}/PV/ODTrain{date_query}"
     alert_url = f"{LTA_BASE_URL}/TrainServiceAlerts"
 
     if url_type == "vol_by_stn":
-        url = vol_by_stn_url
+        url, endpoint = vol_by_stn_url, "PV/Train"
     elif url_type == 'vol_to_fro':
-        url = vol_to_fro_url
+        url, endpoint = vol_to_fro_url, "PV/ODTrain"
     elif url_type == 'alert':
-        url = alert_url
+        url, endpoint = alert_url, "TrainServiceAlerts"
     else:
         return None
     
@@ -62,105 +84,152 @@ def get_data_request(url_type):
         "AccountKey": LTA_API_KEY
     }
     
-    response = requests.get(url, headers=headers)
+    try:
+        return call_upstream(f"datamall:{endpoint}", lambda: _get_json(url, headers))
+    except Exception as e:
+        print(f"Failed to fetch data ({e}), please try again later.")
+        return None
+
+
+def get_volume_download_link(url_type, date=None):
+    """
+    Get the download link of a passenger volume archive.
     
-    # Check for response
-    if response.status_code == 200:
-        return response.json()
-    else:
-        print(f"Failed to fetch data (status code: {response.status_code}), please try again later.")
+    Args:
+        url_type (str): Type of volume data ('vol_by_stn' or 'vol_to_fro')
+        date (str, optional): Month in 'YYYYMM' format, defaults to the latest month
+        
+    Returns:
+        str: Link to the zipped CSV or None if request failed
+    """
+    data = get_data_request(url_type, date)
+    
+    if not data or not data.get("value"):
         return None
+    
+    return data["value"][0]["Link"]
 
 
-def get_service_status(data):
+def normalize_station_code(station_code):
     """
-    Extract service status information from API response.
+    Normalize a station code by removing the leading zero in single-digit station numbers.
     
     Args:
-        data (dict): API response data
+        station_code (str): Station code (e.g., 'NS01', 'NS1')
         
     Returns:
-        DataFrame: Service status information
+        str: Normalized station code (e.g., 'NS1')
     """
-    if not data or "value" not in data:
-        return pd.DataFrame()
+    station_code = station_code.strip().upper()
+    if len(station_code) >= 3 and station_code[2] == '0':
+        station_code = station_code[:2] + station_code[3:]
+    return station_code
+
+
+def split_alert_message(message):
+    """
+    Split a service alert message into its timestamped segments.
     
-    status = data["value"]["Status"]
-    affected_segments = data["value"]["AffectedSegments"]
-    messages = data["value"]["Message"]
+    Args:
+        message (str): Alert message content, e.g. '1710hrs : NSL - ... 1725hrs : EWL - ...'
+        
+    Returns:
+        list: Message segments, each starting with its 'HHMMhrs :' timestamp
+    """
+    segments = []
+    current = ''
     
-    # Extracting affected segments information
-    lines = [segment["Line"] for segment in affected_segments]
-    directions = [segment["Direction"] for segment in affected_segments]
-    stations = [segment["Stations"] for segment in affected_segments]
-    free_public_bus = [segment["FreePublicBus"] for segment in affected_segments]
-    free_mrt_shuttle = [segment["FreeMRTShuttle"] for segment in affected_segments]
-    mrt_shuttle_direction = [segment["MRTShuttleDirection"] for segment in affected_segments]
+    for part in re.split(r'(\d{4}hrs :)', message):
+        if part.endswith('hrs :'):
+            if current.strip():
+                segments.append(current.strip())
+            current = part
+        else:
+            current += part
     
-    # Extracting message information
-    content = [msg["Content"] for msg in messages]
-    created_date = [msg["CreatedDate"] for msg in messages]
+    if current.strip():
+        segments.append(current.strip())
     
-    # Create DataFrame
-    df = pd.DataFrame({
-        "Status": status,
-        "Line": lines,
-        "Direction": directions,
-        "Stations": stations,
-        "FreePublicBus": free_public_bus,
-        "FreeMRTShuttle": free_mrt_shuttle,
-        "MRTShuttleDirection": mrt_shuttle_direction,
-        "MessageContent": content,
-        "CreatedDate": created_date
-    })
+    return segments
+
+
+def build_alert_snapshot(data):
+    """
+    Index a service alert payload by station code and line.
+    
+    Each affected station maps to the message segment that mentions its line, so per-station
+    status becomes a dictionary lookup instead of a scan over every alert row.
+    
+    Args:
+        data (dict): API response data from the 'TrainServiceAlerts' endpoint
+        
+    Returns:
+        MappingProxyType: Read-only mapping of (station_code, line) to status message;
+        empty when train services are operating normally
+    """
+    snapshot = {}
+    
+    if not data or "value" not in data or data["value"]["Status"] == 1:
+        return MappingProxyType(snapshot)
+    
+    affected_segments = data["value"]["AffectedSegments"]
+    messages = data["value"]["Message"]
+    
+    for segment, message in zip(affected_segments, messages):
+        message_segments = split_alert_message(message["Content"])
+        
+        for station_code in segment["Stations"].split(','):
+            if not station_code.strip():
+                continue
+            
+            station_code = normalize_station_code(station_code)
+            station_line = station_code[:2] + 'L'
+            status = next((text for text in message_segments if station_line in text), NO_ALERT_STATUS)
+            
+            # Earlier alerts take precedence, matching the order in the payload
+            snapshot.setdefault((station_code, station_line), status)
     
-    return df
+    return MappingProxyType(snapshot)
 
 
-def validate_station_alert(data_df, station_code):
+def lookup_station_alert(snapshot, station_code):
     """
-    Check if a station is affected by a service alert.
+    Look up the service status of a station in an alert snapshot.
     
     Args:
-        data_df (DataFrame): DataFrame containing alert data
+        snapshot (Mapping): Snapshot from build_alert_snapshot
         station_code (str): Station code to check
         
     Returns:
         str: Status message for the station
     """
-    import re
+    station_code = normalize_station_code(station_code)
+    return snapshot.get((station_code, station_code[:2] + 'L'), NO_ALERT_STATUS)
+
+
+def get_alert_snapshot():
+    """
+    Get the shared service alert snapshot, fetching a new payload once it is older than
+    ALERT_SNAPSHOT_TTL seconds. If the fetch fails, e.g. because the request has run out of
+    time, the last fetched snapshot is used instead.
     
-    # Normalize station code (remove leading zero in single-digit station numbers)
-    if len(station_code) >= 3 and station_code[2] == '0':
-        station_code = station_code[:2] + station_code[3:]
+    Returns:
+        MappingProxyType: Snapshot from build_alert_snapshot, or None if no snapshot could be fetched
+    """
+    with _alert_lock:
+        cached = _alert_cache["snapshot"]
+        if cached is not None and time.monotonic() - _alert_cache["fetched_at"] < ALERT_SNAPSHOT_TTL:
+            return cached
     
-    station_line = station_code[:2] + 'L'
-    status = "No train service issues at selected stations."
+    response = get_data_request('alert')
     
-    for index, row in data_df.iterrows():
-        if station_code in row['Stations']:
-            service_message = data_df.loc[index, 'MessageContent']
-            
-            # Clean service_message
-            split_strings = re.split(r'(\\d{4}hrs :)', service_message)
-            combined_strings = []
-            current_string = ''
-            
-            for string in split_strings:
-                if string.endswith('hrs :'):
-                    if current_string:
-                        combined_strings.append(current_string.strip())
-                    current_string = string
-                else:
-                    current_string += string
-            
-            if current_string:
-                combined_strings.append(current_string.strip())
-            
-            for string in combined_strings:
-                if station_line in string:
-                    status = string
-                    break
-            break
+    if response is None:
+        return cached
+    
+    snapshot = build_alert_snapshot(response)
+    
+    with _alert_lock:
+        _alert_cache["snapshot"] = snapshot
+        _alert_cache["fetched_at"] = time.monotonic()
     
-    return status
\ No newline at end of file
+    return snapshot
\ No newline at end of file
@@ -2,16 +2,90 @@
 OneMap API client for location-based services.
 """
 
+import json
 import requests
 from datetime import datetime
+from typing import NamedTuple, Optional, Tuple
 
 from config.settings import ONEMAP_API_KEY, ONEMAP_BASE_URL, MRT_LRT_DATA_PATH
 from config.settings import MAX_WALK_DISTANCE, NUM_ITINERARIES
+from utils.circuit_breaker import call_upstream, check_response
+from utils.deadline import call_timeout
+from utils.location_utils import find_station_location
+from utils.run_memo import run_memoized
 
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:  # orjson is optional; the standard library parser gives the same result
+    _json_loads = json.loads
 
+
+class RouteLeg(NamedTuple):
+    """
+    One leg of a OneMap itinerary, keeping only the fields the route summary uses.
+    """
+    mode: str                       # 'WALK', 'SUBWAY', ...
+    from_name: str
+    from_stop_code: Optional[str]   # station code, None for the origin
+    to_name: str
+    to_stop_code: Optional[str]     # station code, None for the destination
+    distance: float                 # metres
+    duration: float                 # seconds
+
+
+class RouteItinerary(NamedTuple):
+    """
+    One OneMap itinerary with its legs.
+    """
+    duration: float                 # seconds
+    fare: str
+    legs: Tuple[RouteLeg, ...]
+
+
+def decode_route_response(content):
+    """
+    Decode a OneMap routing response into compact itinerary records.
+    
+    Leg geometries, stop lists and the other fields the route summary does not use are
+    dropped while decoding, so only the small records are kept (and cached, and sent to the
+    worker process that summarizes them).
+    
+    Args:
+        content (bytes): Response body
+        
+    Returns:
+        list: RouteItinerary records; empty if the response has no plan, e.g. when OneMap
+        found no route between the points
+    """
+    itineraries = (_json_loads(content).get('plan') or {}).get('itineraries') or []
+    
+    return [
+        RouteItinerary(
+            itinerary['duration'],
+            itinerary['fare'],
+            tuple(
+                RouteLeg(
+                    leg['mode'],
+                    leg['from']['name'],
+                    leg['from'].get('stopCode'),
+                    leg['to']['name'],
+                    leg['to'].get('stopCode'),
+                    leg['distance'],
+                    leg['duration']
+                )
+                for leg in itinerary['legs']
+            )
+        )
+        for itinerary in itineraries
+    ]
+
+
+@run_memoized("get_gps_coordinates")
 def get_gps_coordinates(query):
     """
-    Get GPS coordinates for a location.
+    Get GPS coordinates for a location. When OneMap search is unavailable the last result
+    for the same query is used, or failing that the local station table.
     
     Args:
         query (str): Search query (location, postal code, address, etc.)
@@ -22,27 +96,32 @@ def get_gps_coordinates(query):
     url = f"{ONEMAP_BASE_URL}/common/elastic/search?searchVal={query}&returnGeom=Y&getAddrDetails=Y&pageNum=1"
     headers = {"Content-Type": "application/json"}
     
-    response = requests.get(url, headers=headers)
+    def search():
+        response = requests.get(url, headers=headers, timeout=call_timeout())
+        check_response(response)
+        return response.json()
+    
+    try:
+        api_output = call_upstream("onemap:search", search, cache_key=query.strip().upper())
+    except Exception as e:
+        print(f"OneMap search failed ({e}), using the station table.")
+        return find_station_location(query)
     
-    if response.status_code == 200:
-        api_output = response.json()
+    if api_output["found"] > 0:
+        result = api_output["results"][0]  # Extract the first result
+        latitude = float(result["LATITUDE"])
+        longitude = float(result["LONGITUDE"])
+        address = result["ADDRESS"]
         
-        if api_output["found"] > 0:
-            result = api_output["results"][0]  # Extract the first result
-            latitude = float(result["LATITUDE"])
-            longitude = float(result["LONGITUDE"])
-            address = result["ADDRESS"]
-            
-            return latitude, longitude, address
-        else:
-            return None, None, None
+        return latitude, longitude, address
     else:
         return None, None, None
 
 
 def get_public_transport_route(start_coords, end_coords, transit_mode="RAIL"):
     """
-    Get public transport routes between two points.
+    Get public transport routes between two points. When OneMap routing is unavailable the
+    last routes found between the same points are used.
     
     Args:
         start_coords (tuple): (latitude, longitude) of start point
@@ -50,7 +129,7 @@ def get_public_transport_route(start_coords, end_coords, transit_mode="RAIL"):
         transit_mode (str): Mode of transport (RAIL, BUS, etc.)
         
     Returns:
-        dict: JSON response from API
+        list: RouteItinerary records (empty if no route was found), or None if request failed
     """
     # Extract coordinates
     lat_start, lng_start = start_coords
@@ -81,7 +160,13 @@ def get_public_transport_route(start_coords, end_coords, transit_mode="RAIL"):
     }
     
     # Make API request
-    response = requests.get(url, headers=headers)
+    def route():
+        response = requests.get(url, headers=headers, timeout=call_timeout())
+        check_response(response)
+        return decode_route_response(response.content)
     
-    # Return response
-    return response.json() if response.ok else None
\ No newline at end of file
+    try:
+        return call_upstream("onemap:routing", route, cache_key=(start_coords, end_coords, transit_mode))
+    except Exception as e:
+        print(f"OneMap routing failed: {e}")
+        return None
\ No newline at end of file
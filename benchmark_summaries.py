@@ -0,0 +1,111 @@
+"""
+Benchmark of the transport summary renderers at growing input sizes.
+
+Each summarize_* function is timed on synthetic frames of increasing size. The time per row
+should stay roughly flat as the input grows, showing the rendering scales linearly.
+"""
+
+import argparse
+import random
+import timeit
+
+import pandas as pd
+
+from utils.transport_utils import (
+    summarize_crowd,
+    summarize_alerts,
+    summarize_nearest_taxi,
+    summarize_nearest_taxi_with_links,
+    summarize_time,
+    summarize_volume_time
+)
+
+CROWD_LEVELS = ['CROWD LEVEL LOW', 'CROWD LEVEL MODERATE', 'CROWD LEVEL HIGH']
+ALERT_STATUSES = ['No train service issues at selected stations.', 'Train service disrupted', 'Shuttle bus available']
+DAY_TYPES = ['WEEKDAY', 'WEEKENDS/HOLIDAY']
+VOLUME_LEVELS = ['LOW', 'MODERATE', 'HIGH']
+TIME_SLOTS = 16
+
+
+def _station_names(stations):
+    """Synthetic station names."""
+    return [f"STATION {i} (NS{i})" for i in range(stations)]
+
+
+def crowd_frame(stations, rng):
+    """Crowd levels, one row per station."""
+    return pd.DataFrame({'Station': _station_names(stations),
+                         'CrowdLevel': [rng.choice(CROWD_LEVELS) for _ in range(stations)]})
+
+
+def alert_frame(stations, rng):
+    """Service status, one row per station."""
+    return pd.DataFrame({'Station': _station_names(stations),
+                         'Status': [rng.choice(ALERT_STATUSES) for _ in range(stations)]})
+
+
+def taxi_frame(stations, rng):
+    """Taxi stands, one row per stand."""
+    return pd.DataFrame({
+        'Name': [f"Taxi stand {i}" for i in range(stations)],
+        'Distance': [rng.uniform(10, 500) for _ in range(stations)],
+        'Latitude': [rng.uniform(1.2, 1.45) for _ in range(stations)],
+        'Longitude': [rng.uniform(103.6, 104.0) for _ in range(stations)]
+    })
+
+
+def time_frame(stations, rng):
+    """Crowd level timings, one row per station and level."""
+    rows = [
+        {'Station': name, 'CrowdLevel': level,
+         'Start': sorted(rng.sample([f"{hour:02d}:00" for hour in range(7, 23)], 4))}
+        for name in _station_names(stations) for level in CROWD_LEVELS
+    ]
+    return pd.DataFrame(rows)
+
+
+def volume_frame(stations, rng):
+    """Crowd volume timings, one row per day type, station and time slot."""
+    rows = [
+        {'Station': name, 'DAY_TYPE': day, 'Start': [f"{7 + slot:02d}:00"],
+         'CrowdVolume': rng.choice(VOLUME_LEVELS)}
+        for day in DAY_TYPES for name in _station_names(stations) for slot in range(TIME_SLOTS)
+    ]
+    df = pd.DataFrame(rows)
+    df['CrowdVolume'] = pd.Categorical(df['CrowdVolume'], categories=VOLUME_LEVELS, ordered=True)
+    return df
+
+
+BENCHMARKS = [
+    ('summarize_crowd', summarize_crowd, crowd_frame),
+    ('summarize_alerts', summarize_alerts, alert_frame),
+    ('summarize_nearest_taxi', summarize_nearest_taxi, taxi_frame),
+    ('summarize_nearest_taxi_with_links', summarize_nearest_taxi_with_links, taxi_frame),
+    ('summarize_time', summarize_time, time_frame),
+    ('summarize_volume_time', summarize_volume_time, volume_frame)
+]
+
+
+def main():
+    """
+    Time every summary renderer at each input size and print the time per row.
+    """
+    # Parse command line arguments
+    parser = argparse.ArgumentParser(description="Benchmark the transport summary renderers")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000, 10000],
+                        help="Numbers of stations to render")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per size; the fastest is kept")
+    args = parser.parse_args()
+    
+    rng = random.Random(0)
+    
+    print(f"{'function':<36}{'stations':>10}{'rows':>10}{'total ms':>12}{'us/row':>10}")
+    for name, fn, make_frame in BENCHMARKS:
+        for stations in args.sizes:
+            df = make_frame(stations, rng)
+            seconds = min(timeit.repeat(lambda: fn(df), number=1, repeat=args.repeat))
+            print(f"{name:<36}{stations:>10}{len(df):>10}{seconds * 1000:>12.2f}{seconds * 1e6 / len(df):>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
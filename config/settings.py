@@ -21,11 +21,47 @@ MISTRAL_MODEL = "mistralai/Mixtral-8x7B-Instruct-v0.1"
 TEMPERATURE_OPENAI = 0  # Set temperature to 0 for deterministic outputs
 TEMPERATURE_HF = 0.01  # Set temperature to 0.01 for HuggingFace models
 
+# Model routing: single-intent questions go to the fast model, trip planning to the strong one
+MODEL_ROUTING_ENABLED = True
+OPENAI_FAST_MODEL = OPENAI_MODEL
+OPENAI_STRONG_MODEL = "gpt-4o"
+ROUTER_MAX_FAST_WORDS = 30  # longer questions are treated as planning queries
+ROUTER_INTENT_KEYWORDS = {
+    'route': ["route", "how do i get", "how to get", "from ", "travel to", "go to"],
+    'weather': ["weather", "rain", "forecast", "hot", "umbrella"],
+    'crowd': ["crowd", "busy", "packed", "volume", "peak"],
+    'alert': ["disruption", "delay", "breakdown", "alert", "service"],
+    'taxi': ["taxi", "cab"],
+    'places': ["eat", "food", "restaurant", "attraction", "things to do"],
+    'location': ["where is", "gps", "coordinates", "address", "postal"]
+}
+ROUTER_STRONG_KEYWORDS = [  # constraints that call for weighing options against each other
+    "should i", "or should", "better", "best", "compare", "recommend", "plan", "itinerary",
+    "elderly", "wheelchair", "pregnant", "injured", "sick", "stroller", "luggage", "kids", "children",
+    "avoid", "least", "fastest", "cheapest", "instead"
+]
+
+# LLM call deadlines, hedging and fallbacks
+LLM_CALL_TIMEOUT = 30  # seconds per OpenAI request before it counts as failed
+LLM_MAX_RETRIES = 1  # retries of a failed OpenAI request before falling back
+OPENAI_FALLBACK_MODELS = ["gpt-4o-mini", "gpt-3.5-turbo"]  # tried in order when a tier's model fails
+LLM_HEDGE_ENABLED = True  # send a second identical request when the first is slower than usual
+LLM_HEDGE_QUANTILE = 0.95  # latency quantile after which the hedged request is sent
+LLM_HEDGE_MIN_SAMPLES = 20  # requests observed before hedging starts
+LLM_HEDGE_MIN_DELAY = 1.0  # seconds, lower bound on the hedge delay
+HF_TIMEOUT = 20  # seconds per HuggingFace summarization request
+
 # Data paths
 DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data")
 MRT_LRT_DATA_PATH = os.path.join(DATA_DIR, "mrtlrt_gps.csv")
+STATION_NETWORK_DATA_PATH = os.path.join(DATA_DIR, "TrainStationNetwork.csv")
 TAXI_STANDS_DATA_PATH = os.path.join(DATA_DIR, "taxi_stands_Monthly.csv")
 TRANSPORT_NODE_DATA_PATH = os.path.join(DATA_DIR, "transport_node_train_202402.csv")
+CROWD_HISTORY_DB_PATH = os.path.join(DATA_DIR, "crowd_history.sqlite")
+VOLUME_DATA_DIR = os.path.join(DATA_DIR, "volume")
+TRANSPORT_NODE_DATA_DIR = os.path.join(VOLUME_DATA_DIR, "node")  # one sub-directory per month, e.g. "2024-02"
+TRANSPORT_OD_DATA_DIR = os.path.join(VOLUME_DATA_DIR, "od")  # one sub-directory per month, e.g. "2024-02"
+REFERENCE_DATA_DIR = os.path.join(DATA_DIR, "reference")  # derived datasets memory-mapped by every worker process
 
 # API URLs
 LTA_BASE_URL = "http://datamall2.mytransport.sg/ltaodataservice"
@@ -35,4 +71,72 @@ ONEMAP_BASE_URL = "https://www.onemap.gov.sg/api"
 MAX_WALK_DISTANCE = 100
 NUM_ITINERARIES = 3
 PASSENGER_UPPER_THRESHOLD = 95000  # threshold between "medium-to-high"
-PASSENGER_LOWER_THRESHOLD = 15000  # threshold between "low-to-medium"
\ No newline at end of file
+PASSENGER_LOWER_THRESHOLD = 15000  # threshold between "low-to-medium"
+VOLUME_LOWER_QUANTILE = 0.25  # quantile of historical volume between "low-to-medium"
+VOLUME_UPPER_QUANTILE = 0.75  # quantile of historical volume between "medium-to-high"
+
+# Cache parameters
+ALERT_SNAPSHOT_TTL = 60  # seconds before the train service alert snapshot is refetched
+
+# Real-time crowd poller
+TRAIN_LINES = ["CCL", "CEL", "CGL", "DTL", "EWL", "NEL", "NSL", "BPL", "SLRT", "PLRT", "TEL"]
+CROWD_POLLER_ENABLED = True
+CROWD_POLL_INTERVAL = 600  # DataMall refreshes real-time platform crowd data every 10 minutes
+CROWD_SNAPSHOT_MAX_AGE = 1200  # seconds before requests stop trusting the snapshot
+CROWD_FORECAST_POLL_INTERVAL = 86400  # DataMall publishes the platform crowd forecast once a day
+
+# Historical crowd store
+CROWD_HISTORY_ENABLED = True
+LOCAL_UTC_OFFSET_HOURS = 8  # Singapore time, used to bucket readings by time of day
+
+# Passenger volume ingestion
+VOLUME_DOWNLOAD_CHUNK_BYTES = 1024 * 1024  # bytes written to disk per download chunk
+VOLUME_INGEST_CHUNK_ROWS = 200000  # CSV rows decoded per ingestion chunk
+
+# Batch queries
+BATCH_MAX_WORKERS = 8  # concurrent upstream lookups per batch
+
+# CPU-bound tool stages
+CPU_POOL_WORKERS = min(4, os.cpu_count() or 1)  # worker processes; 0 runs the stages on the calling thread
+CPU_POOL_MAX_PENDING = 32  # stages queued or running at once before callers wait
+CPU_POOL_QUEUE_TIMEOUT = 30  # seconds a caller waits for a queue slot before giving up
+
+# Chat admission control
+ADMISSION_MAX_CONCURRENT = 8  # chat requests answered at once
+ADMISSION_MAX_QUEUE = 32  # chat requests waiting or being answered before new ones get a busy reply
+ADMISSION_MAX_WAIT = 30  # seconds a chat request may wait to start before it gets a busy reply
+SESSION_RATE_PER_MINUTE = 6  # sustained messages per minute per browser session
+SESSION_BURST = 3  # messages a session may send back to back
+
+# Agent tool calls
+TOOL_STEP_TIMEOUT = 45  # seconds to wait for all the tool calls of one agent step
+TOOL_MAX_WORKERS = 16  # tool calls running at once across all requests
+
+# Request deadlines
+REQUEST_DEADLINE = 90  # seconds a chat request may take end to end
+UPSTREAM_TIMEOUT = 10  # seconds per OneMap, DataMall or data.gov.sg request
+DEADLINE_MIN_CALL_BUDGET = 1.0  # seconds of budget needed to start an upstream call
+
+# Circuit breakers
+CIRCUIT_FAILURE_THRESHOLD = 5  # consecutive failed or slow calls that open an upstream's circuit
+CIRCUIT_SLOW_CALL_SECONDS = 5  # calls slower than this count as failures
+CIRCUIT_RESET_TIMEOUT = 30  # seconds an open circuit waits before letting a trial call through
+UPSTREAM_CACHE_SIZE = 256  # last good payloads kept per upstream
+WEATHER_CACHE_MAX_AGE = 3 * 3600  # seconds a last good weather forecast may be served for
+OFFLINE_MINUTES_PER_STOP = 2.5  # travel time between adjacent stations for offline routes
+OFFLINE_MINUTES_PER_TRANSFER = 5  # time to change lines for offline routes
+
+# Outbound rate limits
+UPSTREAM_RATE_LIMITS = {  # upstream -> (calls per second, burst), shared by every call the process makes
+    "onemap": (4.0, 10),  # OneMap allows 250 calls per minute
+    "datamall": (8.0, 16),
+    "datagov": (2.0, 4)
+}
+RATE_LIMIT_MAX_WAIT = 30  # seconds a call may queue for its upstream's quota
+RATE_LIMIT_RETRY_AFTER = 10  # seconds to pause an upstream after a 429 without a Retry-After header
+
+# Station name lookup
+STATION_MATCH_MIN_SCORE = 0.5  # trigram similarity a misspelt station name needs to be corrected
+STATION_MATCH_MARGIN = 0.1  # lead over the next closest station needed to correct it
+STATION_MATCH_MAX_EDITS = 2  # edits (including swapped letters) a name failing the trigram match may be off by
+STATION_MATCH_EDIT_CANDIDATES = 5  # closest trigram matches checked by edit distance
\ No newline at end of file
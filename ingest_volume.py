@@ -0,0 +1,36 @@
+"""
+Command-line entry point for ingesting DataMall passenger volume data into the volume store.
+"""
+
+import argparse
+from utils.volume_store import ingest_volume_download, ingest_volume_csv
+from utils.volume_thresholds import save_station_thresholds
+
+
+def main():
+    """
+    Download (or read) passenger volume data and write it as monthly partitions.
+    """
+    # Parse command line arguments
+    parser = argparse.ArgumentParser(description="Ingest DataMall passenger volume data")
+    parser.add_argument("--dataset", choices=["node", "od"], default="node",
+                        help="'node' for volume by station, 'od' for origin-destination volume")
+    parser.add_argument("--month", help="Month to download in YYYYMM format (defaults to the latest month)")
+    parser.add_argument("--csv", help="Ingest a local CSV file instead of downloading")
+    args = parser.parse_args()
+    
+    if args.csv:
+        months = ingest_volume_csv(args.csv, args.dataset)
+    else:
+        months = ingest_volume_download(args.dataset, args.month)
+    
+    # Precompute per-station crowd thresholds alongside each new month
+    if args.dataset == "node":
+        for month in months:
+            save_station_thresholds(month)
+    
+    print(f"Ingested {args.dataset} passenger volume for: {', '.join(months) or 'no months'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,16 +2,32 @@
 Agent configuration and execution.
 """
 
-from langchain.agents import load_tools, create_openai_tools_agent, AgentExecutor
+import time
+from collections import Counter
 
-from llm.models import init_openai_chat_model
+from langchain.agents import load_tools, create_openai_tools_agent
+from langchain_community.callbacks import get_openai_callback
+
+from llm.models import ModelRouter, STRONG_TIER
 from llm.prompts import get_chat_prompt_template
 from llm.memory import ConversationMemoryManager
+from llm.parallel_executor import ParallelAgentExecutor
 
 from tools.transport_tools import get_public_transport_route_concise, checkTrainAlert
 from tools.location_tools import getGPS, checkNearestTaxiStands, checkNearestAttractions
-from tools.crowd_tools import checkRealTimeCrowd, checkForecastVolume
+from tools.crowd_tools import (
+    checkRealTimeCrowd,
+    checkForecastVolume,
+    checkForecastCrowd,
+    checkTypicalCrowd,
+    checkTripVolume,
+    checkVolumeTrend
+)
 from tools.weather_tools import get_2h_24h_weather_forecast
+from tools.trip_tools import tripBriefing
+from utils.run_memo import memoize_tool, run_memo_scope
+from utils.deadline import deadline_scope
+from config.settings import REQUEST_DEADLINE
 
 
 class AgentManager:
@@ -21,13 +37,21 @@ class AgentManager:
     
     def __init__(self):
         """Initialize the agent manager."""
-        self.llm = init_openai_chat_model()
+        self.router = ModelRouter()
+        self.llm = self.router.llms[STRONG_TIER].primary
         self.tools = self._init_tools()
         self.prompt = get_chat_prompt_template()
         self.memory_manager = ConversationMemoryManager()
-        self.agent = self._create_agent()
-        self.agent_executor = self._create_agent_executor()
-        self.agent_chain = self.memory_manager.get_memory_chain(self.agent_executor)
+        self.memo_stats = Counter()
+        
+        # One agent per model tier, sharing the tools and conversation memory
+        self.agent_chains = {}
+        for tier, llm in self.router.llms.items():
+            agent_executor = self._create_agent_executor(self._create_agent(llm))
+            self.agent_chains[tier] = self.memory_manager.get_memory_chain(agent_executor)
+            if tier == STRONG_TIER:
+                self.agent, self.agent_executor = agent_executor.agent, agent_executor
+        self.agent_chain = self.agent_chains[STRONG_TIER]
     
     def _init_tools(self):
         """
@@ -41,6 +65,7 @@ class AgentManager:
         
         # Custom tools
         custom_tools = [
+            tripBriefing,
             get_public_transport_route_concise,
             getGPS,
             get_2h_24h_weather_forecast,
@@ -48,30 +73,40 @@ class AgentManager:
             checkNearestTaxiStands,
             checkForecastVolume,
             checkRealTimeCrowd,
+            checkForecastCrowd,
+            checkTypicalCrowd,
+            checkTripVolume,
+            checkVolumeTrend,
             checkNearestAttractions
         ]
         
-        # Combine all tools
-        return math_tools + custom_tools
+        # Combine all tools, memoizing repeated calls within each run
+        return [memoize_tool(tool) for tool in math_tools + custom_tools]
     
-    def _create_agent(self):
+    def _create_agent(self, llm):
         """
         Create the OpenAI tools agent.
         
+        Args:
+            llm: Chat model driving the agent
+            
         Returns:
             Agent: The configured agent
         """
-        return create_openai_tools_agent(self.llm, self.tools, self.prompt)
+        return create_openai_tools_agent(llm, self.tools, self.prompt)
     
-    def _create_agent_executor(self):
+    def _create_agent_executor(self, agent):
         """
-        Create the agent executor.
+        Create the agent executor, running the tool calls of each step concurrently.
         
+        Args:
+            agent: The agent to execute
+            
         Returns:
-            AgentExecutor: The agent executor
+            ParallelAgentExecutor: The agent executor
         """
-        return AgentExecutor(
-            agent=self.agent,
+        return ParallelAgentExecutor(
+            agent=agent,
             tools=self.tools,
             verbose=True,
             handle_parsing_errors=True,
@@ -80,7 +115,9 @@ class AgentManager:
     
     def invoke(self, input_message, session_id="default"):
         """
-        Invoke the agent with a user message.
+        Invoke the agent with a user message, using the model tier the router picks for it.
+        The whole run, including every tool and upstream call it makes, shares one
+        REQUEST_DEADLINE budget.
         
         Args:
             input_message (str): The user's input message
@@ -89,10 +126,24 @@ class AgentManager:
         Returns:
             dict: The agent's response
         """
-        return self.agent_chain.invoke(
-            {"input": input_message},
-            {"configurable": {"session_id": session_id}}
-        )
+        tier = self.router.route(input_message)
+        started_at = time.monotonic()
+        
+        with deadline_scope(REQUEST_DEADLINE), run_memo_scope() as memo, get_openai_callback() as usage:
+            response = self.agent_chains[tier].invoke(
+                {"input": input_message},
+                {"configurable": {"session_id": session_id}}
+            )
+        
+        self.router.record(tier, started_at, usage)
+        
+        # Keep running totals of tool calls and calls answered from the run memo
+        run_stats = memo.stats()
+        self.memo_stats.update(calls=run_stats['calls'], saved=run_stats['saved'])
+        if run_stats['saved']:
+            print(f"Tool calls: {run_stats['calls']}, answered from run memo: {run_stats['saved']}")
+        
+        return response
     
     def clear_memory(self):
         """Clear the conversation memory."""
@@ -66,8 +66,12 @@ class ConversationMemoryManager:
         # Create summarization chain
         summarization_chain = self.summarization_prompt | self.summarization_llm
         
-        # Generate summary
-        summary_message = summarization_chain.invoke({"chat_history": stored_messages})
+        # Generate summary; if the summarizer fails or times out, keep the full history this turn
+        try:
+            summary_message = summarization_chain.invoke({"chat_history": stored_messages})
+        except Exception as e:
+            print(f"Chat history summarization skipped ({type(e).__name__}: {e})")
+            return False
         
         # Replace chat history with summary
         self.chat_memory.clear()
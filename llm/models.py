@@ -2,7 +2,15 @@
 Module for initializing and configuring language models used in the application.
 """
 
+import contextvars
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
 from langchain_community.llms import HuggingFaceEndpoint
+from langchain_core.runnables import Runnable
 from langchain_openai import ChatOpenAI
 
 from config.settings import (
@@ -11,21 +19,44 @@ from config.settings import (
     OPENAI_MODEL,
     MISTRAL_MODEL,
     TEMPERATURE_OPENAI,
-    TEMPERATURE_HF
+    TEMPERATURE_HF,
+    MODEL_ROUTING_ENABLED,
+    OPENAI_FAST_MODEL,
+    OPENAI_STRONG_MODEL,
+    ROUTER_MAX_FAST_WORDS,
+    ROUTER_INTENT_KEYWORDS,
+    ROUTER_STRONG_KEYWORDS,
+    LLM_CALL_TIMEOUT,
+    LLM_MAX_RETRIES,
+    OPENAI_FALLBACK_MODELS,
+    LLM_HEDGE_ENABLED,
+    LLM_HEDGE_QUANTILE,
+    LLM_HEDGE_MIN_SAMPLES,
+    LLM_HEDGE_MIN_DELAY,
+    HF_TIMEOUT
 )
+from utils.deadline import DeadlineExceeded, check_deadline, remaining_time
+
+FAST_TIER = "fast"
+STRONG_TIER = "strong"
 
 
-def init_openai_chat_model():
+def init_openai_chat_model(model_name=OPENAI_MODEL):
     """
     Initialize the OpenAI chat model.
     
+    Args:
+        model_name (str): OpenAI model name
+        
     Returns:
         ChatOpenAI: Configured OpenAI chat model
     """
     return ChatOpenAI(
-        model_name=OPENAI_MODEL, 
+        model_name=model_name, 
         temperature=TEMPERATURE_OPENAI,
-        api_key=OPENAI_API_KEY
+        api_key=OPENAI_API_KEY,
+        timeout=LLM_CALL_TIMEOUT,
+        max_retries=LLM_MAX_RETRIES
     )
 
 
@@ -39,5 +70,282 @@ def init_huggingface_model():
     return HuggingFaceEndpoint(
         repo_id=MISTRAL_MODEL,
         temperature=TEMPERATURE_HF,
-        huggingfacehub_api_token=HUGGINGFACE_API_KEY
-    )
\ No newline at end of file
+        huggingfacehub_api_token=HUGGINGFACE_API_KEY,
+        timeout=HF_TIMEOUT
+    )
+
+
+# Shared by all hedged calls; a losing request finishes in the background
+_llm_pool = ThreadPoolExecutor(max_workers=32, thread_name_prefix="llm-call")
+
+
+class LatencyTracker:
+    """
+    Recent successful call latencies per model, used to time hedged requests.
+    """
+    
+    def __init__(self, window=200):
+        self._lock = threading.Lock()
+        self._window = window
+        self._latencies = {}
+    
+    def record(self, model_name, latency):
+        with self._lock:
+            self._latencies.setdefault(model_name, deque(maxlen=self._window)).append(latency)
+    
+    def hedge_delay(self, model_name):
+        """
+        Get how long to wait for a call before sending a hedged duplicate.
+        
+        Args:
+            model_name (str): Model being called
+            
+        Returns:
+            float: Seconds to wait, or None while too few calls have been observed
+        """
+        with self._lock:
+            latencies = sorted(self._latencies.get(model_name, ()))
+        
+        if len(latencies) < LLM_HEDGE_MIN_SAMPLES:
+            return None
+        return max(LLM_HEDGE_MIN_DELAY, latencies[min(len(latencies) - 1, int(LLM_HEDGE_QUANTILE * len(latencies)))])
+
+
+class ResilientChatModel(Runnable):
+    """
+    Chat model with bounded latency: each request has a timeout, capped by the time left in
+    the chat request, a request slower than
+    the model's usual p95 gets a hedged duplicate (the first answer wins), and a model that
+    fails or times out falls back to the next one in an ordered chain.
+    
+    Binding (e.g. the tools of an OpenAI tools agent) passes through to whichever model answers.
+    """
+    
+    def __init__(self, models, hedge=LLM_HEDGE_ENABLED, tracker=None):
+        """
+        Initialize the model chain.
+        
+        Args:
+            models (list): Chat models in fallback order; the first is the primary
+            hedge (bool): Whether to send hedged requests
+            tracker (LatencyTracker, optional): Latency history, shared between chains if given
+        """
+        self.models = models
+        self.primary = models[0]
+        self.hedge = hedge
+        self.tracker = tracker or LatencyTracker()
+        self.hedged_requests = 0
+        self.fallbacks = 0
+    
+    def _timed_invoke(self, model, input, config, kwargs):
+        """Call a model within the request's remaining time, recording its latency on success."""
+        remaining = remaining_time()
+        if remaining is not None:
+            kwargs = {**kwargs, 'timeout': max(0.1, min(LLM_CALL_TIMEOUT, remaining))}
+        
+        started_at = time.monotonic()
+        result = model.invoke(input, config, **kwargs)
+        self.tracker.record(model.model_name, time.monotonic() - started_at)
+        return result
+    
+    def _hedged_invoke(self, model, input, config, kwargs):
+        """Call a model, sending a duplicate request if the first is slower than usual."""
+        delay = self.tracker.hedge_delay(model.model_name) if self.hedge else None
+        if delay is None:
+            return self._timed_invoke(model, input, config, kwargs)
+        
+        def submit():
+            return _llm_pool.submit(contextvars.copy_context().run, self._timed_invoke, model, input, config, kwargs)
+        
+        pending = {submit()}
+        done, _ = wait(pending, timeout=delay)
+        if not done:
+            self.hedged_requests += 1
+            pending.add(submit())
+        
+        # First successful answer wins; only fail once every request has failed
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    return future.result()
+                error = future.exception()
+        raise error
+    
+    def invoke(self, input, config=None, **kwargs):
+        error = None
+        for index, model in enumerate(self.models):
+            try:
+                check_deadline()
+                result = self._hedged_invoke(model, input, config, kwargs)
+                if index > 0:
+                    self.fallbacks += 1
+                return result
+            except DeadlineExceeded:
+                raise
+            except Exception as e:
+                print(f"LLM call to {model.model_name} failed ({type(e).__name__}: {e})")
+                error = e
+        raise error
+
+
+def init_resilient_chat_model(model_name, fallback_models=OPENAI_FALLBACK_MODELS):
+    """
+    Initialize a chat model with deadlines, hedged requests and fallback models.
+    
+    Args:
+        model_name (str): Primary OpenAI model name
+        fallback_models (list): OpenAI model names to fall back to, in order
+        
+    Returns:
+        ResilientChatModel: The model chain
+    """
+    names = [model_name] + [name for name in fallback_models if name != model_name]
+    return ResilientChatModel([init_openai_chat_model(name) for name in dict.fromkeys(names)])
+
+
+def classify_query(query, max_fast_words=ROUTER_MAX_FAST_WORDS,
+                   intent_keywords=ROUTER_INTENT_KEYWORDS, strong_keywords=ROUTER_STRONG_KEYWORDS):
+    """
+    Decide which model tier should answer a query.
+    
+    A query goes to the fast tier when it is short, asks about at most one kind of thing
+    (a route, the weather, crowds, ...) and has none of the constraints that call for
+    weighing options against each other; everything else goes to the strong tier.
+    
+    Args:
+        query (str): The user's message
+        max_fast_words (int): Longest query the fast tier answers
+        intent_keywords (dict): Intent name to phrases that signal it
+        strong_keywords (list): Phrases that always escalate to the strong tier
+        
+    Returns:
+        str: FAST_TIER or STRONG_TIER
+    """
+    text = " ".join(query.lower().split())
+    
+    def mentions(keywords):
+        # Match at the start of a word, so 'rain' does not match 'train'
+        return any(re.search(r"\b" + re.escape(keyword), text) for keyword in keywords)
+    
+    if len(text.split()) > max_fast_words:
+        return STRONG_TIER
+    if mentions(strong_keywords):
+        return STRONG_TIER
+    
+    intents = sum(1 for keywords in intent_keywords.values() if mentions(keywords))
+    return FAST_TIER if intents <= 1 else STRONG_TIER
+
+
+class TierMetrics:
+    """
+    Request count, latency, token usage and cost of one model tier.
+    """
+    
+    def __init__(self, window=500):
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=window)
+        self.requests = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cost = 0.0
+    
+    def record(self, latency, prompt_tokens=0, completion_tokens=0, cost=0.0):
+        with self._lock:
+            self._latencies.append(latency)
+            self.requests += 1
+            self.prompt_tokens += prompt_tokens
+            self.completion_tokens += completion_tokens
+            self.cost += cost
+    
+    def snapshot(self):
+        """
+        Get the tier's metrics.
+        
+        Returns:
+            dict: Requests, latency percentiles (seconds) over recent requests, tokens and cost (USD)
+        """
+        with self._lock:
+            latencies = sorted(self._latencies)
+            metrics = {
+                'requests': self.requests,
+                'prompt_tokens': self.prompt_tokens,
+                'completion_tokens': self.completion_tokens,
+                'cost_usd': round(self.cost, 6)
+            }
+        
+        for name, q in (('latency_p50', 0.50), ('latency_p95', 0.95)):
+            metrics[name] = round(latencies[min(len(latencies) - 1, int(q * len(latencies)))], 3) if latencies else None
+        return metrics
+
+
+class ModelRouter:
+    """
+    Routes each query to the fast or the strong chat model and keeps per-tier metrics.
+    """
+    
+    def __init__(self, enabled=MODEL_ROUTING_ENABLED, fast_model=OPENAI_FAST_MODEL, strong_model=OPENAI_STRONG_MODEL,
+                 classifier=classify_query):
+        """
+        Initialize the router and its models.
+        
+        Args:
+            enabled (bool): If False, every query goes to the strong tier
+            fast_model (str): OpenAI model name of the fast tier
+            strong_model (str): OpenAI model name of the strong tier
+            classifier (callable): Maps a query to FAST_TIER or STRONG_TIER
+        """
+        self.enabled = enabled
+        self.classifier = classifier
+        self.models = {STRONG_TIER: strong_model}
+        if enabled:
+            self.models[FAST_TIER] = fast_model
+        self.llms = {tier: init_resilient_chat_model(model) for tier, model in self.models.items()}
+        self.metrics = {tier: TierMetrics() for tier in self.models}
+    
+    def route(self, query):
+        """
+        Choose the tier for a query.
+        
+        Args:
+            query (str): The user's message
+            
+        Returns:
+            str: Tier name, a key of self.llms
+        """
+        if not self.enabled:
+            return STRONG_TIER
+        return self.classifier(query)
+    
+    def record(self, tier, started_at, usage=None):
+        """
+        Record a finished request.
+        
+        Args:
+            tier (str): Tier that answered
+            started_at (float): time.monotonic() when the request started
+            usage (OpenAICallbackHandler, optional): Token and cost totals of the request
+        """
+        if usage is None:
+            self.metrics[tier].record(time.monotonic() - started_at)
+        else:
+            self.metrics[tier].record(time.monotonic() - started_at, usage.prompt_tokens,
+                                      usage.completion_tokens, usage.total_cost)
+    
+    def snapshot(self):
+        """
+        Get the metrics of every tier.
+        
+        Returns:
+            dict: Tier name to its model name and metrics
+        """
+        return {
+            tier: {
+                'model': self.models[tier],
+                **metrics.snapshot(),
+                'hedged_requests': self.llms[tier].hedged_requests,
+                'fallbacks': self.llms[tier].fallbacks
+            }
+            for tier, metrics in self.metrics.items()
+        }
@@ -0,0 +1,89 @@
+"""
+Agent executor that runs the tool calls of one agent step concurrently.
+"""
+
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import NamedTuple
+
+from langchain.agents import AgentExecutor
+from langchain_core.agents import AgentAction, AgentStep
+
+from config.settings import TOOL_STEP_TIMEOUT, TOOL_MAX_WORKERS
+from utils.deadline import remaining_time
+
+# Shared so a tool call that overruns its step deadline keeps running in the background
+# without holding up the step that abandoned it
+_tool_pool = ThreadPoolExecutor(max_workers=TOOL_MAX_WORKERS, thread_name_prefix="agent-tool")
+
+
+class _DeferredToolMap(dict):
+    """Tool map marking that the step's tool calls are collected rather than run one by one."""
+
+
+class _PendingToolCall(NamedTuple):
+    """A tool call collected from a step, run once every call of the step is known."""
+    name_to_tool_map: dict
+    color_mapping: dict
+    agent_action: AgentAction
+    run_manager: object
+
+
+class ParallelAgentExecutor(AgentExecutor):
+    """
+    AgentExecutor whose tool calls within one step run at the same time.
+    
+    The OpenAI tools agent can ask for several tools in one step (e.g. weather, route and
+    crowd levels); they are independent of each other, so the step waits only as long as its
+    slowest tool. Tools that have not answered by the step deadline, or by the request's
+    deadline if that comes first, are reported to the agent as timed out, and it carries on
+    with the observations it has.
+    """
+    
+    step_timeout: float = TOOL_STEP_TIMEOUT
+    """Seconds to wait for all the tool calls of one step."""
+    
+    def _iter_next_step(self, name_to_tool_map, color_mapping, inputs, intermediate_steps, run_manager=None):
+        pending = []
+        
+        # Let the base class plan the step; its tool calls come back as pending calls
+        for item in super()._iter_next_step(
+            _DeferredToolMap(name_to_tool_map), color_mapping, inputs, intermediate_steps, run_manager
+        ):
+            if isinstance(item, _PendingToolCall):
+                pending.append(item)
+            else:
+                yield item
+        
+        if not pending:
+            return
+        
+        # Each call runs in a copy of this context, so tracing and request state follow it
+        futures = [
+            _tool_pool.submit(contextvars.copy_context().run, self._run_tool_call, call)
+            for call in pending
+        ]
+        remaining = remaining_time()
+        wait(futures, timeout=self.step_timeout if remaining is None else max(0, min(self.step_timeout, remaining)))
+        
+        for call, future in zip(pending, futures):
+            if future.done():
+                yield future.result()
+            else:
+                future.cancel()
+                yield AgentStep(
+                    action=call.agent_action,
+                    observation=f"Error: {call.agent_action.tool} did not respond in time. "
+                                f"Please try again later."
+                )
+    
+    def _run_tool_call(self, call):
+        """Run one collected tool call."""
+        return super()._perform_agent_action(
+            dict(call.name_to_tool_map), call.color_mapping, call.agent_action, call.run_manager
+        )
+    
+    def _perform_agent_action(self, name_to_tool_map, color_mapping, agent_action, run_manager=None):
+        if isinstance(name_to_tool_map, _DeferredToolMap):
+            return _PendingToolCall(name_to_tool_map, color_mapping, agent_action, run_manager)
+        return super()._perform_agent_action(name_to_tool_map, color_mapping, agent_action, run_manager)
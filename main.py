@@ -5,6 +5,9 @@ Main entry point for the GPTTransit application.
 import argparse
 from llm.agent import AgentManager
 from ui.gradio_interface import ChatInterface
+from utils.crowd_poller import get_crowd_poller
+from utils.crowd_store import get_crowd_store
+from config.settings import CROWD_POLLER_ENABLED, CROWD_HISTORY_ENABLED
 
 
 def main():
@@ -18,6 +21,13 @@ def main():
     parser.add_argument("--server-port", type=int, default=7860, help="Port to run the server on")
     args = parser.parse_args()
     
+    # Start refreshing (and recording) real-time crowd levels in the background
+    if CROWD_POLLER_ENABLED:
+        crowd_poller = get_crowd_poller()
+        if CROWD_HISTORY_ENABLED:
+            crowd_poller.store = get_crowd_store()
+        crowd_poller.start()
+    
     # Initialize the agent manager
     agent_manager = AgentManager()
     
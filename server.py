@@ -0,0 +1,36 @@
+"""
+Entry point for the GPTTransit JSON HTTP service, which serves the transit lookups without the LLM.
+"""
+
+import argparse
+import uvicorn
+from ui.http_service import create_app
+from utils.crowd_poller import get_crowd_poller
+from utils.crowd_store import get_crowd_store
+from config.settings import CROWD_POLLER_ENABLED, CROWD_HISTORY_ENABLED
+
+
+def main():
+    """
+    Main function to run the GPTTransit HTTP service.
+    """
+    # Parse command line arguments
+    parser = argparse.ArgumentParser(description="GPTTransit JSON HTTP Service")
+    parser.add_argument("--host", default="localhost", help="Host to listen on")   # 0.0.0.0
+    parser.add_argument("--port", type=int, default=8000, help="Port to run the server on")
+    args = parser.parse_args()
+    
+    # Start refreshing (and recording) real-time crowd levels in the background
+    if CROWD_POLLER_ENABLED:
+        crowd_poller = get_crowd_poller()
+        if CROWD_HISTORY_ENABLED:
+            crowd_poller.store = get_crowd_store()
+        crowd_poller.start()
+    
+    # Launch the service
+    print("Launching GPTTransit HTTP service...")
+    uvicorn.run(create_app(), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
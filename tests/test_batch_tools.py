@@ -0,0 +1,74 @@
+"""
+Tests for batch station queries sharing lookups with the agent's own tool calls.
+"""
+
+import time
+from datetime import datetime, timedelta
+from types import MappingProxyType, SimpleNamespace
+
+import pandas as pd
+
+import tools.batch_tools as batch_tools
+import tools.transport_tools as transport_tools
+from config.settings import CROWD_SNAPSHOT_MAX_AGE
+from tools.batch_tools import batch_transit_query, normalize_station_query, resolve_query_stations
+from tools.transport_tools import get_public_transport_route_concise
+from utils.crowd_poller import CrowdSnapshot
+from utils.run_memo import run_memo_scope
+
+
+def test_equivalent_queries_normalize_alike():
+    assert normalize_station_query("Jurong East , bishan;20-10-2026,18:00") == "JURONG EAST,BISHAN"
+    assert normalize_station_query("jurong  east,Bishan") == "JURONG EAST,BISHAN"
+
+
+def test_briefing_route_shares_the_agents_memo_entry(monkeypatch):
+    routing_calls = []
+    
+    def get_public_transport_route(start_coords, end_coords):
+        # Routing unavailable, so the route comes from the station network
+        routing_calls.append((start_coords, end_coords))
+        return None
+    
+    monkeypatch.setattr(transport_tools, "get_public_transport_route", get_public_transport_route)
+    
+    with run_memo_scope() as memo:
+        # The agent calls the route tool with a dict; the briefing resolves the same pair
+        route = get_public_transport_route_concise.run({"station": "Jurong East,Bishan"})
+        station_df, briefing_route = resolve_query_stations("Jurong East, Bishan;18:00")
+    
+    assert briefing_route == route
+    assert station_df is not None
+    assert len(routing_calls) == 1
+    assert memo.stats()['saved'] == 1
+
+def test_carried_over_lines_are_labelled_stale(monkeypatch):
+    fetched_at = time.monotonic() - 2 * CROWD_SNAPSHOT_MAX_AGE
+    snapshot = CrowdSnapshot(
+        levels=MappingProxyType({'EW24': 'h', 'NS1': 'l'}),
+        lines=frozenset({'EWL', 'NSL'}),
+        updated_at=datetime.now(),
+        monotonic_at=fetched_at,
+        line_times=MappingProxyType({'EWL': fetched_at, 'NSL': time.monotonic()})
+    )
+    monkeypatch.setattr(batch_tools, "get_crowd_poller", lambda: SimpleNamespace(snapshot=snapshot))
+    # The live fetch for the stale line fails
+    monkeypatch.setattr(batch_tools, "get_crowd_request", lambda url_type, line: None)
+    
+    crowd_snapshot = batch_tools.fetch_crowd_snapshot(['EWL', 'NSL'])
+    stale = batch_tools.summarize_snapshot_crowd(crowd_snapshot, pd.DataFrame({'stn_codes': ['EW24'], 'stn_lines': ['EWL']}))
+    fresh = batch_tools.summarize_snapshot_crowd(crowd_snapshot, pd.DataFrame({'stn_codes': ['NS1'], 'stn_lines': ['NSL']}))
+    
+    assert crowd_snapshot.updated_at <= datetime.now() - timedelta(seconds=CROWD_SNAPSHOT_MAX_AGE)
+    assert stale.startswith("Live crowd data is unavailable, showing readings from ")
+    assert "EW24" in stale
+    assert not fresh.startswith("Live crowd data is unavailable")
+
+
+def test_unknown_station_message_is_passed_through():
+    result = batch_transit_query(["Nowhere Town"], include=("crowd", "alerts"))
+    
+    assert result["Nowhere Town"] == {
+        "crowd": "Station 'NOWHERE TOWN' not found, do ensure that the spelling is correct.",
+        "alerts": "Station 'NOWHERE TOWN' not found, do ensure that the spelling is correct."
+    }
\ No newline at end of file
@@ -0,0 +1,216 @@
+"""
+Tests for the upstream circuit breaker state machine.
+"""
+
+import pytest
+import requests
+
+from utils import circuit_breaker
+from utils.circuit_breaker import CLOSED, OPEN, HALF_OPEN, CircuitBreaker, CircuitOpenError, UpstreamError
+from utils.deadline import DeadlineExceeded, deadline_scope
+from utils.rate_limiter import RateLimitExceeded
+
+
+class FakeClock:
+    """Monotonic clock that only moves when told to."""
+    
+    def __init__(self):
+        self.now = 1000.0
+    
+    def monotonic(self):
+        return self.now
+    
+    def advance(self, seconds):
+        self.now += seconds
+
+
+class FakeLimiter:
+    """Rate limiter recording the pauses asked of it."""
+    
+    def __init__(self):
+        self.paused = []
+    
+    def acquire(self, timeout=None):
+        pass
+    
+    def pause(self, seconds):
+        self.paused.append(seconds)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(circuit_breaker, "time", clock)
+    return clock
+
+
+def fail():
+    raise ConnectionError("upstream down")
+
+
+def ok():
+    return "payload"
+
+
+def open_breaker(breaker):
+    for _ in range(breaker.failure_threshold):
+        with pytest.raises(ConnectionError):
+            breaker.call(fail)
+
+
+def test_opens_after_consecutive_failures(clock):
+    breaker = CircuitBreaker("test", failure_threshold=3, reset_timeout=30)
+    
+    for _ in range(2):
+        with pytest.raises(ConnectionError):
+            breaker.call(fail)
+    assert breaker.state == CLOSED
+    
+    with pytest.raises(ConnectionError):
+        breaker.call(fail)
+    assert breaker.state == OPEN
+    assert breaker.snapshot()['opened'] == 1
+
+
+def test_success_resets_the_failure_count(clock):
+    breaker = CircuitBreaker("test", failure_threshold=3)
+    
+    for _ in range(2):
+        with pytest.raises(ConnectionError):
+            breaker.call(fail)
+    assert breaker.call(ok) == "payload"
+    with pytest.raises(ConnectionError):
+        breaker.call(fail)
+    
+    assert breaker.state == CLOSED
+    assert breaker.snapshot()['consecutive_failures'] == 1
+
+
+def test_open_circuit_rejects_calls_without_calling(clock):
+    breaker = CircuitBreaker("test", failure_threshold=2, reset_timeout=30)
+    open_breaker(breaker)
+    calls = []
+    
+    with pytest.raises(CircuitOpenError):
+        breaker.call(calls.append, 1)
+    
+    assert calls == []
+    assert breaker.snapshot()['rejected'] == 1
+
+
+def test_trial_call_after_cool_down_closes_the_circuit(clock):
+    breaker = CircuitBreaker("test", failure_threshold=2, reset_timeout=30)
+    open_breaker(breaker)
+    
+    clock.advance(29)
+    assert breaker.snapshot()['state'] == OPEN
+    clock.advance(1)
+    assert breaker.snapshot()['state'] == HALF_OPEN
+    
+    assert breaker.call(ok) == "payload"
+    assert breaker.state == CLOSED
+    assert breaker.snapshot()['consecutive_failures'] == 0
+
+
+def test_failed_trial_call_reopens_the_circuit(clock):
+    breaker = CircuitBreaker("test", failure_threshold=2, reset_timeout=30)
+    open_breaker(breaker)
+    clock.advance(30)
+    
+    with pytest.raises(ConnectionError):
+        breaker.call(fail)
+    assert breaker.state == OPEN
+    
+    # The cool-down starts again from the failed trial
+    clock.advance(29)
+    with pytest.raises(CircuitOpenError):
+        breaker.call(ok)
+
+
+def test_half_open_circuit_lets_one_trial_through(clock):
+    breaker = CircuitBreaker("test", failure_threshold=2, reset_timeout=30)
+    open_breaker(breaker)
+    clock.advance(30)
+    
+    def trial():
+        # A second call while the trial is running is refused
+        with pytest.raises(CircuitOpenError):
+            breaker.call(ok)
+        return "trial"
+    
+    assert breaker.call(trial) == "trial"
+    assert breaker.state == CLOSED
+
+
+def test_slow_calls_count_as_failures(clock):
+    breaker = CircuitBreaker("test", failure_threshold=2, slow_call_seconds=5)
+    
+    def slow():
+        clock.advance(6)
+        return "late"
+    
+    assert breaker.call(slow) == "late"
+    assert breaker.state == CLOSED
+    assert breaker.call(slow) == "late"
+    assert breaker.state == OPEN
+    assert breaker.snapshot()['slow_calls'] == 2
+
+
+@pytest.mark.parametrize("error", [DeadlineExceeded(), RateLimitExceeded("quota")])
+def test_out_of_time_or_quota_is_not_an_upstream_failure(clock, error):
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=30)
+    
+    def give_up():
+        raise error
+    
+    with pytest.raises(type(error)):
+        breaker.call(give_up)
+    assert breaker.state == CLOSED
+    
+    # A trial that gives up leaves the next call free to try
+    with pytest.raises(ConnectionError):
+        breaker.call(fail)
+    clock.advance(30)
+    with pytest.raises(type(error)):
+        breaker.call(give_up)
+    assert breaker.call(ok) == "payload"
+    assert breaker.state == CLOSED
+
+
+
+def time_out():
+    raise requests.Timeout("read timed out")
+
+
+def test_timeout_cut_short_by_the_deadline_is_not_an_upstream_failure(clock):
+    breaker = CircuitBreaker("test", failure_threshold=1)
+    
+    # Less time is left than the upstream timeout, so the call's timeout was capped
+    with deadline_scope(2):
+        with pytest.raises(DeadlineExceeded):
+            breaker.call(time_out)
+    
+    assert breaker.state == CLOSED
+    assert breaker.snapshot()['failures'] == 0
+
+
+def test_timeout_with_the_full_budget_is_an_upstream_failure(clock):
+    breaker = CircuitBreaker("test", failure_threshold=1)
+    
+    with pytest.raises(requests.Timeout):
+        breaker.call(time_out)
+    
+    assert breaker.state == OPEN
+
+def test_too_many_requests_pauses_the_limiter(clock):
+    breaker = CircuitBreaker("test", failure_threshold=5)
+    limiter = FakeLimiter()
+    
+    def throttled():
+        raise UpstreamError("status code: 429", status_code=429, retry_after="12")
+    
+    with pytest.raises(UpstreamError):
+        breaker.call(throttled, limiter=limiter)
+    
+    assert limiter.paused == [12.0]
+    assert breaker.snapshot()['failures'] == 1
\ No newline at end of file
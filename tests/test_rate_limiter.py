@@ -0,0 +1,140 @@
+"""
+Tests for the upstream rate limiter's token bucket and priority queue.
+"""
+
+import threading
+import time
+
+import pytest
+
+from utils.rate_limiter import (
+    BACKGROUND,
+    INTERACTIVE,
+    RateLimitExceeded,
+    UpstreamRateLimiter,
+    request_priority
+)
+
+
+def wait_for_waiters(limiter, count, timeout=2):
+    """Wait until the given number of calls are queued on the limiter."""
+    deadline = time.monotonic() + timeout
+    while sum(limiter.snapshot()['waiting'].values()) < count:
+        assert time.monotonic() < deadline, "calls did not queue in time"
+        time.sleep(0.005)
+
+
+def queue_calls(limiter, calls):
+    """
+    Queue calls on an empty bucket one after another, then let them run.
+    
+    Args:
+        limiter (UpstreamRateLimiter): Limiter with no tokens left
+        calls (list): (name, priority) of each call, in the order they queue
+    
+    Returns:
+        list: Call names in the order they got a token
+    """
+    order = []
+    lock = threading.Lock()
+    
+    def call(name, priority):
+        limiter.acquire(priority=priority, timeout=5)
+        with lock:
+            order.append(name)
+    
+    threads = []
+    for count, (name, priority) in enumerate(calls, start=1):
+        thread = threading.Thread(target=call, args=(name, priority))
+        thread.start()
+        threads.append(thread)
+        wait_for_waiters(limiter, count)
+    
+    for thread in threads:
+        thread.join(timeout=5)
+    return order
+
+
+def drained_limiter(rate=20):
+    """Limiter with a burst of one whose token is already taken."""
+    limiter = UpstreamRateLimiter("test", rate=rate, burst=1)
+    limiter.acquire()
+    return limiter
+
+
+def test_burst_is_available_immediately():
+    limiter = UpstreamRateLimiter("test", rate=0.001, burst=3)
+    
+    for _ in range(3):
+        limiter.acquire(timeout=0)
+    
+    with pytest.raises(RateLimitExceeded):
+        limiter.acquire(timeout=0.01)
+    assert limiter.snapshot()['timed_out'] == 1
+
+
+def test_interactive_calls_go_ahead_of_queued_background_calls():
+    limiter = drained_limiter()
+    
+    order = queue_calls(limiter, [
+        ('background-1', BACKGROUND),
+        ('background-2', BACKGROUND),
+        ('interactive', INTERACTIVE)
+    ])
+    
+    assert order == ['interactive', 'background-1', 'background-2']
+
+
+def test_calls_of_the_same_priority_are_served_in_order():
+    limiter = drained_limiter()
+    
+    order = queue_calls(limiter, [(f"call-{i}", INTERACTIVE) for i in range(4)])
+    
+    assert order == ['call-0', 'call-1', 'call-2', 'call-3']
+
+
+def test_priority_defaults_to_the_request_context():
+    limiter = drained_limiter()
+    order = []
+    
+    def background_call():
+        with request_priority(BACKGROUND):
+            limiter.acquire(timeout=5)
+        order.append('background')
+    
+    def interactive_call():
+        limiter.acquire(timeout=5)
+        order.append('interactive')
+    
+    threads = [threading.Thread(target=background_call), threading.Thread(target=interactive_call)]
+    threads[0].start()
+    wait_for_waiters(limiter, 1)
+    threads[1].start()
+    wait_for_waiters(limiter, 2)
+    for thread in threads:
+        thread.join(timeout=5)
+    
+    assert order == ['interactive', 'background']
+
+
+def test_timed_out_waiter_does_not_block_the_queue():
+    limiter = drained_limiter(rate=5)
+    
+    with pytest.raises(RateLimitExceeded):
+        limiter.acquire(priority=INTERACTIVE, timeout=0.01)
+    
+    limiter.acquire(priority=BACKGROUND, timeout=1)
+    assert limiter.snapshot()['waiting'] == {'interactive': 0, 'background': 0}
+
+
+def test_pause_holds_back_tokens():
+    limiter = UpstreamRateLimiter("test", rate=1000, burst=5)
+    limiter.pause(0.2)
+    
+    with pytest.raises(RateLimitExceeded):
+        limiter.acquire(timeout=0.05)
+    
+    started_at = time.monotonic()
+    limiter.acquire(timeout=1)
+    assert time.monotonic() - started_at >= 0.1
+    assert limiter.snapshot()['throttled'] == 1
\ No newline at end of file
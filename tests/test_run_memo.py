@@ -0,0 +1,62 @@
+"""
+Tests for run-scoped memoization of tool calls.
+"""
+
+from langchain.agents import tool
+
+from utils.run_memo import run_memo_scope, run_memoized
+
+calls = []
+
+
+@tool
+@run_memoized("lookup_route")
+def lookup_route(station: str, mode: str = "RAIL") -> str:
+    """Look up a route."""
+    calls.append((station, mode))
+    return f"Route for {station} by {mode}"
+
+
+def setup_function():
+    calls.clear()
+
+
+def test_dict_and_positional_calls_share_one_entry():
+    with run_memo_scope() as memo:
+        # The agent passes a dict of arguments; nested tool calls pass the text positionally
+        first = lookup_route.run({"station": "Jurong East,Bishan"})
+        second = lookup_route.func("Jurong East,Bishan")
+        third = lookup_route.invoke("jurong east, bishan")
+    
+    assert first == second == third
+    assert calls == [("Jurong East,Bishan", "RAIL")]
+    assert memo.stats()['saved'] == 2
+
+
+def test_defaults_are_part_of_the_key():
+    with run_memo_scope():
+        lookup_route.func("Bishan")
+        lookup_route.func("Bishan", mode="RAIL")
+        lookup_route.func("Bishan", "BUS")
+    
+    assert calls == [("Bishan", "RAIL"), ("Bishan", "BUS")]
+
+
+def test_calls_outside_a_run_are_not_memoized():
+    lookup_route.func("Bishan")
+    lookup_route.func("Bishan")
+    
+    assert len(calls) == 2
+
+
+def test_transient_results_are_retried():
+    results = iter(["Please try again later.", "Route found"])
+    
+    @run_memoized("flaky")
+    def flaky(station):
+        return next(results)
+    
+    with run_memo_scope():
+        assert flaky("Bishan") == "Please try again later."
+        assert flaky(station="Bishan") == "Route found"
+        assert flaky("Bishan") == "Route found"
\ No newline at end of file
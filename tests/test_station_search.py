@@ -0,0 +1,36 @@
+"""
+Tests for typo-tolerant station name lookup.
+"""
+
+import pandas as pd
+
+from utils.station_search import StationNameIndex
+
+STATIONS = pd.DataFrame({
+    'station_code': ['NS17', 'NS1', 'EW9', 'EW8'],
+    'station_name': ['BISHAN', 'JURONGEAST', 'ALJUNIED', 'PAYALEBAR'],
+    'full_name': ['Bishan MRT Station', 'Jurong East MRT Station', 'Aljunied MRT Station', 'Paya Lebar MRT Station']
+})
+
+
+def test_trigram_matches_resolve():
+    index = StationNameIndex(STATIONS)
+    
+    assert index.resolve("Bishan MRT") == "BISHAN"
+    assert index.resolve("Jurong Eats") == "JURONGEAST"
+
+
+def test_swapped_letters_resolve_by_edit_distance():
+    index = StationNameIndex(STATIONS)
+    
+    # Too few trigrams survive the swap for the trigram match alone
+    assert index.search("Bisahn", k=1)[0][1] < 0.5
+    assert index.resolve("Bisahn") == "BISHAN"
+    assert index.resolve("Aljuneid") == "ALJUNIED"
+
+
+def test_distant_or_short_queries_are_not_corrected():
+    index = StationNameIndex(STATIONS)
+    
+    assert index.resolve("Bsinha") is None
+    assert index.resolve("Xyz") is None
\ No newline at end of file
@@ -0,0 +1,26 @@
+"""
+Tests for reading monthly passenger volume partitions after they are re-ingested.
+"""
+
+import io
+
+from utils import volume_store
+from utils.volume_store import VolumeDataset, ingest_volume_csv
+
+CSV_HEADER = "YEAR_MONTH,DAY_TYPE,TIME_PER_HOUR,PT_TYPE,PT_CODE,TOTAL_TAP_IN_VOLUME,TOTAL_TAP_OUT_VOLUME\n"
+
+
+def volume_csv(tap_in):
+    """One month of volume data for a single station and hour."""
+    return io.BytesIO((CSV_HEADER + f"2026-09,WEEKDAY,8,TRAIN,NS1,{tap_in},100\n").encode())
+
+
+def test_reingested_month_is_read_again(tmp_path, monkeypatch):
+    monkeypatch.setitem(volume_store.VOLUME_DATASET_DIRS, 'node', str(tmp_path))
+    dataset = VolumeDataset('node')
+    
+    ingest_volume_csv(volume_csv(1000), 'node')
+    assert dataset.station_volume('NS1', 'WEEKDAY', 8).to_dict() == {'2026-09': 1100}
+    
+    ingest_volume_csv(volume_csv(2000), 'node')
+    assert dataset.station_volume('NS1', 'WEEKDAY', 8).to_dict() == {'2026-09': 2100}
\ No newline at end of file
@@ -0,0 +1,241 @@
+"""
+Batch queries over many stations or station pairs at once.
+"""
+
+import contextvars
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from types import MappingProxyType
+
+import pandas as pd
+
+from api.lta_api import get_crowd_request, get_alert_snapshot, lookup_station_alert
+from config.settings import BATCH_MAX_WORKERS
+from tools.transport_tools import get_public_transport_route_concise
+from utils.crowd_poller import CrowdSnapshot, get_crowd_poller
+from utils.crowd_utils import clean_realtime_crowd, clean_snapshot_crowd
+from utils.run_memo import normalize_argument
+from utils.time_utils import clean_time_prompt
+from utils.transport_utils import (
+    clean_station_prompt,
+    get_station_codes,
+    get_station_names,
+    summarize_alerts
+)
+
+BATCH_SECTIONS = ("route", "crowd", "alerts")
+
+
+def normalize_station_query(query):
+    """
+    Normalize a station or station pair query so equivalent queries share one lookup.
+    
+    Uses the run memo's normalization, so a route planned here and the same route asked for
+    by the agent share one memo entry.
+    
+    Args:
+        query (str): 'station_name' OR 'start_station,end_station', optionally followed by ';date,time'
+        
+    Returns:
+        str: Upper-case query without time information or spaces around ','
+    """
+    text, _ = clean_time_prompt(query)
+    return normalize_argument(text)
+
+
+def _route_stations(route):
+    """Extract the stations of a route summary, or None if the route lookup failed."""
+    if "Error" in route or "Route " not in route:
+        return None
+    return clean_station_prompt(route)[0]
+
+
+def _named_stations(station_name):
+    """Get the stations of a single station name, or None if it is unknown."""
+    station_codes = get_station_codes(station_name)
+    if not station_codes:
+        return None
+    return pd.DataFrame({
+        'stn_codes': station_codes,
+        'stn_lines': [code[:2] + 'L' for code in station_codes]
+    })
+
+
+def resolve_query_stations(query):
+    """
+    Get the stations a single station or station pair query refers to.
+    
+    Args:
+        query (str): 'station_name' OR 'start_station,end_station'
+        
+    Returns:
+        tuple: (station_df, route), where station_df is None if the query could not be
+        resolved and route is the route summary for station pairs, otherwise None
+    """
+    key = normalize_station_query(query)
+    if "," in key:
+        route = get_public_transport_route_concise.func(key)
+        return _route_stations(route), route
+    return _named_stations(key), None
+
+
+def fetch_crowd_snapshot(lines):
+    """
+    Get real-time crowd levels covering the given lines, fetching only the lines the poller's
+    snapshot does not cover, each once. Lines that cannot be fetched keep their readings from
+    the last poller sweep, if any, with their original fetch times so they read as stale.
+    
+    Args:
+        lines (list): Train line codes (e.g., 'NSL', 'EWL')
+    
+    Returns:
+        CrowdSnapshot: Snapshot covering every line that could be fetched, dated by its
+        oldest readings
+    """
+    snapshot = get_crowd_poller().snapshot
+    if snapshot is not None and snapshot.covers(lines):
+        return snapshot
+    
+    # Lines with stale readings count as missing
+    missing = set(lines)
+    if snapshot is not None:
+        missing -= snapshot.fresh_lines()
+    missing = sorted(missing)
+    
+    # Fetch concurrently, carrying over the request's deadline and priority
+    with ThreadPoolExecutor(max_workers=BATCH_MAX_WORKERS) as executor:
+        futures = [executor.submit(contextvars.copy_context().run, get_crowd_request, 'RealTime', line)
+                   for line in missing]
+        responses = dict(zip(missing, (future.result() for future in futures)))
+    
+    levels = {}
+    line_times = {}
+    for line, response in responses.items():
+        if response is not None and 'error' not in response and response.get('value'):
+            line_df = clean_realtime_crowd(response)
+            levels.update(zip(line_df['Station'], line_df['CrowdLevel']))
+            line_times[line] = time.monotonic()
+    
+    if snapshot is not None:
+        for station, level in snapshot.levels.items():
+            levels.setdefault(station, level)
+        for line in snapshot.lines & set(lines):
+            line_times.setdefault(line, snapshot.line_times[line])
+    
+    monotonic_at = time.monotonic()
+    oldest_at = min(line_times.values(), default=monotonic_at)
+    return CrowdSnapshot(
+        levels=MappingProxyType(levels),
+        lines=frozenset(line_times),
+        updated_at=datetime.now() - timedelta(seconds=monotonic_at - oldest_at),
+        monotonic_at=monotonic_at,
+        line_times=MappingProxyType(line_times)
+    )
+
+
+def summarize_snapshot_crowd(snapshot, station_df):
+    """
+    Summarize the crowd levels of the given stations, noting when any of their lines only
+    has readings carried over from an earlier poller sweep.
+    
+    Args:
+        snapshot (CrowdSnapshot): Snapshot from fetch_crowd_snapshot()
+        station_df (DataFrame): Stations with 'stn_codes' and 'stn_lines' columns
+        
+    Returns:
+        str: Crowd level summary
+    """
+    crowd = clean_snapshot_crowd(snapshot, station_df)
+    
+    stale_lines = (set(station_df['stn_lines']) & snapshot.lines) - snapshot.fresh_lines()
+    if not stale_lines or crowd.startswith("No crowd data"):
+        return crowd
+    
+    readings_at = datetime.now() - timedelta(seconds=snapshot.age(stale_lines))
+    return f"Live crowd data is unavailable, showing readings from {readings_at.strftime('%H:%M')}:\n" + crowd
+
+
+def summarize_station_alerts(alert_snapshot, station_df):
+    """
+    Summarize the train service status of the given stations.
+    
+    Args:
+        alert_snapshot (Mapping): Snapshot from get_alert_snapshot(), or None if it could not be fetched
+        station_df (DataFrame): Stations with a 'stn_codes' column
+        
+    Returns:
+        str: Service status summary
+    """
+    if alert_snapshot is None:
+        return "Error: The API call was unsuccessful. Please try again later."
+    if not alert_snapshot:
+        return "There are no real-time train service issues at the selected stations."
+    
+    status_df = pd.DataFrame({
+        'Station': station_df['stn_codes'],
+        'Status': [lookup_station_alert(alert_snapshot, code) for code in station_df['stn_codes']]
+    })
+    return summarize_alerts(get_station_names(status_df, None))
+
+
+def batch_transit_query(queries, include=BATCH_SECTIONS):
+    """
+    Get route, real-time crowd and service alert summaries for many stations or station pairs.
+    
+    Identical queries share one lookup, each route is planned once, each train line is fetched
+    once and the service alerts are read once for the whole batch.
+    
+    Args:
+        queries (list): Queries in format 'station_name' OR 'start_station,end_station'
+        include (iterable): Sections to compute, any of 'route', 'crowd' and 'alerts'
+        
+    Returns:
+        dict: Query to a dict of section name to summary text
+    """
+    include = set(include)
+    keys = {query: normalize_station_query(query) for query in queries}
+    unique_keys = list(dict.fromkeys(keys.values()))
+    
+    # Plan every distinct route once, concurrently, in copies of the run's context
+    pair_keys = [key for key in unique_keys if "," in key]
+    with ThreadPoolExecutor(max_workers=BATCH_MAX_WORKERS) as executor:
+        futures = [executor.submit(contextvars.copy_context().run, get_public_transport_route_concise.func, key)
+                   for key in pair_keys]
+        routes = dict(zip(pair_keys, (future.result() for future in futures)))
+    
+    stations = {
+        key: _route_stations(routes[key]) if key in routes else _named_stations(key)
+        for key in unique_keys
+    }
+    
+    # Shared upstream data for the whole batch
+    crowd_snapshot = None
+    if "crowd" in include:
+        lines = sorted({line for df in stations.values() if df is not None for line in df['stn_lines']})
+        crowd_snapshot = fetch_crowd_snapshot(lines)
+    
+    alert_snapshot = get_alert_snapshot() if "alerts" in include else None
+    
+    results = {}
+    for key in unique_keys:
+        station_df = stations[key]
+        result = {}
+        
+        if "route" in include and key in routes:
+            result["route"] = routes[key]
+        
+        if station_df is None:
+            error = routes.get(key, f"Station '{key}' not found, do ensure that the spelling is correct.")
+            for section in include - {"route"}:
+                result[section] = error
+        else:
+            if "crowd" in include:
+                result["crowd"] = summarize_snapshot_crowd(crowd_snapshot, station_df)
+            
+            if "alerts" in include:
+                result["alerts"] = summarize_station_alerts(alert_snapshot, station_df)
+        
+        results[key] = result
+    
+    return {query: results[key] for query, key in keys.items()}
@@ -2,20 +2,35 @@
 LangChain tools for crowd-related operations.
 """
 
+from datetime import datetime, timedelta
+
 import pandas as pd
 from langchain.agents import tool
 
 from api.lta_api import get_crowd_request
-from utils.time_utils import clean_time_prompt
+from utils.time_utils import clean_time_prompt, split_date_time, get_prompt_date, local_now
 from utils.crowd_utils import (
     clean_realtime_crowd, 
     clean_crowd,
-    clean_forecast_volume,
-    clean_time_crowd
+    clean_snapshot_crowd,
+    clean_time_crowd,
+    clean_to_fro_volume,
+    forecast_station_volume,
+    replace_crowd_levels
 )
-from config.settings import TRANSPORT_NODE_DATA_PATH
 from tools.transport_tools import get_public_transport_route_concise
-from utils.transport_utils import clean_station_prompt
+from utils.transport_utils import (
+    clean_station_prompt,
+    get_station_codes,
+    get_station_names,
+    summarize_crowd
+)
+from utils.crowd_poller import get_crowd_poller
+from utils.crowd_store import get_crowd_store
+from utils.volume_store import get_volume_dataset
+from utils.od_index import get_od_index
+from utils.crowd_forecast import get_forecast_grid, station_train_line
+from utils.executor import run_cpu_bound
 
 
 @tool
@@ -35,6 +50,11 @@ def checkRealTimeCrowd(input_prompt: str) -> str:
     
     if "Error" not in prompt:
         prompt_stn_df, _, _ = clean_station_prompt(prompt)
+        
+        # Read from the background poller's snapshot when it covers these lines
+        snapshot = get_crowd_poller().snapshot
+        if snapshot is not None and snapshot.covers(prompt_stn_df['stn_lines'].unique()):
+            return clean_snapshot_crowd(snapshot, prompt_stn_df)
     
         # Get data
         url_type = 'RealTime'
@@ -46,6 +66,11 @@ def checkRealTimeCrowd(input_prompt: str) -> str:
             if response is not None and 'error' not in response:
                 json_df = clean_realtime_crowd(response)
                 realtime_df = pd.concat([realtime_df, json_df])
+            elif snapshot is not None and snapshot.covers(prompt_stn_df['stn_lines'].unique(), max_age=float('inf')):
+                # Fall back to the last poller sweep rather than fail the request
+                readings_at = datetime.now() - timedelta(seconds=snapshot.age(prompt_stn_df['stn_lines'].unique()))
+                return (f"Live crowd data is unavailable, showing readings from {readings_at.strftime('%H:%M')}:\n"
+                        + clean_snapshot_crowd(snapshot, prompt_stn_df))
             else:
                 return "Error: Failed to fetch real-time crowd data. Please try again later."
         
@@ -83,13 +108,11 @@ def checkForecastVolume(input_prompt: str) -> str:
             'stn_codes': [origin, destination],
             'stn_lines': [(origin[:2] + 'L'), (destination[:2] + 'L')]
         })
-
-        # Load volume data
-        data_df = pd.read_csv(TRANSPORT_NODE_DATA_PATH)
-        data_df = clean_csv(data_df)
-
-        # Get crowd volume forecast
-        crowd_volume = clean_forecast_volume(data_df, prompt_stn_df, datetime_input_prompt)
+        
+        # Get crowd volume forecast from the latest month in the volume store, in a worker process
+        volume_months = get_volume_dataset('node').months()
+        volume_month = volume_months[-1] if volume_months else None
+        crowd_volume = run_cpu_bound(forecast_station_volume, volume_month, prompt_stn_df, datetime_input_prompt)
         
         if crowd_volume is not None:
             # Check if date is a weekday/weekend
@@ -104,36 +127,185 @@ def checkForecastVolume(input_prompt: str) -> str:
         return f"{prompt}"
 
 
-def clean_csv(df, where=None):
+@tool
+def checkTypicalCrowd(input_prompt: str) -> str:
     """
-    Helper function to clean CSV data by splitting station codes with '/' character.
+    Find how crowded MRT train platforms usually are on a given day and time, based on past crowd readings.
     
     Args:
-        df (DataFrame): DataFrame to clean
-        where (str, optional): Prefix for column names
+        input_prompt (str): Input with station and time information in format:
+        'station_name;DD-MM-YYYY,HH:MM' OR 'start_station,end_station;DD-MM-YYYY,HH:MM'
         
     Returns:
-        DataFrame: Cleaned DataFrame
+        str: Usual crowd levels at the specified stations and time
     """
-    if where is None:
-        col_name = 'PT_CODE'
-    else:
-        col_name = f'{where}_PT_CODE'
+    # Clean prompt
+    text_input_prompt, datetime_input_prompt = clean_time_prompt(input_prompt)
+    day, time = split_date_time(datetime_input_prompt)
+    minute_of_day = time.hour * 60 + time.minute
     
-    modified_rows = []
+    store = get_crowd_store()
+    usual_crowd = []
     
-    for _, row in df.iterrows():
-        if '/' in row['PT_CODE']:
-            codes = row['PT_CODE'].split('/')
+    for station_name in text_input_prompt.split(','):
+        station_codes = get_station_codes(station_name)
+        
+        if not station_codes:
+            return f"Station '{station_name.strip()}' not found, do ensure that the spelling is correct."
+        
+        for code in station_codes:
+            level_counts = store.level_counts(code, day, minute_of_day)
             
-            for code in codes:
-                new_row = row.copy()
-                new_row['PT_CODE'] = code
-                modified_rows.append(new_row)
-        else:
-            modified_rows.append(row)
+            if level_counts:
+                usual_level = max(level_counts, key=level_counts.get)
+                usual_crowd.append({'Station': code, 'CrowdLevel': replace_crowd_levels([usual_level])})
+    
+    if not usual_crowd:
+        return "No historical crowd data available for the selected time and stations."
+    
+    crowd_df = get_station_names(pd.DataFrame(usual_crowd), None)
+    
+    return f"Usually on {day} around {time.strftime('%H:%M')}:\n" + summarize_crowd(crowd_df)
+
+
+@tool
+def checkTripVolume(input_prompt: str) -> str:
+    """
+    Find how busy train trips between two MRT stations usually are on a given day and hour, based on origin-destination passenger volume.
+    
+    Args:
+        input_prompt (str): Input with station and time information in format:
+        'start_station,end_station;DD-MM-YYYY,HH:MM'
+        
+    Returns:
+        str: Usual trip volume between the two stations
+    """
+    # Clean prompt
+    text_input_prompt, datetime_input_prompt = clean_time_prompt(input_prompt)
+    
+    od_index = get_od_index()
+    if od_index is None:
+        return "No origin-destination volume data available. Please try again later."
+    
+    try:
+        start_station, end_station = text_input_prompt.split(",")
+    except ValueError:
+        return "Error: Input must be in the format 'start_station,end_station'."
+    
+    start_codes = get_station_codes(start_station)
+    if not start_codes:
+        return f"Starting station '{start_station.strip()}' not found, do ensure that the spelling is correct."
+    
+    end_codes = get_station_codes(end_station)
+    if not end_codes:
+        return f"Destination station '{end_station.strip()}' not found, do ensure that the spelling is correct."
+    
+    # Interchanges have one code per line; any of them identifies the station pair
+    for start_code in start_codes:
+        for end_code in end_codes:
+            if (start_code, end_code) in od_index:
+                return clean_to_fro_volume(od_index, start_code, end_code, datetime_input_prompt)
+    
+    return "No volume data available for the selected stations and time."
+
+
+@tool
+def checkVolumeTrend(input_prompt: str) -> str:
+    """
+    Find the month-by-month trend and average of passenger volume at an MRT station on a given day and hour.
+    
+    Args:
+        input_prompt (str): Input with station and time information in format:
+        'station_name;DD-MM-YYYY,HH:MM'
+        
+    Returns:
+        str: Monthly passenger volume, overall average and seasonal average
+    """
+    # Clean prompt
+    text_input_prompt, datetime_input_prompt = clean_time_prompt(input_prompt)
+    day, time = split_date_time(datetime_input_prompt)
+    
+    volume_dataset = get_volume_dataset('node')
+    if not volume_dataset.months():
+        return "No passenger volume history available. Please try again later."
+    
+    station_codes = get_station_codes(text_input_prompt)
+    if not station_codes:
+        return f"Station '{text_input_prompt.strip()}' not found, do ensure that the spelling is correct."
+    
+    # Interchange codes share one volume record, so the first code identifies the station
+    station_code = station_codes[0]
+    volumes = volume_dataset.station_volume(station_code, day, time.hour)
+    
+    if volumes.empty:
+        return "No volume data available for the selected time and station."
+    
+    station_name = get_station_names(pd.DataFrame({'Station': [station_code]}), None)['Station'][0]
+    monthly = '; '.join(f"{month}: {volume:,}" for month, volume in volumes.items())
+    summary = (
+        f"Passenger volume at {station_name} on {day} at {time.hour:02d}:00 by month: {monthly}.\n"
+        f"Average over {len(volumes)} month(s): {volumes.mean():,.0f}."
+    )
+    
+    # Seasonal average for the requested month of the year, when there are several years of data
+    prompt_date = get_prompt_date(datetime_input_prompt)
+    if prompt_date is not None:
+        calendar_month = prompt_date.month
+        seasonal_months = [month for month in volumes.index if int(month[5:7]) == calendar_month]
+        if len(seasonal_months) > 1:
+            seasonal_average = volume_dataset.average_volume(station_code, day, time.hour, calendar_month)
+            summary += f"\nAverage in this month of the year across {len(seasonal_months)} years: {seasonal_average:,.0f}."
+    
+    return summary
+
+
+@tool
+def checkForecastCrowd(input_prompt: str) -> str:
+    """
+    Find the forecasted MRT train platform crowdedness level for later today, from LTA's daily platform crowd forecast.
+    
+    Args:
+        input_prompt (str): Input with station and time information in format:
+        'station_name;DD-MM-YYYY,HH:MM' OR 'start_station,end_station;DD-MM-YYYY,HH:MM'
+        
+    Returns:
+        str: Forecast crowd levels at the specified stations and time
+    """
+    # Clean prompt
+    text_input_prompt, datetime_input_prompt = clean_time_prompt(input_prompt)
+    _, time = split_date_time(datetime_input_prompt)
+    
+    # Forecasts only cover the current day
+    today = local_now().date()
+    prompt_date = get_prompt_date(datetime_input_prompt)
+    if prompt_date is not None and prompt_date != today:
+        return (f"Crowd forecasts are only available for {today.strftime('%d-%m-%Y')}. "
+                f"Use the usual crowd levels or forecast volume for other dates.")
+    
+    # Fetch each line's grid once
+    station_codes = []
+    forecast_grids = {}
+    
+    for station_name in text_input_prompt.split(','):
+        codes = get_station_codes(station_name)
+        
+        if not codes:
+            return f"Station '{station_name.strip()}' not found, do ensure that the spelling is correct."
+        
+        for code in codes:
+            line = station_train_line(code)
+            if line is not None and line not in forecast_grids:
+                forecast_grids[line] = get_forecast_grid(line)
+            station_codes.append(code)
+    
+    forecast_grids = [forecast_grid for forecast_grid in forecast_grids.values() if forecast_grid is not None]
+    if not forecast_grids:
+        return "No crowd forecast available for the selected time and stations. Please try again later."
     
-    modified_df = pd.DataFrame(modified_rows)
-    modified_df.rename(columns={'PT_CODE': col_name}, inplace=True)
+    # Forecast slots within +- 30 minutes of the time
+    forecast_crowd = clean_time_crowd(forecast_grids, pd.DataFrame({'stn_codes': station_codes}), datetime_input_prompt)
+    if forecast_crowd.startswith("No crowd data"):
+        return "No crowd forecast available for the selected time and stations. Please try again later."
     
-    return modified_df
\ No newline at end of file
+    forecast_date = forecast_grids[0].forecast_date
+    return f"Forecast for {forecast_date.strftime('%d-%m-%Y')} around {time.strftime('%H:%M')}:\n" + forecast_crowd
\ No newline at end of file
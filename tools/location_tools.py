@@ -2,12 +2,10 @@
 LangChain tools for location-based operations.
 """
 
-import pandas as pd
 from langchain.agents import tool
 
-from config.settings import TAXI_STANDS_DATA_PATH
 from api.onemap_api import get_gps_coordinates
-from utils.location_utils import calculate_taxi_distances
+from utils.location_utils import find_nearest_taxi_stands
 from utils.transport_utils import summarize_nearest_taxi, summarize_nearest_taxi_with_links
 
 
@@ -47,12 +45,8 @@ def checkNearestTaxiStands(input_location: str) -> str:
     lat, lon, address = get_gps_coordinates(input_location)
     
     if lat is not None:
-        # Calculate distance to taxi stands
-        taxi_df = pd.read_csv(TAXI_STANDS_DATA_PATH)
-        taxi_df = calculate_taxi_distances(lat, lon, taxi_df)
-
-        # Summarize the nearest taxi stands
-        nearest_taxis = summarize_nearest_taxi_with_links(taxi_df.nsmallest(3, 'Distance'))
+        # Find and summarize the nearest taxi stands
+        nearest_taxis = summarize_nearest_taxi_with_links(find_nearest_taxi_stands(lat, lon))
         summary = f'Nearest taxi stands at {input_location} are : {nearest_taxis}'
         
         return summary
@@ -0,0 +1,96 @@
+"""
+LangChain tool combining the lookups for one train trip into a single briefing.
+"""
+
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+
+from langchain.agents import tool
+
+from api.lta_api import get_alert_snapshot
+from tools.batch_tools import (
+    fetch_crowd_snapshot,
+    resolve_query_stations,
+    summarize_snapshot_crowd,
+    summarize_station_alerts
+)
+from utils.location_utils import find_nearest_taxi_stands, get_station_coordinates
+from utils.time_utils import clean_time_prompt
+from utils.transport_utils import get_station_codes, summarize_nearest_taxi_with_links
+from utils.weather_utils import get_combined_weather_forecast
+
+
+def _crowd_section(station_df):
+    """Real-time crowd levels at the stations of the route."""
+    snapshot = fetch_crowd_snapshot(sorted(station_df['stn_lines'].unique()))
+    return summarize_snapshot_crowd(snapshot, station_df)
+
+
+def _alerts_section(station_df):
+    """Train service status at the stations of the route."""
+    return summarize_station_alerts(get_alert_snapshot(), station_df)
+
+
+def _taxi_section(station_code):
+    """Nearest taxi stands to a station."""
+    lat, lon, _ = get_station_coordinates(station_code)
+    if lat is None:
+        return "Not available."
+    return summarize_nearest_taxi_with_links(find_nearest_taxi_stands(lat, lon))
+
+
+def _run_section(future):
+    """Get a section's text, so one failed lookup does not lose the rest of the briefing."""
+    try:
+        return future.result()
+    except Exception as e:
+        print(f"Trip briefing section failed: {e}")
+        return "Not available, please try again later."
+
+
+@tool
+def tripBriefing(input_prompt: str) -> str:
+    """
+    Get a full briefing for a train trip between two MRT stations in one call: the route, real-time platform crowd levels along it, train service alerts, the weather forecast and the nearest taxi stands at the destination station.
+    Prefer this over calling the route, crowd, alert, weather and taxi tools one by one.
+    
+    Args:
+        input_prompt (str): Input in format 'start_station,end_station'
+    
+    Returns:
+        str: Route, crowd levels, service alerts, weather and taxi stands
+    """
+    text_input_prompt, _ = clean_time_prompt(input_prompt)
+    
+    try:
+        _, end_station = text_input_prompt.split(",")
+    except ValueError:
+        return "Error: Input must be in the format 'start_station,end_station'."
+    
+    # Resolve the stations and plan the route once for every section
+    station_df, route = resolve_query_stations(text_input_prompt)
+    if station_df is None:
+        return route
+    
+    end_codes = get_station_codes(end_station)
+    
+    # Gather the remaining sections concurrently, carrying over the run's context
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        def submit(fn, *args):
+            return executor.submit(contextvars.copy_context().run, fn, *args)
+        
+        crowd = submit(_crowd_section, station_df)
+        alerts = submit(_alerts_section, station_df)
+        weather = submit(get_combined_weather_forecast)
+        taxi = submit(_taxi_section, end_codes[0]) if end_codes else None
+    
+    sections = [
+        f"ROUTE:\n{route.strip()}",
+        f"CROWD NOW:\n{_run_section(crowd).strip()}",
+        f"SERVICE ALERTS:\n{_run_section(alerts).strip()}",
+        f"WEATHER:\n{_run_section(weather).strip()}"
+    ]
+    if taxi is not None:
+        sections.append(f"TAXI STANDS NEAR {end_station.strip().upper()}:\n{_run_section(taxi).strip()}")
+    
+    return "\n\n".join(sections)
@@ -0,0 +1,224 @@
+"""
+Admission control for chat requests: per-session rate limiting, bounded concurrency and
+load shedding, with metrics on how long requests wait to be served.
+"""
+
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import NamedTuple
+
+from config.settings import (
+    ADMISSION_MAX_CONCURRENT,
+    ADMISSION_MAX_QUEUE,
+    ADMISSION_MAX_WAIT,
+    SESSION_RATE_PER_MINUTE,
+    SESSION_BURST
+)
+
+BUSY_MESSAGE = "GPTTransit is busy helping other commuters right now. Please try again in a moment."
+RATE_LIMITED_MESSAGE = "You're sending messages faster than I can answer them. Please wait a few seconds and try again."
+
+
+class AdmissionRejected(Exception):
+    """
+    Raised when a request is not admitted; the message is suitable for the user.
+    """
+
+
+class Ticket(NamedTuple):
+    """
+    An admitted request, from submission until its response is done.
+    """
+    session_id: str
+    submitted_at: float     # monotonic time the message was submitted
+
+
+class TokenBucket:
+    """
+    Token bucket refilled continuously at a fixed rate.
+    """
+    
+    def __init__(self, rate, capacity):
+        """
+        Initialize a full bucket.
+        
+        Args:
+            rate (float): Tokens added per second
+            capacity (float): Maximum tokens, i.e. the allowed burst
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+    
+    def try_acquire(self, now=None):
+        """
+        Take one token if available.
+        
+        Returns:
+            bool: True if a token was taken
+        """
+        now = time.monotonic() if now is None else now
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+        
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+
+class AdmissionMetrics:
+    """
+    Counters and recent queue wait times of admitted requests.
+    """
+    
+    def __init__(self, window=1000):
+        self._lock = threading.Lock()
+        self._waits = deque(maxlen=window)
+        self.counts = {'admitted': 0, 'served': 0, 'rate_limited': 0, 'shed_on_submit': 0, 'shed_on_wait': 0}
+    
+    def count(self, event):
+        with self._lock:
+            self.counts[event] += 1
+    
+    def record_wait(self, seconds):
+        with self._lock:
+            self._waits.append(seconds)
+    
+    def snapshot(self):
+        """
+        Get the current metrics.
+        
+        Returns:
+            dict: Event counts and queue wait percentiles (seconds) over recent requests
+        """
+        with self._lock:
+            waits = sorted(self._waits)
+            counts = dict(self.counts)
+        
+        def percentile(q):
+            return round(waits[min(len(waits) - 1, int(q * len(waits)))], 3) if waits else None
+        
+        return {
+            **counts,
+            'queue_wait_p50': percentile(0.50),
+            'queue_wait_p95': percentile(0.95),
+            'queue_wait_max': round(waits[-1], 3) if waits else None
+        }
+
+
+class AdmissionController:
+    """
+    Decides whether and when a chat request may run.
+    
+    Requests are checked on submission, before they enter the Gradio queue: a session that
+    exceeds its token bucket, or any request arriving when the queue is already at its
+    depth limit, is answered straight away with a short message instead of waiting. Admitted
+    requests then wait for one of a fixed number of slots, and are shed if they cannot
+    start within the wait limit.
+    """
+    
+    def __init__(self, max_concurrent=ADMISSION_MAX_CONCURRENT, max_queue=ADMISSION_MAX_QUEUE,
+                 max_wait=ADMISSION_MAX_WAIT, rate_per_minute=SESSION_RATE_PER_MINUTE, burst=SESSION_BURST):
+        """
+        Initialize the controller.
+        
+        Args:
+            max_concurrent (int): Requests served at once
+            max_queue (int): Requests waiting or being served before new ones are shed
+            max_wait (float): Seconds a request may wait for a slot after submission
+            rate_per_minute (float): Sustained requests per minute allowed per session
+            burst (int): Requests a session may send back to back
+        """
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.rate = rate_per_minute / 60
+        self.burst = burst
+        self.metrics = AdmissionMetrics()
+        self._slots = threading.BoundedSemaphore(max_concurrent)
+        self._lock = threading.Lock()
+        self._buckets = {}
+        self._outstanding = {}
+    
+    def _prune(self, now):
+        """Forget idle sessions and tickets whose response was abandoned (e.g. a closed tab)."""
+        self._buckets = {
+            session_id: bucket for session_id, bucket in self._buckets.items()
+            if bucket.tokens < bucket.capacity or now - bucket.updated_at < 3600
+        }
+        expiry = now - 10 * self.max_wait
+        self._outstanding = {
+            ticket: count for ticket, count in self._outstanding.items() if ticket.submitted_at > expiry
+        }
+    
+    def submit(self, session_id):
+        """
+        Admit a newly submitted message.
+        
+        Args:
+            session_id (str): Gradio session hash of the sender
+        
+        Returns:
+            Ticket: Ticket to pass to run()
+        
+        Raises:
+            AdmissionRejected: If the session is rate limited or the queue is full
+        """
+        now = time.monotonic()
+        with self._lock:
+            if len(self._buckets) > 1000:
+                self._prune(now)
+            
+            bucket = self._buckets.get(session_id)
+            if bucket is None:
+                bucket = self._buckets[session_id] = TokenBucket(self.rate, self.burst)
+            if not bucket.try_acquire(now):
+                self.metrics.count('rate_limited')
+                raise AdmissionRejected(RATE_LIMITED_MESSAGE)
+            
+            if len(self._outstanding) >= self.max_queue:
+                self._prune(now)
+                if len(self._outstanding) >= self.max_queue:
+                    self.metrics.count('shed_on_submit')
+                    raise AdmissionRejected(BUSY_MESSAGE)
+            
+            ticket = Ticket(session_id, now)
+            self._outstanding[ticket] = self._outstanding.get(ticket, 0) + 1
+        
+        self.metrics.count('admitted')
+        return ticket
+    
+    def _finish(self, ticket):
+        with self._lock:
+            count = self._outstanding.pop(ticket, 0) - 1
+            if count > 0:
+                self._outstanding[ticket] = count
+    
+    @contextmanager
+    def run(self, ticket):
+        """
+        Wait for a slot to serve an admitted request, releasing it when the block exits.
+        
+        Args:
+            ticket (Ticket): Ticket from submit()
+        
+        Raises:
+            AdmissionRejected: If no slot frees up before the request's wait limit
+        """
+        try:
+            remaining = ticket.submitted_at + self.max_wait - time.monotonic()
+            if remaining <= 0 or not self._slots.acquire(timeout=remaining):
+                self.metrics.count('shed_on_wait')
+                raise AdmissionRejected(BUSY_MESSAGE)
+            
+            self.metrics.record_wait(time.monotonic() - ticket.submitted_at)
+            try:
+                yield
+            finally:
+                self._slots.release()
+                self.metrics.count('served')
+        finally:
+            self._finish(ticket)
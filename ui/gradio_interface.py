@@ -6,6 +6,12 @@ import os
 import gradio as gr
 from typing import List, Tuple, Optional
 
+from ui.admission import AdmissionController, AdmissionRejected
+from utils.circuit_breaker import circuit_breaker_states
+from utils.rate_limiter import rate_limiter_states
+from utils.deadline import DeadlineExceeded
+from config.settings import ADMISSION_MAX_QUEUE
+
 
 class ChatInterface:
     """
@@ -20,6 +26,7 @@ class ChatInterface:
             agent_manager: The agent manager for handling chat interactions
         """
         self.agent_manager = agent_manager
+        self.admission = AdmissionController()
         self.welcome_message = (
             "🚇 Welcome to GPTTransit! 🚶‍♂️\n\n"
             "I'm here to help you navigate MRT trains, find walking routes and locate taxi "
@@ -41,26 +48,33 @@ class ChatInterface:
         """
         print(f"Message {x.index} {'liked' if x.liked else 'disliked'}: {x.value}")
     
-    def _add_text(self, history: List[Tuple[str, Optional[str]]], text: str) -> Tuple[List[Tuple[str, Optional[str]]], gr.Textbox]:
+    def _add_text(self, history: List[Tuple[str, Optional[str]]], text: str, request: gr.Request):
         """
-        Add user text to chat history.
+        Add user text to chat history, answering straight away if the request is not admitted.
         
         Args:
             history: Current chat history
             text: User's input text
+            request: Gradio request of the sender's session
             
         Returns:
-            tuple: Updated history and textbox
+            tuple: Updated history, textbox and admission ticket (None if not admitted)
         """
-        history = history + [(text, None)]
-        return history, gr.Textbox(value="", interactive=False)
+        try:
+            ticket = self.admission.submit(request.session_hash if request else "")
+            history = history + [(text, None)]
+        except AdmissionRejected as e:
+            ticket = None
+            history = history + [(text, str(e))]
+        return history, gr.Textbox(value="", interactive=False), ticket
     
-    def _bot_response(self, history: List[Tuple[str, Optional[str]]]) -> List[Tuple[str, str]]:
+    def _bot_response(self, history: List[Tuple[str, Optional[str]]], ticket) -> List[Tuple[str, str]]:
         """
         Generate bot response for the user's query.
         
         Args:
             history: Current chat history
+            ticket: Admission ticket from _add_text, or None if the message was already answered
             
         Returns:
             list: Updated chat history with bot response
@@ -68,20 +82,43 @@ class ChatInterface:
         # Get the last message from the user
         query = history[-1][0]
         
+        if ticket is None:
+            yield history
+            return
+        
         try:
-            # Call the agent manager to get a response
-            response = self.agent_manager.invoke(query)
+            # Wait for a free slot, then call the agent manager to get a response
+            with self.admission.run(ticket):
+                response = self.agent_manager.invoke(query)
             response_text = response['output']
             
             # Update history with the response
             history[-1] = (query, response_text)
             yield history
+        except (AdmissionRejected, DeadlineExceeded) as e:
+            history[-1] = (query, str(e))
+            yield history
         except Exception as e:
             # Handle errors
             error_message = f"I encountered an error: {str(e)}\nPlease try again or rephrase your question."
             history[-1] = (query, error_message)
             yield history
     
+    def _metrics(self):
+        """
+        Collect serving metrics.
+        
+        Returns:
+            dict: Admission control metrics, per-tier model metrics, and upstream circuit breaker
+            and rate limiter states
+        """
+        return {
+            'admission': self.admission.metrics.snapshot(),
+            'model_tiers': self.agent_manager.router.snapshot(),
+            'upstreams': circuit_breaker_states(),
+            'upstream_rate_limits': rate_limiter_states()
+        }
+    
     def create_interface(self):
         """
         Create and configure the Gradio interface.
@@ -90,6 +127,7 @@ class ChatInterface:
             gr.Blocks: Configured Gradio interface
         """
         with gr.Blocks() as demo:
+            ticket = gr.State(None)
             chatbot = gr.Chatbot(
                 value=[[None, self.welcome_message]],
                 elem_id="chatbot",
@@ -107,17 +145,21 @@ class ChatInterface:
                     container=False,
                 )
                 clear = gr.Button("Clear")
+            
+            metrics = gr.Button("Metrics", visible=False)
+            metrics_json = gr.JSON(visible=False)
 
             txt_msg = txt.submit(
-                self._add_text, [chatbot, txt], [chatbot, txt], queue=False
+                self._add_text, [chatbot, txt], [chatbot, txt, ticket], queue=False
             ).then(
-                self._bot_response, chatbot, chatbot, api_name="bot_response"
+                self._bot_response, [chatbot, ticket], chatbot, api_name="bot_response"
             )
             
             txt_msg.then(lambda: gr.Textbox(interactive=True), None, [txt], queue=False)
 
             chatbot.like(self._print_like_dislike, None, None)
             clear.click(lambda: None, None, chatbot, queue=False)
+            metrics.click(self._metrics, None, metrics_json, queue=False, api_name="metrics")
 
         return demo
     
@@ -131,5 +173,8 @@ class ChatInterface:
             server_port (int): Port to run the server on
         """
         demo = self.create_interface()
-        demo.queue()
+        
+        # Every admitted request may hold a queue worker while it waits for an admission slot,
+        # so the queue only needs room for what admission control lets through
+        demo.queue(default_concurrency_limit=ADMISSION_MAX_QUEUE, max_size=ADMISSION_MAX_QUEUE)
         demo.launch(share=share, server_name=server_name, server_port=server_port)
\ No newline at end of file
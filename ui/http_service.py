@@ -0,0 +1,247 @@
+"""
+JSON HTTP service exposing the transit lookups behind the chatbot tools, without the LLM.
+"""
+
+import asyncio
+from typing import List
+
+from fastapi import FastAPI, HTTPException, Query
+from pydantic import BaseModel
+
+from api.lta_api import get_alert_snapshot, lookup_station_alert
+from api.onemap_api import get_gps_coordinates
+from tools.batch_tools import BATCH_SECTIONS, batch_transit_query, fetch_crowd_snapshot, resolve_query_stations
+from utils.circuit_breaker import circuit_breaker_states
+from utils.rate_limiter import rate_limiter_states
+from utils.crowd_forecast import get_forecast_grid, station_train_line
+from utils.crowd_poller import get_crowd_poller
+from utils.crowd_store import get_crowd_store
+from utils.location_utils import find_nearest_taxi_stands
+from utils.od_index import get_od_index
+from utils.time_utils import split_date_time
+from utils.transport_utils import get_station_codes, get_station_full_names
+from utils.weather_utils import get_2h_weather_forecast, get_24h_weather_forecast
+
+CROWD_LEVEL_LABELS = {'l': 'LOW', 'm': 'MODERATE', 'h': 'HIGH'}
+
+
+class BatchRequest(BaseModel):
+    """
+    Body of a batch query.
+    """
+    queries: List[str]
+    include: List[str] = list(BATCH_SECTIONS)
+
+
+def _station_entry(code, **fields):
+    """Describe a station as a JSON object with its code, name and any extra fields."""
+    return {'code': code, 'name': get_station_full_names().get(code), **fields}
+
+
+def _crowd_label(level):
+    """Convert a crowd level code to its label, or None if there is no reading."""
+    return CROWD_LEVEL_LABELS.get(level)
+
+
+def _parse_date_time(date, time):
+    """Get the day type and time of a query, defaulting to now like the chatbot tools."""
+    try:
+        return split_date_time(f"{date or ''},{time or ''}")
+    except ValueError:
+        raise HTTPException(status_code=422, detail="Dates must be DD-MM-YYYY and times HH:MM or HHMM.")
+
+
+async def _resolve_stations(query):
+    """Resolve a station or station pair query, raising 404 if it cannot be resolved."""
+    station_df, route = await asyncio.to_thread(resolve_query_stations, query)
+    if station_df is None:
+        detail = route or f"Station '{query.strip()}' not found, do ensure that the spelling is correct."
+        raise HTTPException(status_code=404, detail=detail)
+    return station_df, route
+
+
+def _station_codes(stations):
+    """Get the codes of comma-separated station names, raising 404 for unknown names."""
+    codes = []
+    for station_name in stations.split(','):
+        station_codes = get_station_codes(station_name)
+        if not station_codes:
+            raise HTTPException(
+                status_code=404,
+                detail=f"Station '{station_name.strip()}' not found, do ensure that the spelling is correct."
+            )
+        codes.extend(station_codes)
+    return codes
+
+
+def create_app():
+    """
+    Create the HTTP service.
+    
+    Every endpoint reads through the same module-level caches, data stores and background
+    poller as the chatbot tools; blocking lookups run in worker threads so one slow
+    upstream call does not hold up other requests.
+    
+    Returns:
+        FastAPI: The application
+    """
+    app = FastAPI(title="GPTTransit API", description="Singapore public transport lookups as JSON.")
+    
+    @app.get("/health")
+    async def health():
+        snapshot = get_crowd_poller().snapshot
+        return {
+            'status': 'ok',
+            'crowd_snapshot_age': round(snapshot.age(), 1) if snapshot is not None else None,
+            'upstreams': circuit_breaker_states(),
+            'upstream_rate_limits': rate_limiter_states()
+        }
+    
+    @app.get("/route")
+    async def route(start: str, end: str):
+        station_df, route_summary = await _resolve_stations(f"{start},{end}")
+        return {
+            'start': start,
+            'end': end,
+            'summary': route_summary,
+            'stations': [
+                _station_entry(code, line=line)
+                for code, line in zip(station_df['stn_codes'], station_df['stn_lines'])
+            ]
+        }
+    
+    @app.get("/crowd/realtime")
+    async def realtime_crowd(query: str = Query(..., description="'station_name' OR 'start_station,end_station'")):
+        station_df, _ = await _resolve_stations(query)
+        snapshot = await asyncio.to_thread(fetch_crowd_snapshot, sorted(station_df['stn_lines'].unique()))
+        return {
+            'updated_at': snapshot.updated_at.isoformat(timespec='seconds'),
+            'stations': [
+                _station_entry(code, crowd_level=_crowd_label(snapshot.levels.get(code)))
+                for code in station_df['stn_codes']
+            ]
+        }
+    
+    @app.get("/crowd/forecast")
+    async def forecast_crowd(stations: str, time: str = None):
+        codes = _station_codes(stations)
+        _, query_time = _parse_date_time(None, time)
+        minute = query_time.hour * 60 + query_time.minute
+        
+        entries = []
+        forecast_date = None
+        for code in codes:
+            line = station_train_line(code)
+            forecast_grid = await asyncio.to_thread(get_forecast_grid, line) if line is not None else None
+            level = None
+            if forecast_grid is not None:
+                forecast_date = forecast_grid.forecast_date
+                level = forecast_grid.level_at(code, minute)
+            entries.append(_station_entry(code, crowd_level=_crowd_label(level)))
+        
+        return {
+            'date': forecast_date.isoformat() if forecast_date is not None else None,
+            'time': query_time.strftime('%H:%M'),
+            'stations': entries
+        }
+    
+    @app.get("/crowd/typical")
+    async def typical_crowd(stations: str, date: str = None, time: str = None):
+        codes = _station_codes(stations)
+        day_type, query_time = _parse_date_time(date, time)
+        minute = query_time.hour * 60 + query_time.minute
+        
+        store = get_crowd_store()
+        entries = []
+        for code in codes:
+            level_counts = await asyncio.to_thread(store.level_counts, code, day_type, minute)
+            usual_level = max(level_counts, key=level_counts.get) if level_counts else None
+            entries.append(_station_entry(
+                code,
+                crowd_level=_crowd_label(usual_level),
+                readings={CROWD_LEVEL_LABELS[level]: count for level, count in level_counts.items()}
+            ))
+        
+        return {'day_type': day_type, 'time': query_time.strftime('%H:%M'), 'stations': entries}
+    
+    @app.get("/volume/trip")
+    async def trip_volume(start: str, end: str, date: str = None, time: str = None):
+        start_codes = _station_codes(start)
+        end_codes = _station_codes(end)
+        day_type, query_time = _parse_date_time(date, time)
+        
+        od_index = await asyncio.to_thread(get_od_index)
+        if od_index is None:
+            raise HTTPException(status_code=503, detail="No origin-destination volume data available.")
+        
+        # Interchanges have one code per line; any of them identifies the station pair
+        for start_code in start_codes:
+            for end_code in end_codes:
+                if (start_code, end_code) in od_index:
+                    trips = od_index.trips(start_code, end_code, day_type, query_time.hour)
+                    return {
+                        'origin': _station_entry(start_code),
+                        'destination': _station_entry(end_code),
+                        'day_type': day_type,
+                        'hour': query_time.hour,
+                        'trips': trips,
+                        'crowd_level': od_index.crowd_level(start_code, end_code, trips).replace('CROWD LEVEL ', '')
+                    }
+        
+        raise HTTPException(status_code=404, detail="No volume data available for the selected stations.")
+    
+    @app.get("/alerts")
+    async def alerts(query: str = Query(..., description="'station_name' OR 'start_station,end_station'")):
+        station_df, _ = await _resolve_stations(query)
+        alert_snapshot = await asyncio.to_thread(get_alert_snapshot)
+        if alert_snapshot is None:
+            raise HTTPException(status_code=502, detail="The API call was unsuccessful. Please try again later.")
+        return {
+            'disrupted': bool(alert_snapshot),
+            'stations': [
+                _station_entry(code, status=lookup_station_alert(alert_snapshot, code))
+                for code in station_df['stn_codes']
+            ]
+        }
+    
+    @app.get("/taxi")
+    async def taxi_stands(location: str, limit: int = Query(3, ge=1, le=20)):
+        lat, lon, address = await asyncio.to_thread(get_gps_coordinates, location)
+        if lat is None:
+            raise HTTPException(status_code=404, detail="No results were found for this location.")
+        
+        stands_df = find_nearest_taxi_stands(float(lat), float(lon), limit)
+        return {
+            'address': address,
+            'latitude': float(lat),
+            'longitude': float(lon),
+            'taxi_stands': [
+                {'code': code, 'name': name, 'latitude': stand_lat, 'longitude': stand_lon,
+                 'distance_m': round(distance, 1)}
+                for code, name, stand_lat, stand_lon, distance in zip(
+                    stands_df['TaxiCode'], stands_df['Name'], stands_df['Latitude'],
+                    stands_df['Longitude'], stands_df['Distance']
+                )
+            ]
+        }
+    
+    @app.get("/weather")
+    async def weather():
+        forecast_2h, forecast_24h = await asyncio.gather(
+            asyncio.to_thread(get_2h_weather_forecast),
+            asyncio.to_thread(get_24h_weather_forecast)
+        )
+        return {
+            'forecast_2h': None if "Error" in forecast_2h else forecast_2h,
+            'forecast_24h': None if "Error" in forecast_24h else forecast_24h
+        }
+    
+    @app.post("/batch")
+    async def batch(request: BatchRequest):
+        unknown = set(request.include) - set(BATCH_SECTIONS)
+        if unknown:
+            raise HTTPException(status_code=422, detail=f"Unknown sections: {', '.join(sorted(unknown))}.")
+        results = await asyncio.to_thread(batch_transit_query, request.queries, request.include)
+        return {'results': results}
+    
+    return app
@@ -0,0 +1,293 @@
+"""
+Circuit breakers for upstream services.
+
+Each upstream (OneMap search, OneMap routing, each DataMall endpoint, data.gov.sg weather)
+has a breaker counting consecutive failed or slow calls. Once the count reaches the
+threshold the circuit opens and calls are refused immediately, so requests stop waiting on
+a service that is down and go straight to a fallback: the last good payload kept here, or
+the caller's own cached or offline data. After a cool-down one trial call is let through;
+it closes the circuit if it succeeds and reopens it if it fails.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+import requests
+
+from config.settings import (
+    CIRCUIT_FAILURE_THRESHOLD,
+    CIRCUIT_SLOW_CALL_SECONDS,
+    CIRCUIT_RESET_TIMEOUT,
+    UPSTREAM_CACHE_SIZE,
+    RATE_LIMIT_MAX_WAIT,
+    DEADLINE_MIN_CALL_BUDGET,
+    UPSTREAM_TIMEOUT
+)
+from utils.deadline import DeadlineExceeded, remaining_time
+from utils.rate_limiter import RateLimitExceeded, get_rate_limiter, retry_after_seconds
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """
+    Raised when a call is refused because its upstream's circuit is open.
+    """
+
+
+class UpstreamError(Exception):
+    """
+    Raised when an upstream answers with an error status.
+    """
+    
+    def __init__(self, message, status_code=None, retry_after=None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+def check_response(response, message=None):
+    """
+    Raise for an upstream response with an error status.
+    
+    Args:
+        response (requests.Response): Upstream response
+        message (str, optional): Error message; defaults to the status code
+    
+    Raises:
+        UpstreamError: If the response status is not 200
+    """
+    if response.status_code != 200:
+        raise UpstreamError(
+            message or f"status code: {response.status_code}",
+            status_code=response.status_code,
+            retry_after=response.headers.get("Retry-After")
+        )
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker for one upstream service.
+    """
+    
+    def __init__(self, name, failure_threshold=CIRCUIT_FAILURE_THRESHOLD,
+                 slow_call_seconds=CIRCUIT_SLOW_CALL_SECONDS, reset_timeout=CIRCUIT_RESET_TIMEOUT):
+        """
+        Initialize a closed circuit.
+        
+        Args:
+            name (str): Upstream name, used in metrics
+            failure_threshold (int): Consecutive failed or slow calls that open the circuit
+            slow_call_seconds (float): Calls slower than this count as failures
+            reset_timeout (float): Seconds the circuit stays open before a trial call
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.slow_call_seconds = slow_call_seconds
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_running = False
+        self.counts = {'calls': 0, 'failures': 0, 'slow_calls': 0, 'rejected': 0, 'opened': 0, 'served_cached': 0}
+    
+    def _allow(self):
+        """Check if a call may go through, moving an open circuit to half-open after its cool-down."""
+        with self._lock:
+            if self.state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self.state = HALF_OPEN
+            
+            if self.state == CLOSED:
+                return True
+            if self.state == HALF_OPEN and not self._trial_running:
+                self._trial_running = True
+                return True
+            
+            self.counts['rejected'] += 1
+            return False
+    
+    def _record(self, ok, slow=False):
+        """Record the outcome of a call that went through."""
+        with self._lock:
+            self.counts['calls'] += 1
+            if not ok:
+                self.counts['failures'] += 1
+            if slow:
+                self.counts['slow_calls'] += 1
+            
+            trial = self._trial_running
+            self._trial_running = False
+            
+            if ok and not slow:
+                self._failures = 0
+                self.state = CLOSED
+                return
+            
+            self._failures += 1
+            if trial or self._failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    self.counts['opened'] += 1
+                self.state = OPEN
+                self._opened_at = time.monotonic()
+    
+    def _release_trial(self):
+        """Let another trial call through when one ended without reaching the upstream."""
+        with self._lock:
+            self._trial_running = False
+    
+    def call(self, fn, *args, limiter=None, **kwargs):
+        """
+        Call an upstream through the breaker.
+        
+        Args:
+            fn (callable): Function making the call; it raises on failure
+            *args, **kwargs: Arguments for fn
+            limiter (UpstreamRateLimiter, optional): Rate limiter to take a token from first
+        
+        Returns:
+            The return value of fn
+        
+        Raises:
+            CircuitOpenError: If the circuit is open
+            RateLimitExceeded: If the rate limiter has no token for the call in time
+            DeadlineExceeded: If the call timed out on a timeout cut short by the request deadline
+        """
+        if not self._allow():
+            raise CircuitOpenError(f"{self.name} is unavailable")
+        
+        try:
+            if limiter is not None:
+                remaining = remaining_time()
+                limiter.acquire(timeout=RATE_LIMIT_MAX_WAIT if remaining is None else
+                                min(RATE_LIMIT_MAX_WAIT, remaining - DEADLINE_MIN_CALL_BUDGET))
+            
+            budget = remaining_time()
+            started_at = time.monotonic()
+            result = fn(*args, **kwargs)
+        except (DeadlineExceeded, RateLimitExceeded):
+            # Out of request time or quota before calling; says nothing about the upstream
+            self._release_trial()
+            raise
+        except UpstreamError as e:
+            if e.status_code == 429 and limiter is not None:
+                limiter.pause(retry_after_seconds(e.retry_after))
+            self._record(ok=False)
+            raise
+        except requests.Timeout as e:
+            if budget is not None and budget < UPSTREAM_TIMEOUT:
+                # The request ran out of time, not the upstream; its timeout was capped
+                self._release_trial()
+                raise DeadlineExceeded() from e
+            self._record(ok=False)
+            raise
+        except Exception:
+            self._record(ok=False)
+            raise
+        
+        self._record(ok=True, slow=time.monotonic() - started_at > self.slow_call_seconds)
+        return result
+    
+    def record_cached(self):
+        """Count a failed call answered from a cached payload instead."""
+        with self._lock:
+            self.counts['served_cached'] += 1
+    
+    def snapshot(self):
+        """
+        Get the breaker state and counters.
+        
+        Returns:
+            dict: State, consecutive failures and call counts
+        """
+        with self._lock:
+            state = self.state
+            if state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                state = HALF_OPEN
+            return {'state': state, 'consecutive_failures': self._failures, **self.counts}
+
+
+_registry_lock = threading.Lock()
+_breakers = {}
+_last_good = {}
+
+
+def get_circuit_breaker(name):
+    """
+    Get the shared breaker of an upstream, creating it on first use.
+    
+    Args:
+        name (str): Upstream name (e.g., 'onemap:search')
+    
+    Returns:
+        CircuitBreaker: The upstream's breaker
+    """
+    with _registry_lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            breaker = _breakers[name] = CircuitBreaker(name)
+        return breaker
+
+
+def circuit_breaker_states():
+    """
+    Get the state of every upstream breaker.
+    
+    Returns:
+        dict: Upstream name to breaker snapshot
+    """
+    with _registry_lock:
+        breakers = dict(_breakers)
+    return {name: breaker.snapshot() for name, breaker in sorted(breakers.items())}
+
+
+def call_upstream(name, fetch, cache_key=None, max_age=None):
+    """
+    Call an upstream through its breaker and rate limiter, falling back to the last good
+    payload for the same key when the call fails, the circuit is open or the request is out
+    of time or quota.
+    
+    Args:
+        name (str): Upstream name as 'service:endpoint'; the service picks the rate limiter
+        fetch (callable): Function making the call; it returns the payload or raises
+        cache_key (hashable, optional): Key the payload is kept under; None keeps nothing
+        max_age (float, optional): Seconds a kept payload may be served for; None for no limit
+    
+    Returns:
+        The fetched payload, or the last good payload
+    
+    Raises:
+        Exception: The call's error, if there is no usable payload to fall back to
+    """
+    breaker = get_circuit_breaker(name)
+    try:
+        payload = breaker.call(fetch, limiter=get_rate_limiter(name.split(":")[0]))
+    except Exception:
+        cached = _get_last_good(name, cache_key, max_age)
+        if cached is None:
+            raise
+        breaker.record_cached()
+        return cached
+    
+    if cache_key is not None:
+        with _registry_lock:
+            entries = _last_good.setdefault(name, OrderedDict())
+            entries[cache_key] = (payload, time.monotonic())
+            entries.move_to_end(cache_key)
+            while len(entries) > UPSTREAM_CACHE_SIZE:
+                entries.popitem(last=False)
+    return payload
+
+
+def _get_last_good(name, cache_key, max_age):
+    """Get the last good payload of an upstream for a key, or None if there is none fresh enough."""
+    if cache_key is None:
+        return None
+    with _registry_lock:
+        entry = _last_good.get(name, {}).get(cache_key)
+    if entry is None or (max_age is not None and time.monotonic() - entry[1] > max_age):
+        return None
+    return entry[0]
\ No newline at end of file
@@ -0,0 +1,194 @@
+"""
+Cached per-line platform crowd forecasts stored as station x 30-minute-slot grids.
+"""
+
+import threading
+from datetime import datetime
+
+import numpy as np
+
+from api.lta_api import get_crowd_request
+from utils.crowd_utils import clean_forecast_crowd
+from utils.time_utils import local_now, minute_of_day, SLOT_MINUTES
+
+CROWD_LEVEL_NAMES = ['l', 'm', 'h']
+NO_FORECAST = -1
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+
+# Station code prefix -> DataMall train line code
+STATION_PREFIX_LINES = {
+    'NS': 'NSL', 'EW': 'EWL', 'CG': 'CGL', 'NE': 'NEL', 'CC': 'CCL', 'CE': 'CEL',
+    'DT': 'DTL', 'TE': 'TEL', 'BP': 'BPL', 'SW': 'SLRT', 'SE': 'SLRT', 'ST': 'SLRT',
+    'PW': 'PLRT', 'PE': 'PLRT', 'PT': 'PLRT'
+}
+
+
+def station_train_line(station_code):
+    """
+    Get the DataMall train line code serving a station code.
+    
+    Args:
+        station_code (str): Station code (e.g., 'NS1', 'SW4')
+        
+    Returns:
+        str: Train line code (e.g., 'NSL', 'SLRT'), or None if unknown
+    """
+    return STATION_PREFIX_LINES.get(station_code[:2])
+
+
+def _local_today():
+    """Get today's date in local (Singapore) time."""
+    return local_now().date()
+
+
+class ForecastCrowdGrid:
+    """
+    Daily crowd forecast of one train line as an int8 station x slot grid, built once per
+    forecast payload and answering both point and time-window queries.
+    """
+    
+    def __init__(self, line, forecast_date, stations, grid):
+        """
+        Initialize the grid.
+        
+        Args:
+            line (str): Train line code
+            forecast_date (date): Date the forecast is for
+            stations (dict): Station code to grid row
+            grid (ndarray): int8 array of shape (stations, SLOTS_PER_DAY); -1 where there is no forecast
+        """
+        self.line = line
+        self.forecast_date = forecast_date
+        self.stations = stations
+        self.grid = grid
+    
+    @classmethod
+    def from_response(cls, line, json_obj):
+        """
+        Build the grid from a PCDForecast response.
+        
+        Args:
+            line (str): Train line code
+            json_obj (dict): JSON response containing forecast crowd data
+            
+        Returns:
+            ForecastCrowdGrid: The grid
+        """
+        forecast_date = datetime.fromisoformat(json_obj['value'][0]['Date']).date()
+        return cls.from_frame(line, forecast_date, clean_forecast_crowd(json_obj))
+    
+    @classmethod
+    def from_frame(cls, line, forecast_date, forecast_df):
+        """
+        Build the grid from forecast crowd data.
+        
+        Args:
+            line (str): Train line code, or None if unknown
+            forecast_date (date): Date the forecast is for, or None if unknown
+            forecast_df (DataFrame): Data from clean_forecast_crowd, with 'Station',
+                'Start' (datetime.time) and 'CrowdLevel'
+            
+        Returns:
+            ForecastCrowdGrid: The grid
+        """
+        stations = {station: row for row, station in enumerate(forecast_df['Station'].unique())}
+        grid = np.full((len(stations), SLOTS_PER_DAY), NO_FORECAST, dtype=np.int8)
+        
+        rows = forecast_df['Station'].map(stations).to_numpy()
+        slots = np.array([minute_of_day(start) // SLOT_MINUTES for start in forecast_df['Start']], dtype=np.int64)
+        levels = forecast_df['CrowdLevel'].map({level: code for code, level in enumerate(CROWD_LEVEL_NAMES)})
+        known = levels.notna().to_numpy()
+        grid[rows[known], slots[known]] = levels[known].to_numpy(dtype=np.int8)
+        
+        return cls(line, forecast_date, stations, grid)
+    
+    def window(self, station_code, start_minute, end_minute):
+        """
+        Get the forecast slots of a station starting within a time window.
+        
+        Args:
+            station_code (str): Station code
+            start_minute (int): Window start in minutes since midnight (inclusive)
+            end_minute (int): Window end in minutes since midnight (inclusive)
+            
+        Returns:
+            tuple: (list of slot start minutes, list of crowd level codes), skipping slots
+            without a forecast
+        """
+        row = self.stations.get(station_code)
+        if row is None:
+            return [], []
+        
+        # Clamp to the day rather than wrapping around midnight
+        first = -(-max(start_minute, 0) // SLOT_MINUTES)
+        last = min(end_minute, SLOTS_PER_DAY * SLOT_MINUTES - 1) // SLOT_MINUTES
+        
+        codes = self.grid[row, first:last + 1]
+        slots = np.flatnonzero(codes != NO_FORECAST)
+        
+        return [int(first + slot) * SLOT_MINUTES for slot in slots], [CROWD_LEVEL_NAMES[codes[slot]] for slot in slots]
+    
+    def level_at(self, station_code, minute):
+        """
+        Get the forecast crowd level of a station at a time of day.
+        
+        Args:
+            station_code (str): Station code
+            minute (int): Minutes since midnight
+            
+        Returns:
+            str: Crowd level code ('l', 'm', 'h'), or None if there is no forecast
+        """
+        row = self.stations.get(station_code)
+        if row is None:
+            return None
+        
+        level = self.grid[row, minute // SLOT_MINUTES]
+        return CROWD_LEVEL_NAMES[level] if level != NO_FORECAST else None
+
+
+_forecast_grids = {}
+_forecast_lock = threading.Lock()
+
+
+def publish_forecast_grid(line, json_obj):
+    """
+    Build a grid from a PCDForecast response and make it the cached forecast of its line.
+    
+    Args:
+        line (str): Train line code
+        json_obj (dict): JSON response containing forecast crowd data
+        
+    Returns:
+        ForecastCrowdGrid: The cached grid
+    """
+    forecast_grid = ForecastCrowdGrid.from_response(line, json_obj)
+    
+    with _forecast_lock:
+        _forecast_grids[line] = forecast_grid
+    
+    return forecast_grid
+
+
+def get_forecast_grid(line):
+    """
+    Get today's forecast grid of a line, fetching it once per day.
+    
+    Args:
+        line (str): Train line code
+        
+    Returns:
+        ForecastCrowdGrid: The grid, or None if the forecast could not be fetched
+    """
+    with _forecast_lock:
+        forecast_grid = _forecast_grids.get(line)
+    
+    if forecast_grid is not None and forecast_grid.forecast_date == _local_today():
+        return forecast_grid
+    
+    response = get_crowd_request('Forecast', line)
+    
+    if response is None or 'error' in response or not response.get('value'):
+        return forecast_grid
+    
+    return publish_forecast_grid(line, response)
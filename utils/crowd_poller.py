@@ -0,0 +1,210 @@
+"""
+Background poller that keeps an in-memory snapshot of real-time platform crowd levels.
+"""
+
+import threading
+import time
+from datetime import datetime
+from types import MappingProxyType
+from typing import Mapping, NamedTuple, Optional
+
+from api.lta_api import get_crowd_request
+from config.settings import (
+    TRAIN_LINES,
+    CROWD_POLL_INTERVAL,
+    CROWD_FORECAST_POLL_INTERVAL,
+    CROWD_SNAPSHOT_MAX_AGE
+)
+from utils.crowd_utils import clean_realtime_crowd
+from utils.crowd_forecast import publish_forecast_grid
+from utils.crowd_store import SOURCE_REALTIME, SOURCE_FORECAST, realtime_rows, forecast_rows
+from utils.rate_limiter import BACKGROUND, request_priority
+
+
+class CrowdSnapshot(NamedTuple):
+    """
+    Immutable view of real-time crowd levels across all polled train lines.
+    """
+    levels: Mapping[str, str]       # station code -> crowd level code ('l', 'm', 'h')
+    lines: frozenset                # train lines included in the snapshot
+    updated_at: datetime            # wall-clock time of the sweep
+    monotonic_at: float             # monotonic time of the sweep
+    line_times: Mapping[str, float] # train line -> monotonic time its readings were fetched, used for ageing
+
+    def age(self, lines=None):
+        """
+        Get the age of the readings of some lines.
+        
+        Args:
+            lines (iterable, optional): Train line codes; defaults to every line in the snapshot
+            
+        Returns:
+            float: Seconds since the oldest of these lines was fetched, or since the sweep
+            if there are none
+        """
+        lines = self.line_times if lines is None else lines
+        return time.monotonic() - min((self.line_times[line] for line in lines), default=self.monotonic_at)
+
+    def fresh_lines(self, max_age=CROWD_SNAPSHOT_MAX_AGE):
+        """
+        Get the lines whose readings are fresh.
+        
+        Args:
+            max_age (float): Seconds after which a line's readings no longer count as fresh
+            
+        Returns:
+            set: Train line codes
+        """
+        now = time.monotonic()
+        return {line for line, fetched_at in self.line_times.items() if now - fetched_at <= max_age}
+
+    def covers(self, lines, max_age=CROWD_SNAPSHOT_MAX_AGE):
+        """
+        Check if the snapshot contains fresh data for all the given lines.
+        
+        Args:
+            lines (iterable): Train line codes (e.g., 'NSL', 'EWL')
+            max_age (float): Seconds after which a line's readings no longer count as fresh
+            
+        Returns:
+            bool: True if the snapshot can answer queries for these lines
+        """
+        lines = set(lines)
+        return lines <= self.lines and self.age(lines) <= max_age
+
+
+class RealTimeCrowdPoller:
+    """
+    Sweeps every train line at DataMall's refresh cadence and publishes the result as a
+    CrowdSnapshot, so requests read crowd levels without calling the API themselves.
+    A daily forecast sweep refreshes the cached forecast grids, and when a history store is
+    attached every real-time and forecast sweep is also persisted.
+    """
+    
+    def __init__(self, lines=TRAIN_LINES, interval=CROWD_POLL_INTERVAL,
+                 forecast_interval=CROWD_FORECAST_POLL_INTERVAL, store=None):
+        """
+        Initialize the poller.
+        
+        Args:
+            lines (list): Train line codes to poll
+            interval (float): Seconds between real-time sweeps
+            forecast_interval (float): Seconds between forecast sweeps
+            store (CrowdHistoryStore, optional): Store to persist polled readings into
+        """
+        self.lines = list(lines)
+        self.interval = interval
+        self.forecast_interval = forecast_interval
+        self.store = store
+        self._snapshot = None
+        self._forecast_at = None
+        self._stop_event = threading.Event()
+        self._thread = None
+    
+    @property
+    def snapshot(self) -> Optional[CrowdSnapshot]:
+        """The latest published snapshot, or None before the first successful sweep."""
+        return self._snapshot
+    
+    def refresh(self):
+        """
+        Fetch real-time crowd levels for every line and publish a new snapshot.
+        
+        Lines that fail to fetch keep their readings, and the time they were fetched, from
+        the previous snapshot.
+        
+        Returns:
+            CrowdSnapshot: The published snapshot
+        """
+        previous = self._snapshot
+        levels = {}
+        line_times = {}
+        
+        for line in self.lines:
+            response = get_crowd_request('RealTime', line)
+            
+            if response is not None and 'error' not in response and response.get('value'):
+                line_df = clean_realtime_crowd(response)
+                levels.update(zip(line_df['Station'], line_df['CrowdLevel']))
+                line_times[line] = time.monotonic()
+                
+                if self.store is not None:
+                    self.store.append(realtime_rows(response), SOURCE_REALTIME)
+            else:
+                print(f"Failed to refresh real-time crowd data for {line}.")
+        
+        # Carry over stale lines from the previous snapshot, keeping when they were fetched
+        if previous is not None:
+            for station, level in previous.levels.items():
+                levels.setdefault(station, level)
+            for line, fetched_at in previous.line_times.items():
+                line_times.setdefault(line, fetched_at)
+        
+        # Publish atomically by swapping the reference
+        self._snapshot = CrowdSnapshot(
+            levels=MappingProxyType(levels),
+            lines=frozenset(line_times),
+            updated_at=datetime.now(),
+            monotonic_at=time.monotonic(),
+            line_times=MappingProxyType(line_times)
+        )
+        return self._snapshot
+    
+    def refresh_forecast(self):
+        """
+        Fetch the daily crowd forecast for every line, refresh the cached forecast grids
+        and persist it into the history store.
+        """
+        for line in self.lines:
+            response = get_crowd_request('Forecast', line)
+            
+            if response is not None and 'error' not in response and response.get('value'):
+                publish_forecast_grid(line, response)
+                if self.store is not None:
+                    self.store.append(forecast_rows(response), SOURCE_FORECAST)
+            else:
+                print(f"Failed to refresh crowd forecast data for {line}.")
+        
+        self._forecast_at = time.monotonic()
+    
+    def _run(self):
+        """Poll until stopped, queueing behind user requests for the DataMall quota."""
+        with request_priority(BACKGROUND):
+            while not self._stop_event.is_set():
+                try:
+                    self.refresh()
+                    
+                    if self._forecast_at is None or time.monotonic() - self._forecast_at >= self.forecast_interval:
+                        self.refresh_forecast()
+                except Exception as e:
+                    print(f"Real-time crowd poller error: {e}")
+                self._stop_event.wait(self.interval)
+    
+    def start(self):
+        """Start polling in a background daemon thread."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="crowd-poller", daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        """Stop the background thread."""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+
+_crowd_poller = RealTimeCrowdPoller()
+
+
+def get_crowd_poller():
+    """
+    Get the process-wide real-time crowd poller.
+    
+    Returns:
+        RealTimeCrowdPoller: Shared poller instance
+    """
+    return _crowd_poller
@@ -0,0 +1,212 @@
+"""
+Append-only store of historical platform crowd levels.
+
+Readings are kept in SQLite with integer station IDs and single-byte crowd levels,
+clustered by (station, source, time) so range queries for a station are index scans.
+"""
+
+import sqlite3
+import threading
+from datetime import datetime, timezone, timedelta
+
+from config.settings import CROWD_HISTORY_DB_PATH, LOCAL_UTC_OFFSET_HOURS
+
+SOURCE_REALTIME = 0
+SOURCE_FORECAST = 1
+
+CROWD_LEVEL_CODES = {'l': 0, 'm': 1, 'h': 2}
+CROWD_LEVEL_NAMES = ['l', 'm', 'h']
+
+_LOCAL_TZ = timezone(timedelta(hours=LOCAL_UTC_OFFSET_HOURS))
+_LOCAL_OFFSET_SECONDS = LOCAL_UTC_OFFSET_HOURS * 3600
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS stations (
+    id INTEGER PRIMARY KEY,
+    code TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS crowd_readings (
+    station_id INTEGER NOT NULL,
+    source INTEGER NOT NULL,
+    ts INTEGER NOT NULL,
+    level INTEGER NOT NULL,
+    PRIMARY KEY (station_id, source, ts)
+) WITHOUT ROWID;
+"""
+
+
+def realtime_rows(json_obj):
+    """
+    Convert a PCDRealTime response into store rows.
+    
+    Args:
+        json_obj (dict): JSON response containing real-time crowd data
+        
+    Returns:
+        list: (station_code, start_datetime, level_code) tuples
+    """
+    return [
+        (entry['Station'], datetime.fromisoformat(entry['StartTime']), entry['CrowdLevel'])
+        for entry in json_obj.get('value', [])
+    ]
+
+
+def forecast_rows(json_obj):
+    """
+    Convert a PCDForecast response into store rows.
+    
+    Args:
+        json_obj (dict): JSON response containing forecast crowd data
+        
+    Returns:
+        list: (station_code, start_datetime, level_code) tuples
+    """
+    return [
+        (station['Station'], datetime.fromisoformat(interval['Start']), interval['CrowdLevel'])
+        for entry in json_obj.get('value', [])
+        for station in entry['Stations']
+        for interval in station['Interval']
+    ]
+
+
+class CrowdHistoryStore:
+    """
+    Append-only time-series store of real-time and forecast crowd levels per station.
+    """
+    
+    def __init__(self, db_path=CROWD_HISTORY_DB_PATH):
+        """
+        Open (and create if needed) the store.
+        
+        Args:
+            db_path (str): Path to the SQLite database file
+        """
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        self._station_ids = dict(self._conn.execute("SELECT code, id FROM stations"))
+    
+    def _station_id(self, station_code):
+        """Get the integer ID of a station, registering it if new. Caller holds the lock."""
+        station_id = self._station_ids.get(station_code)
+        if station_id is None:
+            cursor = self._conn.execute("INSERT INTO stations (code) VALUES (?)", (station_code,))
+            station_id = cursor.lastrowid
+            self._station_ids[station_code] = station_id
+        return station_id
+    
+    def append(self, rows, source=SOURCE_REALTIME):
+        """
+        Append crowd readings. Readings already stored for the same station and time are kept.
+        
+        Args:
+            rows (iterable): (station_code, start_datetime, level_code) tuples
+            source (int): SOURCE_REALTIME or SOURCE_FORECAST
+            
+        Returns:
+            int: Number of new readings stored
+        """
+        with self._lock:
+            records = [
+                (self._station_id(station), source, int(start.timestamp()), CROWD_LEVEL_CODES[level])
+                for station, start, level in rows
+                if level in CROWD_LEVEL_CODES
+            ]
+            cursor = self._conn.executemany(
+                "INSERT OR IGNORE INTO crowd_readings (station_id, source, ts, level) VALUES (?, ?, ?, ?)",
+                records
+            )
+            self._conn.commit()
+            return cursor.rowcount
+    
+    def query_range(self, station_code, start, end, source=SOURCE_REALTIME):
+        """
+        Get the readings of a station within a time range.
+        
+        Args:
+            station_code (str): Station code (e.g., 'NS1')
+            start (datetime): Start of the range (inclusive)
+            end (datetime): End of the range (inclusive)
+            source (int): SOURCE_REALTIME or SOURCE_FORECAST
+            
+        Returns:
+            list: (start_datetime, level_code) tuples in time order
+        """
+        station_id = self._station_ids.get(station_code)
+        if station_id is None:
+            return []
+        
+        with self._lock:
+            cursor = self._conn.execute(
+                "SELECT ts, level FROM crowd_readings "
+                "WHERE station_id = ? AND source = ? AND ts BETWEEN ? AND ? ORDER BY ts",
+                (station_id, source, int(start.timestamp()), int(end.timestamp()))
+            )
+            records = cursor.fetchall()
+        
+        return [(datetime.fromtimestamp(ts, _LOCAL_TZ), CROWD_LEVEL_NAMES[level]) for ts, level in records]
+    
+    def level_counts(self, station_code, day_type, minute_of_day, window=30, source=SOURCE_REALTIME):
+        """
+        Count the historical crowd levels of a station around a time of day.
+        
+        Args:
+            station_code (str): Station code (e.g., 'NS1')
+            day_type (str): 'WEEKDAY' or 'WEEKENDS/HOLIDAY'
+            minute_of_day (int): Minutes since midnight, local time
+            window (int): Minutes either side of minute_of_day to include
+            source (int): SOURCE_REALTIME or SOURCE_FORECAST
+            
+        Returns:
+            dict: Level code ('l', 'm', 'h') to number of readings
+        """
+        station_id = self._station_ids.get(station_code)
+        if station_id is None:
+            return {}
+        
+        # 1970-01-01 was a Thursday, so (days + 3) % 7 gives Monday = 0
+        weekday_clause = "< 5" if day_type == 'WEEKDAY' else ">= 5"
+        
+        with self._lock:
+            cursor = self._conn.execute(
+                "SELECT level, COUNT(*) FROM crowd_readings "
+                "WHERE station_id = :station AND source = :source "
+                "AND ((ts + :offset) % 86400) / 60 BETWEEN :start AND :end "
+                f"AND (((ts + :offset) / 86400) + 3) % 7 {weekday_clause} "
+                "GROUP BY level",
+                {
+                    "station": station_id,
+                    "source": source,
+                    "offset": _LOCAL_OFFSET_SECONDS,
+                    "start": max(minute_of_day - window, 0),
+                    "end": min(minute_of_day + window, 24 * 60 - 1)
+                }
+            )
+            records = cursor.fetchall()
+        
+        return {CROWD_LEVEL_NAMES[level]: count for level, count in records}
+    
+    def close(self):
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+
+_crowd_store = None
+_crowd_store_lock = threading.Lock()
+
+
+def get_crowd_store():
+    """
+    Get the process-wide crowd history store, opening it on first use.
+    
+    Returns:
+        CrowdHistoryStore: Shared store instance
+    """
+    global _crowd_store
+    with _crowd_store_lock:
+        if _crowd_store is None:
+            _crowd_store = CrowdHistoryStore()
+        return _crowd_store
@@ -2,8 +2,9 @@
 Utility functions for handling crowd level data.
 """
 
+import threading
+
 import pandas as pd
-from datetime import timedelta
 
 
 def clean_forecast_crowd(json_obj):
@@ -57,62 +58,59 @@ def clean_realtime_crowd(json_obj):
     return df
 
 
+def _forecast_grids(data_df):
+    """Get the forecast grids to query from crowd data, a grid or a list of grids."""
+    from utils.crowd_forecast import ForecastCrowdGrid
+    
+    if isinstance(data_df, ForecastCrowdGrid):
+        return [data_df]
+    if isinstance(data_df, pd.DataFrame):
+        return [ForecastCrowdGrid.from_frame(None, None, data_df)]
+    return list(data_df)
+
+
 def clean_time_crowd(data_df, prompt_df, date_time):
     """
     Filter crowd data by time and station.
     
     Args:
-        data_df (DataFrame): DataFrame containing crowd data
+        data_df (DataFrame, ForecastCrowdGrid or list): Forecast crowd data, or the grids
+            already built from it (e.g., one per line)
         prompt_df (DataFrame): DataFrame containing station data
         date_time (str): Date and time string
         
     Returns:
         str: Summary of crowd levels
     """
-    from utils.time_utils import split_date_time
+    from utils.crowd_forecast import CROWD_LEVEL_NAMES
+    from utils.time_utils import split_date_time, minute_of_day
     from utils.transport_utils import summarize_crowd, get_station_names
     
-    # Filter for station
-    crowd = []
+    # Filter for station within +- 30 minutes
     day, time = split_date_time(date_time)
+    start_minute = minute_of_day(time) - 30
+    end_minute = minute_of_day(time) + 30
     
-    for _, row in data_df.iterrows():
-        if row['Station'] in prompt_df['stn_codes'].values:
-            if (time-timedelta(minutes=30)).time() <= row['Start'] <= (time+timedelta(minutes=30)).time():
-                crowd.append(row)
+    prompt_stations = set(prompt_df['stn_codes'])
+    check_crowd = []
     
-    # Clean output
-    crowd_df = pd.DataFrame(crowd)
+    for forecast_grid in _forecast_grids(data_df):
+        for station in forecast_grid.stations:
+            if station not in prompt_stations:
+                continue
+            
+            _, levels = forecast_grid.window(station, start_minute, end_minute)
+            
+            # Arrange 'CrowdLevel' values by the order 'l', 'm', 'h'
+            crowd_levels = [level for level in CROWD_LEVEL_NAMES if level in levels]
+            
+            if crowd_levels:
+                check_crowd.append({'Station': station, 'CrowdLevel': replace_crowd_levels(crowd_levels)})
     
-    if crowd_df.empty:
+    if not check_crowd:
         return "No crowd data available for the selected time and stations."
     
-    crowd_df.reset_index(drop=True, inplace=True)
-    crowd_df.drop(columns=["Start"], inplace=True)
-    crowd_df.drop_duplicates(subset=['Station', 'CrowdLevel'], inplace=True)
-    
-    check_crowd_df = pd.DataFrame(columns=['Station', 'CrowdLevel'])
-    
-    for station in crowd_df['Station'].unique():
-        station_df = crowd_df[crowd_df['Station'] == station]
-        crowd_levels = []
-
-        # Arrange 'CrowdLevel' values by the order 'l', 'm', 'h'
-        for level in ['l', 'm', 'h']:
-            # Append values for current 'CrowdLevel' if present
-            if level in station_df['CrowdLevel'].values:
-                crowd_levels.append(level)
-        
-        current_crowd = pd.DataFrame({
-            'Station': [station],
-            'CrowdLevel': [crowd_levels]
-        })
-        
-        check_crowd_df = pd.concat([check_crowd_df, current_crowd])
-    
-    check_crowd_df['CrowdLevel'] = check_crowd_df['CrowdLevel'].apply(replace_crowd_levels)
-    check_crowd_df.reset_index(drop=True, inplace=True)
-    check_crowd_df = get_station_names(check_crowd_df, None)
+    check_crowd_df = get_station_names(pd.DataFrame(check_crowd), None)
     
     crowd_string = summarize_crowd(check_crowd_df)
     return crowd_string
@@ -160,6 +158,41 @@ def clean_crowd(data_df, prompt_df):
     return crowd_string
 
 
+def clean_snapshot_crowd(snapshot, prompt_df):
+    """
+    Look up crowd levels for the selected stations in a real-time crowd snapshot.
+    
+    Args:
+        snapshot (CrowdSnapshot): Snapshot published by the real-time crowd poller
+        prompt_df (DataFrame): DataFrame containing station data
+        
+    Returns:
+        str: Summary of crowd levels
+    """
+    from utils.transport_utils import summarize_crowd, get_station_names
+    
+    stations = [code for code in prompt_df['stn_codes'] if code in snapshot.levels]
+    
+    if not stations:
+        return "No crowd data available for the selected stations."
+    
+    crowd_df = pd.DataFrame({
+        'Station': stations,
+        'CrowdLevel': [snapshot.levels[code] for code in stations]
+    })
+    
+    crowd_df['CrowdLevel'] = crowd_df['CrowdLevel'].replace({
+        'l': 'CROWD LEVEL LOW',
+        'm': 'CROWD LEVEL MODERATE',
+        'h': 'CROWD LEVEL HIGH'
+    })
+    
+    crowd_df = get_station_names(crowd_df, None)
+    
+    crowd_string = summarize_crowd(crowd_df)
+    return crowd_string
+
+
 def replace_crowd_levels(levels):
     """
     Convert crowd level codes to readable text.
@@ -180,7 +213,7 @@ def replace_crowd_levels(levels):
         return 'CROWD LEVEL LOW TO MODERATE'
     elif levels == ['m', 'h']:
         return 'CROWD LEVEL MODERATE TO HIGH'
-    elif levels == ['l', 'm', 'h']:
+    elif levels in (['l', 'h'], ['l', 'm', 'h']):
         return 'CROWD LEVEL LOW TO HIGH'
     else:
         return str(levels)
@@ -191,76 +224,58 @@ def clean_crowd_time(data_df, prompt_df, date_time):
     Filter crowd data by time range and station.
     
     Args:
-        data_df (DataFrame): DataFrame containing crowd data
+        data_df (DataFrame, ForecastCrowdGrid or list): Forecast crowd data, or the grids
+            already built from it (e.g., one per line)
         prompt_df (DataFrame): DataFrame containing station data
         date_time (str): Date and time string
         
     Returns:
         str: Summary of crowd levels by time
     """
-    from utils.time_utils import split_date_time
+    from utils.crowd_forecast import CROWD_LEVEL_NAMES
+    from utils.time_utils import split_date_time, local_now, minute_of_day, SERVICE_START_MINUTE, SERVICE_END_MINUTE
     from utils.transport_utils import summarize_time, get_station_names
     from datetime import datetime
     
-    # Filter for station
-    crowd = []
     day, time = split_date_time(date_time)
     
     # Check if user input an actual time (+- 1.5hrs), else 7am - 10pm
-    current_time = datetime.strptime((datetime.now().strftime("%H:%M")), "%H:%M")
+    current_time = datetime.strptime((local_now().strftime("%H:%M")), "%H:%M")
     
     if time != current_time:
-        start_check_time = (time-timedelta(minutes=90)).time()
-        if start_check_time <= datetime.strptime('07:00', '%H:%M').time():
-            start_check_time = datetime.strptime('07:00', '%H:%M').time()
-        
-        end_check_time = (time+timedelta(minutes=30)).time()
-        if end_check_time >= datetime.strptime('22:00', '%H:%M').time():
-            end_check_time = datetime.strptime('22:00', '%H:%M').time()
+        start_check_minute = max(minute_of_day(time) - 90, SERVICE_START_MINUTE)
+        end_check_minute = min(minute_of_day(time) + 30, SERVICE_END_MINUTE)
     else:
-        start_check_time = datetime.strptime('07:00', '%H:%M').time()
-        end_check_time = datetime.strptime('22:00', '%H:%M').time()
+        start_check_minute = SERVICE_START_MINUTE
+        end_check_minute = SERVICE_END_MINUTE
     
     # Find station
-    for _, row in data_df.iterrows():
-        if row['Station'] in prompt_df['stn_codes'].values:
-            if start_check_time <= row['Start'] <= end_check_time:
-                crowd.append(row)
-    
-    if not crowd:
-        return "No crowd data available for the selected time range and stations."
-    
-    # Clean output
-    crowd_df = pd.DataFrame(crowd)
-    crowd_df['Start'] = crowd_df['Start'].apply(lambda x: x.strftime('%H:%M'))
-    crowd_df.reset_index(drop=True, inplace=True)
-    
-    all_time_df = pd.DataFrame()
+    prompt_stations = set(prompt_df['stn_codes'])
+    all_time = []
     
-    for station in crowd_df['Station'].unique():
-        station_df = crowd_df[crowd_df['Station'] == station]
-        current_stn_df = station_df.groupby(['Station', 'CrowdLevel'])['Start'].apply(list).reset_index()
-        
-        # Arrange order 'l-m-h'
-        current_stn_df['CrowdLevel'] = pd.Categorical(current_stn_df['CrowdLevel'], categories=['l', 'm', 'h'], ordered=True)
-        current_stn_df = current_stn_df.sort_values('CrowdLevel')
-        
-        all_time_df = pd.concat([all_time_df, current_stn_df])
+    for forecast_grid in _forecast_grids(data_df):
+        for station in forecast_grid.stations:
+            if station not in prompt_stations:
+                continue
+            
+            minutes, levels = forecast_grid.window(station, start_check_minute, end_check_minute)
+            
+            # Arrange order 'l-m-h'
+            for level, level_name in zip(CROWD_LEVEL_NAMES, ['LOW', 'MODERATE', 'HIGH']):
+                timings = [f"{minute // 60:02d}:{minute % 60:02d}" for minute, crowd in zip(minutes, levels) if crowd == level]
+                if timings:
+                    all_time.append({'Station': station, 'CrowdLevel': level_name, 'Start': timings})
     
-    all_time_df['CrowdLevel'] = all_time_df['CrowdLevel'].replace({
-        'l': 'LOW',
-        'm': 'MODERATE',
-        'h': 'HIGH'
-    })
+    if not all_time:
+        return "No crowd data available for the selected time range and stations."
     
-    all_time_df.reset_index(drop=True, inplace=True)
-    all_time_df = get_station_names(all_time_df, None)
+    all_time_df = get_station_names(pd.DataFrame(all_time), None)
     
     time_string = summarize_time(all_time_df)
     return time_string
 
 
-def clean_forecast_volume(data_df, prompt_df, date_time):
+def clean_forecast_volume(data_df, prompt_df, date_time, thresholds=None):
     """
     Filter volume data by time range and station for forecasting.
     
@@ -268,21 +283,25 @@ def clean_forecast_volume(data_df, prompt_df, date_time):
         data_df (DataFrame): DataFrame containing volume data
         prompt_df (DataFrame): DataFrame containing station data
         date_time (str): Date and time string
+        thresholds (DataFrame, optional): Per-station thresholds, computed from data_df if not given
         
     Returns:
         str: Summary of forecast volume by time
     """
-    from utils.time_utils import split_date_time
+    from utils.time_utils import split_date_time, local_now
     from utils.transport_utils import summarize_volume_time, get_station_names
+    from utils.volume_thresholds import compute_station_thresholds, classify_volume
     from datetime import datetime
-    from config.settings import PASSENGER_UPPER_THRESHOLD, PASSENGER_LOWER_THRESHOLD
+    
+    if thresholds is None:
+        thresholds = compute_station_thresholds(data_df)
     
     # Clean date
     day, time = split_date_time(date_time)
-    data_df.rename(columns={'PT_CODE': 'Station', 'TIME_PER_HOUR': 'Start'}, inplace=True)
+    data_df = data_df.rename(columns={'PT_CODE': 'Station', 'TIME_PER_HOUR': 'Start'})
     
     # Check if user input an actual time (+- 2hrs), else 7am - 10pm
-    current_time = datetime.strptime((datetime.now().strftime("%H:%M")), "%H:%M")
+    current_time = datetime.strptime((local_now().strftime("%H:%M")), "%H:%M")
     
     if time != current_time:
         start_check_time = time.hour - 2
@@ -296,32 +315,22 @@ def clean_forecast_volume(data_df, prompt_df, date_time):
         start_check_time = 7
         end_check_time = 22
     
-    selected_list = []
-    
     # Find station
-    for _, row in data_df.iterrows():
-        if row['Station'] in prompt_df['stn_codes'].values:
-            if start_check_time <= row['Start'] <= end_check_time:
-                selected_list.append(row)
+    selected_list_df = data_df[
+        data_df['Station'].isin(prompt_df['stn_codes']) &
+        data_df['Start'].between(start_check_time, end_check_time)
+    ]
     
-    if not selected_list:
+    if selected_list_df.empty:
         return "No forecast data available for the selected time range and stations."
     
     # Check crowd volume
-    selected_list_df = pd.DataFrame(selected_list)
     selected_list_df = selected_list_df.reset_index(drop=True)
     
     selected_list_df['Passenger_Volume'] = selected_list_df['TOTAL_TAP_IN_VOLUME'] + selected_list_df['TOTAL_TAP_OUT_VOLUME']
-    
-    for i in range(len(selected_list_df)):
-        passenger_volume = selected_list_df.loc[i, 'Passenger_Volume']
-        
-        if passenger_volume > PASSENGER_UPPER_THRESHOLD:
-            selected_list_df.loc[i, 'CrowdVolume'] = 'HIGH'
-        elif passenger_volume < PASSENGER_LOWER_THRESHOLD:
-            selected_list_df.loc[i, 'CrowdVolume'] = 'LOW'
-        else:
-            selected_list_df.loc[i, 'CrowdVolume'] = 'MODERATE'
+    selected_list_df['CrowdVolume'] = classify_volume(
+        selected_list_df['Station'], selected_list_df['DAY_TYPE'], selected_list_df['Passenger_Volume'], thresholds
+    )
     
     selected_list_df = selected_list_df.loc[:, ['Station', 'CrowdVolume', 'Passenger_Volume', 'Start', 'DAY_TYPE']]
     
@@ -347,7 +356,7 @@ def clean_forecast_volume(data_df, prompt_df, date_time):
     return time_string
 
 
-def clean_volume(data_df, prompt_df, date_time):
+def clean_volume(data_df, prompt_df, date_time, thresholds=None):
     """
     Filter volume data by time and station.
     
@@ -355,43 +364,39 @@ def clean_volume(data_df, prompt_df, date_time):
         data_df (DataFrame): DataFrame containing volume data
         prompt_df (DataFrame): DataFrame containing station data
         date_time (str): Date and time string
+        thresholds (DataFrame, optional): Per-station thresholds, computed from data_df if not given
         
     Returns:
         str: Summary of volume data
     """
     from utils.time_utils import split_date_time
     from utils.transport_utils import summarize_crowd, get_station_names
-    from config.settings import PASSENGER_UPPER_THRESHOLD, PASSENGER_LOWER_THRESHOLD
+    from utils.volume_thresholds import compute_station_thresholds, classify_volume
+    
+    if thresholds is None:
+        thresholds = compute_station_thresholds(data_df)
     
     # Clean date
     day, time = split_date_time(date_time)
     time_hr = time.hour
     
-    selected_list = []
-    
     # Filtering through DataFrame
-    filtered_df = pd.DataFrame()
-    
-    for stn_code in prompt_df['stn_codes'].unique():
-        filtered_df = pd.concat([filtered_df, data_df[data_df['PT_CODE'] == stn_code]])
+    selected_list_df = data_df[
+        data_df['PT_CODE'].isin(prompt_df['stn_codes'].unique()) &
+        (data_df['DAY_TYPE'] == day) &
+        (data_df['TIME_PER_HOUR'] == time_hr)
+    ]
     
-    for _, row in filtered_df.iterrows():
-        if row['DAY_TYPE'] == day and row['TIME_PER_HOUR'] == time_hr:
-            selected_list.append(row)
-    
-    if not selected_list:
+    if selected_list_df.empty:
         return "No volume data available for the selected time and stations."
     
     # Check crowd volume
-    selected_list_df = pd.DataFrame(selected_list)
     selected_list_df = selected_list_df.reset_index(drop=True)
     
-    passenger_volume = selected_list_df.loc[0, 'TOTAL_TAP_IN_VOLUME'] + selected_list_df.loc[0, 'TOTAL_TAP_OUT_VOLUME']
+    passenger_volume = selected_list_df['TOTAL_TAP_IN_VOLUME'] + selected_list_df['TOTAL_TAP_OUT_VOLUME']
+    crowd_volume = classify_volume(selected_list_df['PT_CODE'], selected_list_df['DAY_TYPE'], passenger_volume, thresholds)
     
-    selected_list_df.insert(1, 'CrowdLevel', 
-                          'CROWD LEVEL HIGH' if passenger_volume > PASSENGER_UPPER_THRESHOLD 
-                          else ('CROWD LEVEL LOW' if passenger_volume < PASSENGER_LOWER_THRESHOLD 
-                              else 'CROWD LEVEL MODERATE'))
+    selected_list_df.insert(1, 'CrowdLevel', [f"CROWD LEVEL {level}" for level in crowd_volume])
     
     selected_list_df = selected_list_df.loc[:, ['PT_CODE', 'CrowdLevel']]
     selected_list_df.rename(columns={'PT_CODE': 'Station'}, inplace=True)
@@ -404,10 +409,10 @@ def clean_volume(data_df, prompt_df, date_time):
 
 def clean_to_fro_volume(data_df, start_stn, end_stn, date_time):
     """
-    Filter origin-destination volume data.
+    Look up origin-destination volume between two stations.
     
     Args:
-        data_df (DataFrame): DataFrame containing volume data
+        data_df (DataFrame or ODVolumeIndex): Origin-destination volume data or its index
         start_stn (str): Start station code
         end_stn (str): End station code
         date_time (str): Date and time string
@@ -417,67 +422,26 @@ def clean_to_fro_volume(data_df, start_stn, end_stn, date_time):
     """
     from utils.time_utils import split_date_time
     from utils.transport_utils import get_station_names
-    from config.settings import PASSENGER_UPPER_THRESHOLD, PASSENGER_LOWER_THRESHOLD
+    from utils.od_index import ODVolumeIndex
     
     # Clean date
     day, time = split_date_time(date_time)
-    time_hr = time.hour
-    
-    passenger_upper_threshold = 57   # 75% 
-    passenger_lower_threshold = 4    # 25%
     
-    selected_list = []
-    
-    # Filtering through DataFrame
-    data_df = data_df[data_df['ORIGIN_PT_CODE'].str.contains(start_stn)]
-    data_df = data_df[data_df['DESTINATION_PT_CODE'].str.contains(end_stn)]
+    od_index = data_df if isinstance(data_df, ODVolumeIndex) else ODVolumeIndex.from_dataframe(data_df)
+    passenger_volume = od_index.trips(start_stn, end_stn, day, time.hour)
     
-    # Process origin station
-    data_df.rename(columns={'ORIGIN_PT_CODE': 'PT_CODE'}, inplace=True)
-    origin_df = clean_csv(data_df, 'ORIGIN')
-    
-    # Process destination station
-    data_df.rename(columns={'DESTINATION_PT_CODE': 'PT_CODE'}, inplace=True)
-    dest_df = clean_csv(data_df, 'DESTINATION')
-    
-    # Filter by exact station codes
-    filtered_df = origin_df[origin_df['ORIGIN_PT_CODE'] == start_stn]
-    filtered_df = filtered_df[filtered_df['DESTINATION_PT_CODE'] == end_stn]
-    
-    for _, row in filtered_df.iterrows():
-        if row['DAY_TYPE'] == day and row['TIME_PER_HOUR'] == time_hr:
-            selected_list.append(row)
-            break
-    
-    if not selected_list:
+    if not passenger_volume:
         return "No volume data available for the selected stations and time."
     
-    # Check crowd volume 
-    selected_list_df = pd.DataFrame(selected_list).loc[:, ['ORIGIN_PT_CODE', 'DESTINATION_PT_CODE', 'TOTAL_TRIPS']]
-    selected_list_df = selected_list_df.reset_index(drop=True)
-    
-    passenger_volume = selected_list_df.loc[0, 'TOTAL_TRIPS']
-    
-    selected_list_df.insert(1, 'CrowdLevel', 
-                          'CROWD LEVEL HIGH' if passenger_volume > passenger_upper_threshold 
-                          else ('CROWD LEVEL LOW' if passenger_volume < passenger_lower_threshold 
-                              else 'CROWD LEVEL MODERATE'))
-    
-    selected_list_df = selected_list_df.loc[:, ['CrowdLevel', 'ORIGIN_PT_CODE', 'DESTINATION_PT_CODE']]
+    # Check crowd volume against the pair's own thresholds
+    crowd_level = od_index.crowd_level(start_stn, end_stn, passenger_volume)
     
     # Add station names
-    selected_list_df.rename(columns={'ORIGIN_PT_CODE': 'Station'}, inplace=True)
-    selected_list_df = get_station_names(selected_list_df, 'ORIGIN')
-    
-    selected_list_df.rename(columns={'DESTINATION_PT_CODE': 'Station'}, inplace=True)
-    selected_list_df = get_station_names(selected_list_df, 'DESTINATION')
+    names_df = get_station_names(pd.DataFrame({'Station': [start_stn, end_stn]}), None)
+    origin_name, destination_name = names_df['Station']
     
-    # Format output
-    selected_list_df.insert(1, 'from', 'from')
-    selected_list_df.insert(3, 'to', 'to')
-    selected_list_df.insert(5, '.', '.')
-    
-    return selected_list_df.to_string(index=False, header=False)
+    return (f"{crowd_level} from {origin_name} to {destination_name} "
+            f"({passenger_volume} trips on {day} at {time.hour:02d}:00).")
 
 
 def clean_csv(df, where=None):
@@ -496,20 +460,60 @@ def clean_csv(df, where=None):
     else:
         col_name = f'{where}_PT_CODE'
     
-    modified_rows = []
-    
-    for _, row in df.iterrows():
-        if '/' in row['PT_CODE']:
-            codes = row['PT_CODE'].split('/')
-            
-            for code in codes:
-                new_row = row.copy()
-                new_row['PT_CODE'] = code
-                modified_rows.append(new_row)
-        else:
-            modified_rows.append(row)
-    
-    modified_df = pd.DataFrame(modified_rows)
+    # One row per code of an interchange station (e.g., 'NS1/EW24')
+    modified_df = df.assign(PT_CODE=df['PT_CODE'].str.split('/')).explode('PT_CODE', ignore_index=True)
     modified_df.rename(columns={'PT_CODE': col_name}, inplace=True)
     
-    return modified_df
\ No newline at end of file
+    return modified_df
+
+
+_station_volume_cache = {}
+_station_volume_lock = threading.Lock()
+
+
+def load_station_volume(volume_month):
+    """
+    Get a month of station volume data with interchange codes split, loaded once per process.
+    
+    Args:
+        volume_month (str): Month in the volume store (e.g., '2024-02'), or None for the bundled CSV
+        
+    Returns:
+        DataFrame: Station volume data with one row per station code
+    """
+    from config.settings import TRANSPORT_NODE_DATA_PATH
+    from utils.volume_store import get_volume_dataset
+    
+    with _station_volume_lock:
+        if volume_month not in _station_volume_cache:
+            if volume_month is not None:
+                data_df = get_volume_dataset('node').to_dataframe(volume_month)
+            else:
+                data_df = pd.read_csv(TRANSPORT_NODE_DATA_PATH)
+            _station_volume_cache[volume_month] = clean_csv(data_df)
+        
+        return _station_volume_cache[volume_month]
+
+
+def forecast_station_volume(volume_month, prompt_df, date_time):
+    """
+    Summarize forecast volume at stations from a month of station volume data.
+    
+    Loads the data through the calling process's own caches, so only the small arguments
+    and the summary cross the process boundary when run on the CPU pool.
+    
+    Args:
+        volume_month (str): Month in the volume store (e.g., '2024-02'), or None for the bundled CSV
+        prompt_df (DataFrame): DataFrame containing station data
+        date_time (str): Date and time string
+        
+    Returns:
+        str: Summary of forecast volume by time
+    """
+    from utils.volume_thresholds import get_station_thresholds
+    
+    data_df = load_station_volume(volume_month)
+    
+    # Classify against each station's own thresholds
+    thresholds = get_station_thresholds(volume_month)
+    return clean_forecast_volume(data_df, prompt_df, date_time, thresholds)
\ No newline at end of file
@@ -0,0 +1,96 @@
+"""
+Request-scoped deadlines.
+
+A chat request gets one overall time budget when it enters the agent. The deadline is kept
+in a context variable, so it follows the request into tool threads that run in a copy of the
+context, and every upstream call sizes its timeout from the budget that is left. When too
+little remains, calls fail fast and callers fall back to cached data instead of waiting.
+Outside a request (e.g. the background poller) calls use their usual timeout.
+"""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from config.settings import UPSTREAM_TIMEOUT, DEADLINE_MIN_CALL_BUDGET
+
+DEADLINE_MESSAGE = "Sorry, answering that took longer than expected. Please try again or ask a simpler question."
+
+_current_deadline = ContextVar("request_deadline", default=None)
+
+
+class DeadlineExceeded(Exception):
+    """
+    Raised when the request's time budget is too small for further work.
+    """
+    
+    def __init__(self, message=DEADLINE_MESSAGE):
+        super().__init__(message)
+
+
+@contextmanager
+def deadline_scope(seconds):
+    """
+    Give the work inside the block a time budget. A nested scope cannot extend the
+    deadline of the scope around it.
+    
+    Args:
+        seconds (float): Budget in seconds
+    
+    Yields:
+        float: The deadline, in time.monotonic() seconds
+    """
+    deadline = time.monotonic() + seconds
+    outer = _current_deadline.get()
+    if outer is not None:
+        deadline = min(deadline, outer)
+    
+    token = _current_deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current_deadline.reset(token)
+
+
+def remaining_time():
+    """
+    Get the time left in the current request's budget.
+    
+    Returns:
+        float: Seconds left (negative once the deadline has passed), or None outside a request
+    """
+    deadline = _current_deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def check_deadline(min_budget=DEADLINE_MIN_CALL_BUDGET):
+    """
+    Make sure enough of the budget is left to start more work.
+    
+    Args:
+        min_budget (float): Seconds the work needs at least
+    
+    Raises:
+        DeadlineExceeded: If less than min_budget seconds are left
+    """
+    remaining = remaining_time()
+    if remaining is not None and remaining < min_budget:
+        raise DeadlineExceeded()
+
+
+def call_timeout(timeout=UPSTREAM_TIMEOUT):
+    """
+    Get the timeout for an upstream call, capped by the time left in the request.
+    
+    Args:
+        timeout (float): Timeout the call uses on its own
+    
+    Returns:
+        float: Timeout in seconds
+    
+    Raises:
+        DeadlineExceeded: If too little of the budget is left to make the call
+    """
+    check_deadline()
+    remaining = remaining_time()
+    return timeout if remaining is None else min(timeout, remaining)
\ No newline at end of file
@@ -0,0 +1,137 @@
+"""
+Process pool for CPU-bound tool stages.
+
+Pandas post-processing holds the GIL, so running it on the request threads stalls every other
+session. Stages submitted here run in worker processes instead, behind a bounded queue so a
+burst of heavy queries waits for a slot rather than piling up unbounded work.
+"""
+
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from config.settings import CPU_POOL_WORKERS, CPU_POOL_MAX_PENDING, CPU_POOL_QUEUE_TIMEOUT
+
+_in_worker = False
+
+
+class TaskQueueFull(RuntimeError):
+    """
+    Raised when no slot in the CPU pool's queue frees up in time.
+    """
+
+
+def _mark_worker():
+    """Process initializer: stages that submit further stages run them inline."""
+    global _in_worker
+    _in_worker = True
+
+
+class CPUTaskPool:
+    """
+    Bounded process pool for CPU-bound stages.
+    
+    Stages must be picklable top-level functions taking picklable arguments. Workers are
+    spawned rather than forked, so they never inherit the parent's background threads or
+    locks, and they load reference data through their own module-level caches.
+    """
+    
+    def __init__(self, max_workers=CPU_POOL_WORKERS, max_pending=CPU_POOL_MAX_PENDING,
+                 queue_timeout=CPU_POOL_QUEUE_TIMEOUT):
+        """
+        Initialize the pool. Worker processes start on the first submitted stage.
+        
+        Args:
+            max_workers (int): Number of worker processes; 0 runs stages on the calling thread
+            max_pending (int): Stages queued or running at once
+            queue_timeout (float): Seconds to wait for a queue slot before raising TaskQueueFull
+        """
+        self.max_workers = max_workers
+        self.queue_timeout = queue_timeout
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._executor = None
+        self._lock = threading.Lock()
+    
+    def _get_executor(self):
+        """Create the process pool on first use, or again after a worker crashed."""
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_mark_worker
+                )
+            return self._executor
+    
+    def _reset(self, executor):
+        """Drop a broken process pool so the next stage starts a fresh one."""
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+    
+    def run(self, fn, *args, **kwargs):
+        """
+        Run a stage in a worker process and wait for its result.
+        
+        Args:
+            fn (callable): Top-level function to run
+            *args, **kwargs: Picklable arguments for fn
+        
+        Returns:
+            The return value of fn
+        
+        Raises:
+            TaskQueueFull: If the queue stays full for longer than queue_timeout
+        """
+        if self.max_workers <= 0 or _in_worker:
+            return fn(*args, **kwargs)
+        
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            raise TaskQueueFull("Too many requests are being processed, please try again shortly.")
+        
+        try:
+            executor = self._get_executor()
+            try:
+                return executor.submit(fn, *args, **kwargs).result()
+            except BrokenProcessPool:
+                # A worker died (e.g. killed for memory); finish this stage inline
+                self._reset(executor)
+                return fn(*args, **kwargs)
+        finally:
+            self._slots.release()
+    
+    def shutdown(self):
+        """Stop the worker processes."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+
+_cpu_pool = CPUTaskPool()
+
+
+def get_cpu_pool():
+    """
+    Get the process-wide pool for CPU-bound stages.
+    
+    Returns:
+        CPUTaskPool: Shared pool instance
+    """
+    return _cpu_pool
+
+
+def run_cpu_bound(fn, *args, **kwargs):
+    """
+    Run a CPU-bound stage on the shared process pool.
+    
+    Args:
+        fn (callable): Top-level function to run
+        *args, **kwargs: Picklable arguments for fn
+    
+    Returns:
+        The return value of fn
+    """
+    return _cpu_pool.run(fn, *args, **kwargs)
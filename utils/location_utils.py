@@ -2,10 +2,15 @@
 Utility functions for location-based operations.
 """
 
+import re
+
+import numpy as np
 import pandas as pd
+from functools import lru_cache
 from math import radians, sin, cos, sqrt, atan2
 
-from config.settings import MRT_LRT_DATA_PATH
+from config.settings import TAXI_STANDS_DATA_PATH
+from utils.transport_utils import load_station_table
 
 
 def haversine(lat1, lon1, lat2, lon2):
@@ -48,7 +53,7 @@ def get_station_coordinates(station_code):
         tuple: (latitude, longitude, station_name)
     """
     # Read station data
-    station_df = pd.read_csv(MRT_LRT_DATA_PATH)
+    station_df = load_station_table()
     
     # Find station data
     station_data = station_df[station_df['station_code'] == station_code]
@@ -64,6 +69,29 @@ def get_station_coordinates(station_code):
     return station_lat, station_lon, station_name
 
 
+def find_station_location(query):
+    """
+    Look up a location query in the local station table, for when OneMap search is unavailable.
+    
+    Args:
+        query (str): Search query (e.g., 'Orchard', 'Orchard MRT Station')
+        
+    Returns:
+        tuple: (latitude, longitude, address) or (None, None, None) if the query is not a station name
+    """
+    station_name = re.sub(r"\b(MRT|LRT)?\s*STATION\b|\b(MRT|LRT)\b", "", query.upper())
+    station_name = station_name.replace(" ", "")
+    
+    station_df = load_station_table()
+    station_data = station_df[station_df['station_name'] == station_name]
+    
+    if station_data.empty:
+        return None, None, None
+    
+    station = station_data.iloc[0]
+    return float(station['lat']), float(station['lng']), f"{station['full_name']} {station['type']} STATION"
+
+
 def calculate_taxi_distances(place_lat, place_lon, taxi_df):
     """
     Calculate distances between a given location and taxi stands.
@@ -89,4 +117,39 @@ def calculate_taxi_distances(place_lat, place_lon, taxi_df):
     taxi_df_with_distances = taxi_df.copy()
     taxi_df_with_distances['Distance'] = pd.Series(distances)
     
-    return taxi_df_with_distances
\ No newline at end of file
+    return taxi_df_with_distances
+
+
+@lru_cache(maxsize=1)
+def load_taxi_stands():
+    """
+    Load the taxi stand table once per process.
+    
+    Returns:
+        DataFrame: Taxi stand data (treat as read-only)
+    """
+    return pd.read_csv(TAXI_STANDS_DATA_PATH)
+
+
+def find_nearest_taxi_stands(place_lat, place_lon, n=3):
+    """
+    Find the taxi stands nearest to a given location.
+    
+    Args:
+        place_lat (float): Latitude of the reference point
+        place_lon (float): Longitude of the reference point
+        n (int): Number of taxi stands to return
+        
+    Returns:
+        DataFrame: The n nearest taxi stands with a 'Distance' column in meters
+    """
+    taxi_df = load_taxi_stands()
+    
+    # Same haversine formula as above, over every stand at once
+    lat1, lon1 = radians(place_lat), radians(place_lon)
+    lat2 = np.radians(taxi_df['Latitude'].to_numpy())
+    lon2 = np.radians(taxi_df['Longitude'].to_numpy())
+    a = np.sin((lat2 - lat1) / 2)**2 + cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2)**2
+    distances = 6371 * 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a)) * 1000
+    
+    return taxi_df.assign(Distance=distances).nsmallest(n, 'Distance')
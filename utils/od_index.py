@@ -0,0 +1,265 @@
+"""
+Sparse origin-destination passenger volume index.
+
+Trip totals are held in a dense (pair, day type, hour) grid with one row per observed
+station pair, so a lookup is a binary search over sorted pair keys followed by an array index.
+"""
+
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from config.settings import VOLUME_LOWER_QUANTILE, VOLUME_UPPER_QUANTILE
+from utils.reference_store import attach_reference, publish_reference, remove_stale_references, source_fingerprint
+from utils.volume_store import DAY_TYPES, list_volume_months, read_volume_partition, volume_partition_path
+
+
+def expand_station_codes(codes, vocab):
+    """
+    Expand combined interchange codes (e.g. 'NE1/CC29') into one entry per station code.
+    
+    Args:
+        codes (ndarray): Vocabulary indexes, one per row
+        vocab (list): Station code strings the indexes refer to
+        
+    Returns:
+        tuple: (row indexes, station code strings), with rows repeated once per code
+    """
+    parts = [code.split('/') for code in vocab]
+    counts = np.array([len(p) for p in parts], dtype=np.int64)
+    offsets = np.cumsum(counts) - counts
+    flat_parts = np.array([code for p in parts for code in p], dtype=object)
+    
+    row_counts = counts[codes]
+    row_index = np.repeat(np.arange(len(codes)), row_counts)
+    position = np.arange(row_counts.sum()) - np.repeat(np.cumsum(row_counts) - row_counts, row_counts)
+    
+    return row_index, flat_parts[offsets[codes[row_index]] + position]
+
+
+class ODVolumeIndex:
+    """
+    Trip totals and per-pair crowd thresholds for every origin-destination station pair.
+    
+    All state is held in flat arrays, so a built index can be published to the reference
+    store and memory-mapped by every worker process instead of being rebuilt in each.
+    """
+    
+    def __init__(self, stations, pair_keys, grid, lower, upper):
+        """
+        Wrap the arrays of a built index.
+        
+        Args:
+            stations (ndarray): Sorted station codes that pair keys refer to
+            pair_keys (ndarray): Sorted keys (origin index * number of stations + destination index)
+            grid (ndarray): Trips by (pair, day type, hour)
+            lower (ndarray): Lower quantile threshold per pair
+            upper (ndarray): Upper quantile threshold per pair
+        """
+        self.stations = stations
+        self.pair_keys = pair_keys
+        self.grid = grid
+        self.lower = lower
+        self.upper = upper
+        self._station_index = {code: index for index, code in enumerate(stations.tolist())}
+    
+    @classmethod
+    def build(cls, origins, destinations, day_types, hours, trips):
+        """
+        Build the index from one row per (origin, destination, day type, hour) record.
+        
+        Args:
+            origins (ndarray): Origin station codes (single codes, not combined)
+            destinations (ndarray): Destination station codes
+            day_types (ndarray): Day type indexes into DAY_TYPES
+            hours (ndarray): Hour of day (0-23)
+            trips (ndarray): Number of trips
+            
+        Returns:
+            ODVolumeIndex: The index
+        """
+        stations, station_rows = np.unique(
+            np.concatenate([origins, destinations]).astype(str), return_inverse=True
+        )
+        origin_rows, dest_rows = np.split(station_rows.astype(np.int64), [len(origins)])
+        pair_keys, pair_rows = np.unique(origin_rows * len(stations) + dest_rows, return_inverse=True)
+        
+        grid = np.zeros((len(pair_keys), len(DAY_TYPES), 24), dtype=np.int32)
+        np.add.at(grid, (pair_rows, day_types, hours), trips)
+        
+        # Quantile thresholds over the hours each pair has trips in
+        observed = grid.reshape(len(pair_keys), -1).astype(np.float64)
+        observed[observed == 0] = np.nan
+        lower = np.nanquantile(observed, VOLUME_LOWER_QUANTILE, axis=1)
+        upper = np.nanquantile(observed, VOLUME_UPPER_QUANTILE, axis=1)
+        
+        return cls(stations, pair_keys, grid, lower, upper)
+    
+    def to_arrays(self):
+        """
+        Get the arrays that make up the index.
+        
+        Returns:
+            dict: Array name to ndarray, as accepted by the constructor
+        """
+        return {
+            'stations': self.stations,
+            'pair_keys': self.pair_keys,
+            'grid': self.grid,
+            'lower': self.lower,
+            'upper': self.upper
+        }
+    
+    @classmethod
+    def from_dataframe(cls, df):
+        """
+        Build the index from a DataFrame in the DataMall OD CSV layout.
+        
+        Args:
+            df (DataFrame): Origin-destination volume data
+            
+        Returns:
+            ODVolumeIndex: The index
+        """
+        origin_codes, origin_vocab = pd.factorize(df['ORIGIN_PT_CODE'])
+        dest_codes, dest_vocab = pd.factorize(df['DESTINATION_PT_CODE'])
+        day_types = df['DAY_TYPE'].map(DAY_TYPES.index).to_numpy()
+        
+        return cls._from_codes(origin_codes, list(origin_vocab), dest_codes, list(dest_vocab),
+                               day_types, df['TIME_PER_HOUR'].to_numpy(), df['TOTAL_TRIPS'].to_numpy())
+    
+    @classmethod
+    def from_partition(cls, month):
+        """
+        Build the index from a monthly partition of the volume store.
+        
+        Args:
+            month (str): Partition month in 'YYYY-MM' format
+            
+        Returns:
+            ODVolumeIndex: The index
+        """
+        columns, meta = read_volume_partition('od', month)
+        
+        return cls._from_codes(columns['ORIGIN_PT_CODE'], meta['stations'],
+                               columns['DESTINATION_PT_CODE'], meta['stations'],
+                               columns['DAY_TYPE'], columns['TIME_PER_HOUR'], columns['TOTAL_TRIPS'])
+    
+    @classmethod
+    def _from_codes(cls, origin_codes, origin_vocab, dest_codes, dest_vocab, day_types, hours, trips):
+        """Expand combined station codes on both ends and build the index."""
+        origin_rows, origins = expand_station_codes(np.asarray(origin_codes), origin_vocab)
+        dest_rows, destinations = expand_station_codes(np.asarray(dest_codes)[origin_rows], dest_vocab)
+        rows = origin_rows[dest_rows]
+        
+        return cls.build(origins[dest_rows], destinations, np.asarray(day_types)[rows],
+                         np.asarray(hours)[rows], np.asarray(trips)[rows])
+    
+    def _pair_row(self, origin, destination):
+        """Get the grid row of a station pair, or None if the pair has no recorded trips."""
+        origin_index = self._station_index.get(origin)
+        dest_index = self._station_index.get(destination)
+        if origin_index is None or dest_index is None:
+            return None
+        
+        key = origin_index * len(self.stations) + dest_index
+        row = int(np.searchsorted(self.pair_keys, key))
+        if row < len(self.pair_keys) and self.pair_keys[row] == key:
+            return row
+        return None
+    
+    def __contains__(self, pair):
+        return self._pair_row(*pair) is not None
+    
+    def __len__(self):
+        return len(self.pair_keys)
+    
+    def trips(self, origin, destination, day_type, hour):
+        """
+        Get the number of trips between two stations.
+        
+        Args:
+            origin (str): Origin station code (e.g., 'NS1')
+            destination (str): Destination station code
+            day_type (str): 'WEEKDAY' or 'WEEKENDS/HOLIDAY'
+            hour (int): Hour of day (0-23)
+            
+        Returns:
+            int: Number of trips, or None if the pair has no recorded trips
+        """
+        row = self._pair_row(origin, destination)
+        if row is None:
+            return None
+        return int(self.grid[row, DAY_TYPES.index(day_type), hour])
+    
+    def crowd_level(self, origin, destination, trips):
+        """
+        Classify a trip count against the pair's own quantile thresholds.
+        
+        Args:
+            origin (str): Origin station code
+            destination (str): Destination station code
+            trips (int): Number of trips
+            
+        Returns:
+            str: 'CROWD LEVEL LOW', 'CROWD LEVEL MODERATE' or 'CROWD LEVEL HIGH'
+        """
+        row = self._pair_row(origin, destination)
+        
+        if trips > self.upper[row]:
+            return 'CROWD LEVEL HIGH'
+        elif trips < self.lower[row]:
+            return 'CROWD LEVEL LOW'
+        else:
+            return 'CROWD LEVEL MODERATE'
+
+
+_od_index_cache = {}
+_od_index_lock = threading.Lock()
+
+
+def get_od_index(month=None):
+    """
+    Get the OD index of a month in the volume store, building it on first use.
+    
+    Args:
+        month (str, optional): Partition month in 'YYYY-MM' format, defaults to the latest month
+        
+    Returns:
+        ODVolumeIndex: The index, or None if no OD data has been ingested
+    """
+    if month is None:
+        months = list_volume_months('od')
+        if not months:
+            return None
+        month = months[-1]
+    
+    with _od_index_lock:
+        if month not in _od_index_cache:
+            _od_index_cache[month] = _load_shared_od_index(month)
+        return _od_index_cache[month]
+
+
+def _load_shared_od_index(month):
+    """
+    Attach the month's index from the reference store, building and publishing it if this
+    is the first process on the host to need it.
+    """
+    name = f"od-{month}"
+    fingerprint = source_fingerprint(os.path.join(volume_partition_path('od', month), "meta.json"))
+    
+    attached = attach_reference(name, fingerprint)
+    if attached is None:
+        od_index = ODVolumeIndex.from_partition(month)
+        try:
+            publish_reference(name, fingerprint, od_index.to_arrays())
+            remove_stale_references(name, fingerprint)
+        except OSError:
+            # Reference store not writable; keep a private copy
+            return od_index
+        attached = attach_reference(name, fingerprint)
+    
+    arrays, _ = attached
+    return ODVolumeIndex(**arrays)
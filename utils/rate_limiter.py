@@ -0,0 +1,208 @@
+"""
+Process-wide outbound rate limits for upstream services.
+
+OneMap, DataMall and data.gov.sg each get a token bucket sized to their quota, shared by
+every call the process makes to them. Calls that find the bucket empty queue for the next
+token in priority order, so a user's request goes ahead of background refreshes, and an
+upstream that answers 429 is paused instead of being retried straight away.
+"""
+
+import heapq
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from config.settings import UPSTREAM_RATE_LIMITS, RATE_LIMIT_MAX_WAIT, RATE_LIMIT_RETRY_AFTER
+
+INTERACTIVE = 0
+BACKGROUND = 1
+PRIORITY_NAMES = {INTERACTIVE: 'interactive', BACKGROUND: 'background'}
+
+_current_priority = ContextVar("request_priority", default=INTERACTIVE)
+
+
+class RateLimitExceeded(Exception):
+    """
+    Raised when a call cannot get its upstream's quota in time.
+    """
+
+
+@contextmanager
+def request_priority(priority):
+    """
+    Run the upstream calls made inside the block at the given priority.
+    
+    Args:
+        priority (int): INTERACTIVE or BACKGROUND
+    """
+    token = _current_priority.set(priority)
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+
+class UpstreamRateLimiter:
+    """
+    Token bucket with a priority queue of waiting calls.
+    """
+    
+    def __init__(self, name, rate, burst):
+        """
+        Initialize a full bucket.
+        
+        Args:
+            name (str): Upstream name, used in metrics
+            rate (float): Calls allowed per second
+            burst (int): Calls allowed back to back
+        """
+        self.name = name
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated_at = time.monotonic()
+        self.paused_until = 0.0
+        self._cond = threading.Condition()
+        self._waiters = []
+        self._sequence = itertools.count()
+        self.counts = {'acquired': 0, 'queued': 0, 'timed_out': 0, 'throttled': 0}
+    
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+    
+    def acquire(self, priority=None, timeout=RATE_LIMIT_MAX_WAIT):
+        """
+        Take a token, waiting behind calls of the same or higher priority if there is none.
+        
+        Args:
+            priority (int, optional): Call priority; defaults to the priority of the current context
+            timeout (float): Seconds to wait at most
+        
+        Raises:
+            RateLimitExceeded: If no token is available within the timeout
+        """
+        priority = _current_priority.get() if priority is None else priority
+        deadline = time.monotonic() + timeout
+        
+        with self._cond:
+            waiter = (priority, next(self._sequence))
+            heapq.heappush(self._waiters, waiter)
+            queued = False
+            try:
+                while True:
+                    now = time.monotonic()
+                    self._refill(now)
+                    is_next = self._waiters[0] == waiter
+                    
+                    if is_next and now >= self.paused_until and self.tokens >= 1:
+                        self.tokens -= 1
+                        self.counts['acquired'] += 1
+                        return
+                    
+                    remaining = deadline - now
+                    if remaining <= 0:
+                        self.counts['timed_out'] += 1
+                        raise RateLimitExceeded(f"{self.name} quota is exhausted")
+                    
+                    if not queued:
+                        queued = True
+                        self.counts['queued'] += 1
+                    
+                    # The next waiter sleeps until a token is due; the rest until they move up
+                    if is_next:
+                        remaining = min(remaining, max(self.paused_until - now, (1 - self.tokens) / self.rate, 0.001))
+                    self._cond.wait(remaining)
+            finally:
+                self._waiters.remove(waiter)
+                heapq.heapify(self._waiters)
+                self._cond.notify_all()
+    
+    def pause(self, seconds):
+        """
+        Stop handing out tokens for a while, after the upstream reported its quota exceeded.
+        
+        Args:
+            seconds (float): Seconds to pause for
+        """
+        with self._cond:
+            self.counts['throttled'] += 1
+            self.tokens = 0.0
+            self.updated_at = time.monotonic()
+            self.paused_until = max(self.paused_until, self.updated_at + seconds)
+            self._cond.notify_all()
+    
+    def snapshot(self):
+        """
+        Get the limiter state and counters.
+        
+        Returns:
+            dict: Rate, available tokens, waiting calls per priority and call counts
+        """
+        with self._cond:
+            self._refill(time.monotonic())
+            waiting = {name: 0 for name in PRIORITY_NAMES.values()}
+            for priority, _ in self._waiters:
+                waiting[PRIORITY_NAMES.get(priority, str(priority))] += 1
+            return {
+                'rate_per_second': self.rate,
+                'tokens': round(self.tokens, 2),
+                'paused_for': round(max(0.0, self.paused_until - time.monotonic()), 1),
+                'waiting': waiting,
+                **self.counts
+            }
+
+
+_limiters_lock = threading.Lock()
+_limiters = {}
+
+
+def get_rate_limiter(upstream):
+    """
+    Get the shared rate limiter of an upstream.
+    
+    Args:
+        upstream (str): Upstream service, a key of UPSTREAM_RATE_LIMITS (e.g., 'onemap')
+    
+    Returns:
+        UpstreamRateLimiter: The limiter, or None if the upstream has no limit configured
+    """
+    if upstream not in UPSTREAM_RATE_LIMITS:
+        return None
+    
+    with _limiters_lock:
+        limiter = _limiters.get(upstream)
+        if limiter is None:
+            rate, burst = UPSTREAM_RATE_LIMITS[upstream]
+            limiter = _limiters[upstream] = UpstreamRateLimiter(upstream, rate, burst)
+        return limiter
+
+
+def rate_limiter_states():
+    """
+    Get the state of every upstream rate limiter in use.
+    
+    Returns:
+        dict: Upstream name to limiter snapshot
+    """
+    with _limiters_lock:
+        limiters = dict(_limiters)
+    return {name: limiter.snapshot() for name, limiter in sorted(limiters.items())}
+
+
+def retry_after_seconds(value):
+    """
+    Parse a Retry-After header given in seconds.
+    
+    Args:
+        value (str): Header value, or None
+    
+    Returns:
+        float: Seconds to pause for, RATE_LIMIT_RETRY_AFTER if missing or not in seconds
+    """
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        return RATE_LIMIT_RETRY_AFTER
\ No newline at end of file
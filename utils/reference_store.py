@@ -0,0 +1,125 @@
+"""
+Read-only reference datasets shared by every process on a host.
+
+A dataset is a set of numpy arrays published once to a directory of .npy files and attached
+by memory-mapping them read-only, so each worker process maps the same page cache instead of
+building and holding its own copy. Directories are keyed by a fingerprint of their source
+data: a changed source gets a new directory, and an unchanged one is only built once.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+from config.settings import REFERENCE_DATA_DIR
+
+
+def source_fingerprint(*paths):
+    """
+    Fingerprint source files by path, size and modification time.
+    
+    Args:
+        *paths (str): Files (or directories) the dataset is derived from
+    
+    Returns:
+        str: Short hex digest that changes whenever a source changes
+    """
+    digest = hashlib.sha1()
+    for path in paths:
+        stat = os.stat(path)
+        digest.update(f"{os.path.abspath(path)}:{stat.st_size}:{stat.st_mtime_ns};".encode())
+    return digest.hexdigest()[:16]
+
+
+def reference_path(name, fingerprint):
+    """
+    Get the directory of a published dataset.
+    
+    Args:
+        name (str): Dataset name (e.g., 'od-2024-02')
+        fingerprint (str): Source fingerprint
+    
+    Returns:
+        str: Path to the dataset directory
+    """
+    return os.path.join(REFERENCE_DATA_DIR, f"{name}-{fingerprint}")
+
+
+def publish_reference(name, fingerprint, arrays, meta=None):
+    """
+    Publish a dataset, unless another process already has.
+    
+    Arrays are written to a staging directory and renamed into place, so readers never
+    see a partly written dataset and concurrent publishers leave exactly one copy.
+    
+    Args:
+        name (str): Dataset name
+        fingerprint (str): Source fingerprint
+        arrays (dict): Array name to numeric or fixed-width string ndarray
+        meta (dict, optional): JSON-serialisable metadata stored alongside the arrays
+    """
+    final_dir = reference_path(name, fingerprint)
+    if os.path.isdir(final_dir):
+        return
+    
+    os.makedirs(REFERENCE_DATA_DIR, exist_ok=True)
+    staging_dir = tempfile.mkdtemp(prefix=f".{name}-", dir=REFERENCE_DATA_DIR)
+    try:
+        for array_name, array in arrays.items():
+            np.save(os.path.join(staging_dir, f"{array_name}.npy"), np.ascontiguousarray(array))
+        with open(os.path.join(staging_dir, "meta.json"), "w") as f:
+            json.dump({'arrays': list(arrays), **(meta or {})}, f)
+        os.rename(staging_dir, final_dir)
+    except OSError:
+        # Lost the race to another publisher, or the directory is not writable
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        if not os.path.isdir(final_dir):
+            raise
+
+
+def attach_reference(name, fingerprint):
+    """
+    Memory-map a published dataset read-only.
+    
+    Args:
+        name (str): Dataset name
+        fingerprint (str): Source fingerprint
+    
+    Returns:
+        tuple: (dict of array name to read-only array, metadata), or None if not published
+    """
+    dataset_dir = reference_path(name, fingerprint)
+    try:
+        with open(os.path.join(dataset_dir, "meta.json")) as f:
+            meta = json.load(f)
+    except FileNotFoundError:
+        return None
+    
+    arrays = {
+        array_name: np.load(os.path.join(dataset_dir, f"{array_name}.npy"), mmap_mode='r')
+        for array_name in meta['arrays']
+    }
+    return arrays, meta
+
+
+def remove_stale_references(name, fingerprint):
+    """
+    Delete older published versions of a dataset.
+    
+    Processes that still have an old version mapped keep reading it until they exit.
+    
+    Args:
+        name (str): Dataset name
+        fingerprint (str): Fingerprint of the version to keep
+    """
+    if not os.path.isdir(REFERENCE_DATA_DIR):
+        return
+    
+    current = os.path.basename(reference_path(name, fingerprint))
+    for entry in os.listdir(REFERENCE_DATA_DIR):
+        if entry.startswith(f"{name}-") and entry != current and len(entry) == len(current):
+            shutil.rmtree(os.path.join(REFERENCE_DATA_DIR, entry), ignore_errors=True)
@@ -0,0 +1,209 @@
+"""
+Run-scoped memoization of tool calls.
+
+Within one agent run the same lookup is often made more than once: the agent repeats a
+tool call with identical arguments, or a crowd tool plans the same route the agent has just
+asked for. Functions wrapped here share one memo table per run, keyed by their name and
+normalized arguments, so repeats are answered from the table. Outside a run they are
+called as usual.
+"""
+
+import inspect
+import re
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache, wraps
+
+_current_memo = ContextVar("run_memo", default=None)
+_SEPARATOR_SPACING = re.compile(r"\s*([,;])\s*")
+
+
+def normalize_argument(value):
+    """
+    Normalize an argument so equivalent spellings share one memo entry.
+    
+    Strings are upper-cased with runs of whitespace collapsed and spaces around ',' and ';'
+    removed; containers are normalized element by element.
+    
+    Args:
+        value: Argument value
+    
+    Returns:
+        Hashable normalized value
+    """
+    if isinstance(value, str):
+        return _SEPARATOR_SPACING.sub(r"\1", " ".join(value.split())).upper()
+    if isinstance(value, dict):
+        return tuple(sorted((key, normalize_argument(item)) for key, item in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(normalize_argument(item) for item in value)
+    return value
+
+
+@lru_cache(maxsize=None)
+def _signature(fn):
+    """Signature of a memoized function, looked up once per function."""
+    return inspect.signature(fn)
+
+
+def bind_arguments(fn, args, kwargs):
+    """
+    Bind call arguments to their parameter names, so positional and keyword calls with the
+    same values share one memo entry.
+    
+    Args:
+        fn (callable): Function being called
+        args (tuple): Positional arguments
+        kwargs (dict): Keyword arguments
+    
+    Returns:
+        dict: Parameter name to value, including defaults; the raw arguments if they do not
+        bind to the signature
+    """
+    try:
+        bound = _signature(fn).bind(*args, **kwargs)
+    except (TypeError, ValueError):
+        return {'args': args, 'kwargs': kwargs}
+    bound.apply_defaults()
+    return dict(bound.arguments)
+
+
+def _is_transient(result):
+    """Results asking the user to try again are failures worth retrying, not answers."""
+    return isinstance(result, str) and "try again" in result.lower()
+
+
+class _Entry:
+    """Result of one call, shared with identical calls made while it is in flight."""
+    
+    def __init__(self):
+        self.done = threading.Event()
+        self.ok = False
+        self.value = None
+
+
+class RunMemo:
+    """
+    Memo table and call counters for one agent run.
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+        self.calls = Counter()
+        self.saved = Counter()
+    
+    def call(self, name, fn, args, kwargs):
+        """
+        Call fn, or return the result of an identical earlier call in this run.
+        
+        Args:
+            name (str): Name the memo entry is keyed under
+            fn (callable): Function to call on a miss
+            args (tuple): Positional arguments
+            kwargs (dict): Keyword arguments
+        
+        Returns:
+            The (possibly memoized) return value of fn
+        """
+        key = (name, normalize_argument(bind_arguments(fn, args, kwargs)))
+        
+        with self._lock:
+            self.calls[name] += 1
+            entry = self._entries.get(key)
+            owner = entry is None
+            if owner:
+                entry = self._entries[key] = _Entry()
+        
+        if not owner:
+            # Identical call made earlier (or still running); use its result if it succeeded
+            entry.done.wait()
+            if entry.ok:
+                with self._lock:
+                    self.saved[name] += 1
+                return entry.value
+            return fn(*args, **kwargs)
+        
+        try:
+            entry.value = fn(*args, **kwargs)
+            entry.ok = not _is_transient(entry.value)
+            return entry.value
+        finally:
+            if not entry.ok:
+                with self._lock:
+                    self._entries.pop(key, None)
+            entry.done.set()
+    
+    def stats(self):
+        """
+        Get the call counters of the run.
+        
+        Returns:
+            dict: Total calls, calls saved by the memo, and both per function
+        """
+        with self._lock:
+            return {
+                'calls': sum(self.calls.values()),
+                'saved': sum(self.saved.values()),
+                'by_function': {name: {'calls': count, 'saved': self.saved[name]} for name, count in self.calls.items()}
+            }
+
+
+@contextmanager
+def run_memo_scope():
+    """
+    Share one memo table across every memoized call made inside the block, including calls
+    made from threads that run in a copy of this context.
+    
+    Yields:
+        RunMemo: The run's memo table
+    """
+    memo = RunMemo()
+    token = _current_memo.set(memo)
+    try:
+        yield memo
+    finally:
+        _current_memo.reset(token)
+
+
+def run_memoized(name):
+    """
+    Decorator memoizing a function within the current run.
+    
+    Args:
+        name (str): Name the memo entries are keyed under; use the tool name for tool functions
+            so calls made by the agent and calls made internally share entries
+    
+    Returns:
+        callable: Decorator
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            memo = _current_memo.get()
+            if memo is None:
+                return fn(*args, **kwargs)
+            return memo.call(name, fn, args, kwargs)
+        
+        wrapper.run_memoized = True
+        return wrapper
+    
+    return decorator
+
+
+def memoize_tool(tool):
+    """
+    Get a copy of a LangChain tool whose calls are memoized within the current run.
+    
+    Args:
+        tool (BaseTool): Tool with a synchronous 'func'
+    
+    Returns:
+        BaseTool: Memoized copy, or the tool itself if it is already memoized or has no 'func'
+    """
+    func = getattr(tool, 'func', None)
+    if func is None or getattr(func, 'run_memoized', False):
+        return tool
+    return tool.copy(update={'func': run_memoized(tool.name)(func)})
@@ -0,0 +1,116 @@
+"""
+Offline journey planning over the local MRT station network, used when OneMap routing is
+unavailable.
+"""
+
+import heapq
+import math
+from collections import defaultdict
+from functools import lru_cache
+
+import pandas as pd
+
+from config.settings import STATION_NETWORK_DATA_PATH, OFFLINE_MINUTES_PER_STOP, OFFLINE_MINUTES_PER_TRANSFER
+from utils.transport_utils import load_station_table, get_station_full_names
+
+
+@lru_cache(maxsize=1)
+def load_station_network():
+    """
+    Load the station network once per process.
+    
+    Adjacent stations on a line are linked in both directions, and the codes of an
+    interchange station are linked to each other as line changes.
+    
+    Returns:
+        dict: Station code to a list of (neighbouring station code, minutes, is_line_change)
+    """
+    network = pd.read_csv(STATION_NETWORK_DATA_PATH)
+    graph = defaultdict(list)
+    
+    for source, target in zip(network['Source'], network['target']):
+        graph[source].append((target, OFFLINE_MINUTES_PER_STOP, False))
+        graph[target].append((source, OFFLINE_MINUTES_PER_STOP, False))
+    
+    for _, codes in load_station_table().groupby('station_name')['station_code']:
+        codes = [code for code in codes if code in graph]
+        for code in codes:
+            graph[code].extend((other, OFFLINE_MINUTES_PER_TRANSFER, True) for other in codes if other != code)
+    
+    return dict(graph)
+
+
+def plan_offline_route(start_codes, end_codes):
+    """
+    Find the quickest train journey between two stations on the station network.
+    
+    Args:
+        start_codes (list): Station codes of the starting station
+        end_codes (list): Station codes of the destination station
+    
+    Returns:
+        tuple: (estimated minutes, list of legs as (board_code, alight_code)), or None if
+        the stations are not connected or are the same station
+    """
+    graph = load_station_network()
+    end_codes = set(end_codes)
+    
+    queue = [(0.0, code, None) for code in start_codes if code in graph]
+    heapq.heapify(queue)
+    previous = {}
+    
+    while queue:
+        minutes, code, came_from = heapq.heappop(queue)
+        if code in previous:
+            continue
+        previous[code] = came_from
+        
+        if code in end_codes:
+            break
+        
+        for neighbour, cost, _ in graph[code]:
+            if neighbour not in previous:
+                heapq.heappush(queue, (minutes + cost, neighbour, code))
+    else:
+        return None
+    
+    # Walk back to the start, splitting the path into one leg per line
+    path = [code]
+    while previous[path[-1]] is not None:
+        path.append(previous[path[-1]])
+    path.reverse()
+    
+    legs = []
+    board = path[0]
+    for a, b in zip(path, path[1:]):
+        if any(neighbour == b and change for neighbour, _, change in graph[a]):
+            if a != board:
+                legs.append((board, a))
+            board = b
+    if path[-1] != board:
+        legs.append((board, path[-1]))
+    
+    if not legs:
+        return None
+    return minutes, legs
+
+
+def summarize_offline_route(minutes, legs):
+    """
+    Summarize an offline journey in the same form as the OneMap route summaries.
+    
+    Args:
+        minutes (float): Estimated journey time
+        legs (list): Legs as (board_code, alight_code)
+    
+    Returns:
+        str: Details of the route
+    """
+    names = get_station_full_names()
+    route_string = " then change to ".join(
+        f"{board} {names.get(board, board)} to {alight} {names.get(alight, alight)}" for board, alight in legs
+    )
+    return (
+        "There are 1 possible travel route(s), estimated from the station network as live journey planning is unavailable.\n"
+        f"Route 1: take train from {route_string} with an estimated duration of {math.ceil(minutes)} minutes.\n"
+    )
\ No newline at end of file
@@ -0,0 +1,217 @@
+"""
+Typo-tolerant lookup of MRT/LRT station names.
+
+Station names, full names and codes are indexed by their character trigrams once per
+process. A misspelt name is matched to the stations sharing the most trigrams with it, and
+resolved automatically only when one station is clearly the best match. Typos the trigrams
+score poorly, like swapped letters in a short name, fall back to an edit distance check on
+the closest candidates.
+"""
+
+import re
+from collections import defaultdict
+from functools import lru_cache
+
+from config.settings import (
+    STATION_MATCH_MIN_SCORE,
+    STATION_MATCH_MARGIN,
+    STATION_MATCH_MAX_EDITS,
+    STATION_MATCH_EDIT_CANDIDATES
+)
+from utils.transport_utils import load_station_table
+
+_STATION_WORDS = re.compile(r"\b(MRT|LRT|STATION|STN)\b")
+_NON_ALPHANUMERIC = re.compile(r"[^A-Z0-9]")
+
+
+def normalize_station_name(query):
+    """
+    Normalize a station name the way station names are stored: upper case, without spaces,
+    punctuation or words like 'MRT' and 'Station'.
+    
+    Args:
+        query (str): Station name as typed (e.g., 'Dhoby Ghaut MRT')
+    
+    Returns:
+        str: Normalized name (e.g., 'DHOBYGHAUT')
+    """
+    return _NON_ALPHANUMERIC.sub("", _STATION_WORDS.sub("", str(query).upper()))
+
+
+def _trigrams(text):
+    """Character trigrams of a normalized name, padded so the start and end count."""
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _edit_distance(a, b):
+    """
+    Damerau-Levenshtein distance (optimal string alignment) between two strings, counting a
+    swap of adjacent characters as one edit.
+    
+    Args:
+        a (str): First string
+        b (str): Second string
+    
+    Returns:
+        int: Number of insertions, deletions, substitutions and swaps
+    """
+    previous, current = None, list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        before, previous, current = previous, current, [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], before[j - 2] + 1)
+    return current[-1]
+
+
+class StationNameIndex:
+    """
+    Trigram index from station names, full names and codes to normalized station names.
+    """
+    
+    def __init__(self, station_df):
+        """
+        Build the index.
+        
+        Args:
+            station_df (DataFrame): Station table with 'station_code', 'station_name' and 'full_name'
+        """
+        self.exact = {}
+        self.keys = []
+        self.postings = defaultdict(list)
+        self.station_keys = defaultdict(list)
+        
+        for code, station_name, full_name in zip(station_df['station_code'], station_df['station_name'],
+                                                 station_df['full_name']):
+            for key in {station_name, normalize_station_name(full_name), code}:
+                if key in self.exact:
+                    continue
+                self.exact[key] = station_name
+                self.station_keys[station_name].append(key)
+                
+                key_id = len(self.keys)
+                grams = _trigrams(key)
+                self.keys.append((station_name, len(grams)))
+                for gram in grams:
+                    self.postings[gram].append(key_id)
+    
+    def search(self, query, k=3):
+        """
+        Find the stations whose names are closest to a query.
+        
+        Args:
+            query (str): Station name or code, possibly misspelt
+            k (int): Number of candidates to return
+        
+        Returns:
+            list: Up to k (station_name, score) pairs, best first, scored by trigram overlap
+            between 0 and 1
+        """
+        text = normalize_station_name(query)
+        if text in self.exact:
+            return [(self.exact[text], 1.0)]
+        
+        grams = _trigrams(text)
+        shared = defaultdict(int)
+        for gram in grams:
+            for key_id in self.postings.get(gram, ()):
+                shared[key_id] += 1
+        
+        # Dice coefficient per key, keeping each station's best key
+        scores = {}
+        for key_id, count in shared.items():
+            station_name, key_size = self.keys[key_id]
+            score = 2 * count / (len(grams) + key_size)
+            if score > scores.get(station_name, 0):
+                scores[station_name] = score
+        
+        return sorted(scores.items(), key=lambda item: -item[1])[:k]
+    
+    def resolve(self, query):
+        """
+        Resolve a station name or code to a station, correcting an unambiguous typo.
+        
+        Args:
+            query (str): Station name or code, possibly misspelt
+        
+        Returns:
+            str: Normalized station name, or None if no station is a clear match
+        """
+        candidates = self.search(query, k=max(2, STATION_MATCH_EDIT_CANDIDATES))
+        if not candidates:
+            return None
+        if candidates[0][1] >= STATION_MATCH_MIN_SCORE and \
+                (len(candidates) == 1 or candidates[0][1] - candidates[1][1] >= STATION_MATCH_MARGIN):
+            return candidates[0][0]
+        return self._resolve_by_edits(normalize_station_name(query), candidates)
+    
+    def _resolve_by_edits(self, text, candidates):
+        """
+        Pick the one candidate within a few edits of the query, for typos like swapped letters
+        that break up most trigrams of a short name.
+        
+        Args:
+            text (str): Normalized query
+            candidates (list): (station_name, score) pairs from search()
+        
+        Returns:
+            str: Normalized station name, or None if no single candidate is close enough
+        """
+        # Short queries allow fewer edits, so a code like 'EW1' is never corrected to 'EW2'
+        max_edits = min(STATION_MATCH_MAX_EDITS, len(text) // 4)
+        if max_edits == 0:
+            return None
+        
+        distances = {
+            station_name: min(_edit_distance(text, key) for key in self.station_keys[station_name])
+            for station_name, _ in candidates
+        }
+        best = min(distances.values())
+        closest = [station_name for station_name, distance in distances.items() if distance == best]
+        if best > max_edits or len(closest) > 1:
+            return None
+        return closest[0]
+
+
+@lru_cache(maxsize=1)
+def get_station_index():
+    """
+    Get the station name index, built once per process.
+    
+    Returns:
+        StationNameIndex: Shared index
+    """
+    return StationNameIndex(load_station_table())
+
+
+def resolve_station_name(query):
+    """
+    Resolve a station name or code to its normalized station name, correcting an
+    unambiguous typo.
+    
+    Args:
+        query (str): Station name or code (e.g., 'Dhobby Ghaut')
+    
+    Returns:
+        str: Normalized station name (e.g., 'DHOBYGHAUT'), or None if no station is a clear match
+    """
+    return get_station_index().resolve(query)
+
+
+def suggest_station_names(query, k=3):
+    """
+    Get the full names of the stations closest to a query, for a 'did you mean' hint.
+    
+    Args:
+        query (str): Station name, possibly misspelt
+        k (int): Number of suggestions
+    
+    Returns:
+        list: Full station names, best match first
+    """
+    station_df = load_station_table()
+    full_names = dict(zip(station_df['station_name'], station_df['full_name']))
+    return [full_names[name].title() for name, score in get_station_index().search(query, k) if score > 0.2]
\ No newline at end of file
@@ -2,7 +2,23 @@
 Utility functions for handling time and date operations.
 """
 
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
+
+from config.settings import LOCAL_UTC_OFFSET_HOURS
+
+SLOT_MINUTES = 30  # length of a crowd data interval
+SERVICE_START_MINUTE = 7 * 60  # 07:00, earliest time shown when no time is given
+SERVICE_END_MINUTE = 22 * 60  # 22:00, latest time shown when no time is given
+
+
+def local_now():
+    """
+    Get the current local (Singapore) time, whatever the server's time zone.
+    
+    Returns:
+        datetime: Naive local date and time
+    """
+    return datetime.now(timezone(timedelta(hours=LOCAL_UTC_OFFSET_HOURS))).replace(tzinfo=None)
 
 
 def clean_time_prompt(prompt):
@@ -35,13 +51,15 @@ def split_date_time(prompt):
     Returns:
         tuple: (day_type, time_object)
     """
+    now = local_now()
+    
     if ',' in prompt:
         date_str, time_str = prompt.split(',', 1)
         # If both empty: get current date & time
-        date = datetime.now().strftime("%d-%m-%Y") if not date_str.strip() else date_str.strip()
+        date = now.strftime("%d-%m-%Y") if not date_str.strip() else date_str.strip()
         
         if not time_str.strip():
-            time = datetime.now().strftime("%H:%M")
+            time = now.strftime("%H:%M")
         else:
             # Check if time is in 'HHMM' format
             time_input = time_str.strip()
@@ -51,13 +69,13 @@ def split_date_time(prompt):
                 time = time_input
     else:
         if len(prompt) == 0:
-            date = datetime.now().strftime("%d-%m-%Y")
-            time = datetime.now().strftime("%H:%M")
+            date = now.strftime("%d-%m-%Y")
+            time = now.strftime("%H:%M")
         else:
             if len(prompt) <= 5:
-                date = datetime.now().strftime("%d-%m-%Y")
+                date = now.strftime("%d-%m-%Y")
                 if not prompt.strip():
-                    time = datetime.now().strftime("%H:%M")
+                    time = now.strftime("%H:%M")
                 else:
                     # Check if time is in 'HHMM' format
                     time_input = prompt.strip()
@@ -67,7 +85,7 @@ def split_date_time(prompt):
                         time = time_input
             else:
                 date = prompt
-                time = datetime.now().strftime("%H:%M")
+                time = now.strftime("%H:%M")
     
     # Check weekday/weekend
     day = 'WEEKDAY' if datetime.strptime(date, "%d-%m-%Y").weekday() < 5 else 'WEEKENDS/HOLIDAY'
@@ -77,6 +95,37 @@ def split_date_time(prompt):
     return day, time_obj
 
 
+def get_prompt_date(prompt):
+    """
+    Get the date given in a date/time string, if any.
+    
+    Args:
+        prompt (str): Date/time string (e.g., 'DD-MM-YYYY,HH:MM')
+        
+    Returns:
+        date: The date, or None if only a time or nothing was given
+    """
+    if ',' in prompt:
+        date_str = prompt.split(',', 1)[0].strip()
+    else:
+        date_str = prompt.strip() if len(prompt) > 5 else ''
+    
+    return datetime.strptime(date_str, "%d-%m-%Y").date() if date_str else None
+
+
+def minute_of_day(time_value):
+    """
+    Convert a time to the number of minutes since midnight.
+    
+    Args:
+        time_value (datetime or time): Time to convert
+        
+    Returns:
+        int: Minutes since midnight (0-1439)
+    """
+    return time_value.hour * 60 + time_value.minute
+
+
 def get_rounded_time(time_delta_minutes=0):
     """
     Get current time with optional offset, rounded to nearest 30 mins.
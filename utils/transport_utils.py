@@ -3,6 +3,8 @@ Utility functions for handling transport-related operations.
 """
 
 import re
+from functools import lru_cache
+
 import pandas as pd
 
 from config.settings import MRT_LRT_DATA_PATH
@@ -20,8 +22,8 @@ def clean_station_prompt(prompt):
     """
     # Segregate into multiple routes
     routes = []
-    prompt_routes_pattern = r'Route .*?\\.'
-    prompt_single_pattern = r'MRT station .*?\\.'
+    prompt_routes_pattern = r'Route .*?\.'
+    prompt_single_pattern = r'MRT station .*?\.'
     prompt_routes = re.findall(prompt_routes_pattern, prompt)
     prompt_single = re.findall(prompt_single_pattern, prompt)
     
@@ -37,7 +39,7 @@ def clean_station_prompt(prompt):
     for i in range(len(routes)):
         # Get all stn_codes from prompt
         route_station = pd.DataFrame()
-        pattern = r'\\b(?:[A-Z]{2}\\d{2}|[A-Z]{2}\\d{1})\\b'
+        pattern = r'\b(?:[A-Z]{2}\d{2}|[A-Z]{2}\d{1})\b'
         codes = re.findall(pattern, prompt)
         lines = [station[:2] + 'L' for station in codes]
         
@@ -69,7 +71,7 @@ def clean_high_crowd_prompt(prompt, data_df):
     """
     # Segregate into multiple routes
     high_crowd = []
-    high_crowd_pattern = r'CROWD LEVEL HIGH .*?\\.'
+    high_crowd_pattern = r'CROWD LEVEL HIGH .*?\.'
     high_crowd_prompt = re.findall(high_crowd_pattern, prompt)
     
     if high_crowd_prompt is None:
@@ -78,7 +80,7 @@ def clean_high_crowd_prompt(prompt, data_df):
         high_crowd.append(high_crowd_prompt)
     
     # Loop to get info of all stations
-    pattern = r'\\b(?:[A-Z]{2}\\d{2}|[A-Z]{2}\\d{1})\\b'
+    pattern = r'\b(?:[A-Z]{2}\d{2}|[A-Z]{2}\d{1})\b'
     codes = re.findall(pattern, prompt)
     high_crowd_stn = pd.DataFrame({
         'stn_codes': codes,
@@ -102,7 +104,7 @@ def clean_alert_prompt(prompt):
     """
     # Extract station codes
     station_df = pd.DataFrame()
-    pattern = r'\\b(?:[A-Z]{2}\\d{2}|[A-Z]{2}\\d{1})\\b'
+    pattern = r'\b(?:[A-Z]{2}\d{2}|[A-Z]{2}\d{1})\b'
     codes = re.findall(pattern, prompt)
     lines = [station[:2] + 'L' for station in codes]
     
@@ -117,6 +119,55 @@ def clean_alert_prompt(prompt):
     return station_df
 
 
+@lru_cache(maxsize=1)
+def load_station_table():
+    """
+    Load the MRT/LRT station table once per process.
+    
+    Returns:
+        DataFrame: Station codes, names and coordinates (shared, do not modify)
+    """
+    return pd.read_csv(MRT_LRT_DATA_PATH)
+
+
+@lru_cache(maxsize=1)
+def get_station_full_names():
+    """
+    Get the full name of every station code.
+    
+    Returns:
+        dict: Station code to full station name
+    """
+    input_csv = load_station_table().drop_duplicates(subset='station_code')
+    return dict(zip(input_csv['station_code'], input_csv['full_name']))
+
+
+def get_station_codes(station_name):
+    """
+    Get the station codes of an MRT/LRT station from its name, correcting an unambiguous
+    misspelling of the name.
+    
+    Args:
+        station_name (str): Station name (e.g., 'Jurong East')
+        
+    Returns:
+        list: Station codes, one per line serving the station
+    """
+    from utils.station_search import resolve_station_name
+    
+    input_csv = load_station_table()
+    station_name = station_name.upper().replace(" ", "")
+    
+    station_codes = input_csv.loc[input_csv['station_name'] == station_name, 'station_code'].tolist()
+    if station_codes:
+        return station_codes
+    
+    resolved_name = resolve_station_name(station_name)
+    if resolved_name is None:
+        return []
+    return input_csv.loc[input_csv['station_name'] == resolved_name, 'station_code'].tolist()
+
+
 def get_station_names(df, field=None):
     """
     Add station names to DataFrame based on station codes.
@@ -128,7 +179,7 @@ def get_station_names(df, field=None):
     Returns:
         DataFrame: Updated DataFrame with station names
     """
-    input_csv = pd.read_csv(MRT_LRT_DATA_PATH)
+    full_names = get_station_full_names()
     
     if field is None:
         col_name = 'Station'
@@ -136,12 +187,10 @@ def get_station_names(df, field=None):
         col_name = f'{field}_Station'
     
     df_copy = df.copy()
-    
-    for index, row in df_copy.iterrows():
-        match = input_csv[input_csv['station_code'] == row['Station']]
-        if not match.empty:
-            station_code_name = f"{row['Station']} {match['full_name'].values[0]}"
-            df_copy.at[index, 'Station'] = station_code_name
+    df_copy['Station'] = [
+        f"{code} {full_names[code]}" if code in full_names else code
+        for code in df_copy['Station']
+    ]
     
     df_copy.rename(columns={'Station': col_name}, inplace=True)
     return df_copy
@@ -157,16 +206,14 @@ def summarize_crowd(df):
     Returns:
         str: Summary of crowd levels
     """
-    grouped = df.groupby('CrowdLevel')['Station'].apply(lambda x: ', '.join(x)).reset_index()
+    grouped = df.groupby('CrowdLevel')['Station'].apply(lambda x: ', '.join(x))
     
     # Construct the summary string
-    summary = ''
-    for _, row in grouped.iterrows():
-        summary += f"CROWD LEVEL {row['CrowdLevel'].split()[-1]} at these stations: {row['Station']}.\n "
-    
-    # Remove trailing comma and space
-    summary = summary[:-2]
-    return summary
+    lines = [
+        f"CROWD LEVEL {level.split()[-1]} at these stations: {stations}."
+        for level, stations in grouped.items()
+    ]
+    return "\n ".join(lines)
 
 
 def summarize_alerts(df):
@@ -179,20 +226,14 @@ def summarize_alerts(df):
     Returns:
         str: Summary of service alerts
     """
-    grouped = df.groupby('Status')['Station'].apply(lambda x: ', '.join(x)).reset_index()
+    grouped = df.groupby('Status')['Station'].apply(lambda x: ', '.join(x))
     
     # Drop no issues
-    grouped = grouped[grouped['Status'] != 'No train service issues at selected stations.']
+    grouped = grouped[grouped.index != 'No train service issues at selected stations.']
     
     if not grouped.empty:
         # Construct the summary string
-        summary = ''
-        for _, row in grouped.iterrows():
-            summary += f"{row['Status']} at these stations: {row['Station']}.\n"
-        
-        # Remove trailing newline
-        summary = summary[:-1]
-        return summary
+        return "\n".join(f"{status} at these stations: {stations}." for status, stations in grouped.items())
     else:
         return 'No train service issues at selected stations.'
 
@@ -207,19 +248,13 @@ def summarize_nearest_taxi(df):
     Returns:
         str: Summary of nearest taxi stands
     """
-    df = df.reset_index(drop=True)
-    df = df.loc[:, ['Name', 'Distance']]
-    df['Distance'] = df['Distance'].round(1).astype(str)
+    if df.empty:
+        return ''
     
-    summary = ''
-    for index, row in df.iterrows():
-        summary += f"{row['Name']} at {row['Distance']}m"
-        if index != len(df) - 1:
-            summary += "; "
-        else:
-            summary += "."
+    distances = df['Distance'].round(1).astype(str)
     
-    return summary
+    summary = "; ".join(f"{name} at {distance}m" for name, distance in zip(df['Name'], distances))
+    return summary + "."
 
 
 def summarize_nearest_taxi_with_links(df):
@@ -232,19 +267,16 @@ def summarize_nearest_taxi_with_links(df):
     Returns:
         str: Summary of nearest taxi stands with links
     """
-    df = df.reset_index(drop=True)
-    df = df.loc[:, ['Latitude', 'Longitude', 'Name', 'Distance']]
-    df['Distance'] = df['Distance'].round(1).astype(str)
+    if df.empty:
+        return ''
     
-    summary = ''
-    for index, row in df.iterrows():
-        summary += f"{row['Name']} at {row['Distance']}m (Link: https://www.google.com/maps?q={row['Latitude']},{row['Longitude']})"
-        if index != len(df) - 1:
-            summary += " ; "
-        else:
-            summary += " ."
+    distances = df['Distance'].round(1).astype(str)
     
-    return summary
+    summary = " ; ".join(
+        f"{name} at {distance}m (Link: https://www.google.com/maps?q={lat},{lon})"
+        for name, distance, lat, lon in zip(df['Name'], distances, df['Latitude'], df['Longitude'])
+    )
+    return summary + " ."
 
 
 def summarize_time(df):
@@ -258,13 +290,11 @@ def summarize_time(df):
         str: Summary of crowd levels by time
     """
     # Construct the summary string
-    summary = ''
-    for _, row in df.iterrows():
-        summary += f"CROWD LEVEL at {row['Station']} is {row['CrowdLevel'].split()[-1]} at these timings: {row['Start']}.\n "
-    
-    # Remove trailing newline and space
-    summary = summary[:-2]
-    return summary
+    lines = [
+        f"CROWD LEVEL at {station} is {level.split()[-1]} at these timings: {start}."
+        for station, level, start in zip(df['Station'], df['CrowdLevel'], df['Start'])
+    ]
+    return "\n ".join(lines)
 
 
 def summarize_volume_time(df):
@@ -280,27 +310,122 @@ def summarize_volume_time(df):
     grouped_df = df.groupby(['DAY_TYPE', 'Station', 'CrowdVolume'], observed=False)['Start'].apply(list).reset_index()
     grouped = grouped_df.dropna()
     
-    summary = ''
+    # Index timings by (day, station, volume) in a single pass over the groups
+    timings = {}
+    for day, station, volume, start in zip(grouped['DAY_TYPE'], grouped['Station'],
+                                           grouped['CrowdVolume'], grouped['Start']):
+        timings.setdefault((day, station, volume), []).append(start)
+    
+    days = grouped['DAY_TYPE'].unique()
+    stations = grouped['Station'].unique()
+    volumes = grouped['CrowdVolume'].unique()
+    
     # Construct the summary string
-    for day in grouped['DAY_TYPE'].unique():
-        summary += f"On {day} : "
-        for station in grouped['Station'].unique():
-            summary += f"CROWD VOLUME at {station} is "
-            count = 0
-            for volume in grouped['CrowdVolume'].unique():
-                timings = grouped[(grouped['DAY_TYPE'] == day) & 
-                                  (grouped['Station'] == station) & 
-                                  (grouped['CrowdVolume'] == volume)]['Start'].tolist()
-                timings_str = str(timings).strip('[]')
+    parts = []
+    for day in days:
+        parts.append(f"On {day} : ")
+        for station in stations:
+            parts.append(f"CROWD VOLUME at {station} is ")
+            for count, volume in enumerate(volumes):
+                timings_str = str(timings.get((day, station, volume), [])).strip('[]')
                 
                 if len(timings_str) > 0:
                     if count > 0:
-                        summary += ", "
-                    summary += f"{volume} at these timings: {timings_str}"
-                if volume == grouped['CrowdVolume'].unique()[-1]:
-                    summary += ".\n "
-                count += 1
+                        parts.append(", ")
+                    parts.append(f"{volume} at these timings: {timings_str}")
+            parts.append(".\n ")
     
     # Remove trailing newline and space
-    summary = summary[:-2]
-    return summary
\ No newline at end of file
+    return "".join(parts)[:-2]
+
+
+def summarize_route_itineraries(itineraries, start_station, end_station, code_end, name_end):
+    """
+    Summarize OneMap public transport itineraries between two MRT stations.
+    
+    Args:
+        itineraries (list): RouteItinerary records from get_public_transport_route
+        start_station (str): Starting station name, upper case without spaces
+        end_station (str): Destination station name, upper case without spaces
+        code_end (str): Destination station code, for a final walking leg
+        name_end (str): Destination station full name, for a final walking leg
+        
+    Returns:
+        str: Details of possible routes
+    """
+    routes_str = ""
+    route_count = 1
+    walk_legs = 0
+
+    for itinerary in itineraries:
+        for leg in itinerary.legs:
+            if leg.mode == 'WALK' and leg.from_name == 'Origin' and leg.to_name == 'Destination':
+                walk_legs += 1
+
+    routes_count = len(itineraries) - walk_legs
+    routes_str += f"There are {routes_count} possible travel route(s).\n"
+
+    for itinerary in itineraries:  # pull out all the itineraries or routes from the api
+        route_string = ""
+        duration = itinerary.duration / 60  # calculate overall duration of the route
+        fare = itinerary.fare  # extract total fare of the route
+        prev_station_name = None
+        first_leg = itinerary.legs[0]  # Extracting the first leg
+        last_leg = itinerary.legs[-1]  # Extracting the last leg
+        transit_distance = 0
+
+        if first_leg.mode == 'WALK' and \
+            first_leg.from_name == 'Origin' and \
+            first_leg.to_name.replace(' MRT STATION', '').replace(' ', '') != start_station and \
+            first_leg.to_name != 'Destination':
+
+            route_string += f"Walk {round(first_leg.distance,0)} metres or {round(first_leg.distance/0.75,0)} steps to {first_leg.to_stop_code} {first_leg.to_name.replace(' MRT STATION', '')} "
+
+        for leg_index, leg in enumerate(itinerary.legs):  # within each itinerary, look for each leg of the route
+            
+            if leg_index > 0 and leg_index < len(itinerary.legs) - 1 and \
+                leg.mode == 'WALK' and \
+                leg.from_name != leg.to_name:  # to include "walk leg from one station to another" in the route string
+                route_string += f" then walk {round(leg.distance,0)} metres or {round(leg.distance/0.75,0)} steps"  
+
+            if leg_index > 0 and leg_index < len(itinerary.legs) - 1 and \
+                leg.mode == 'WALK' and \
+                leg.from_name == leg.to_name:  # to include "walk leg for transit" 
+                transit_distance = leg.distance  
+
+            if leg_index > 0 and leg_index < len(itinerary.legs) - 1 and \
+                leg.mode == 'SUBWAY' and \
+                leg.from_name == leg.to_name:  # to include "walk leg for transit cross platform only" 
+                transit_distance = 0
+                
+            if leg.mode == 'SUBWAY':  # if the leg is a subway route
+
+                if route_string.startswith("Walk"):  # Check if route_string starts with "Walk"
+                    route_string += "then take train from "
+                elif route_string:
+                    route_string += " to "
+                current_station_name = leg.from_name.replace(' MRT STATION', '')  # remove excess words
+
+                if current_station_name == prev_station_name and transit_distance != 0:
+                    route_string += f"transit by walking {round(transit_distance,0)} metres or {round(transit_distance/0.75,0)} steps to "  # include the walking to transit station
+                elif current_station_name == prev_station_name and transit_distance == 0:
+                    route_string += f"transit by crossing the platform (10 meters, 13 steps) to "  # include the walking to transit station
+                                    
+                route_string += f"{leg.from_stop_code} {current_station_name}"
+                prev_station_name = leg.to_name.replace(' MRT STATION', '')  # remove excess words
+                route_string += f" to {leg.to_stop_code} {prev_station_name}"
+
+        # Check if the last leg is a 'WALK' mode and meets the conditions
+        if last_leg.mode == 'WALK' and \
+            last_leg.to_name == 'Destination' and \
+            last_leg.from_name.replace(' MRT STATION', '').replace(' ', '') != end_station and \
+            last_leg.from_name != 'Origin':
+            if route_string:  # If route_string is not empty, add "Walk to end station"
+                routes_str += f"Route {route_count}: {route_string} then walk {round(last_leg.distance,0)} metres or {round(last_leg.distance/0.75,0)} steps to {code_end} {name_end} with an estimated duration of {round(duration, 0)} minutes and cost ${fare}.\n"
+        elif route_string:  # Check if route_string is not empty before adding to routes_str
+            routes_str += f"Route {route_count}: {route_string} with an estimated duration of {round(duration, 0)} minutes and cost ${fare}.\n"
+        
+        # Increment the route count at the end of the loop
+        route_count += 1
+                              
+    return routes_str
\ No newline at end of file
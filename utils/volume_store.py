@@ -0,0 +1,492 @@
+"""
+Columnar store of DataMall passenger volume data, partitioned by month.
+
+Each partition is a directory holding one raw little-endian binary file per column and a
+'meta.json' describing column types, row count and the station code vocabulary. Columns
+can be memory-mapped directly, so reading a partition never parses CSV.
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import threading
+import zipfile
+
+import numpy as np
+import pandas as pd
+import requests
+
+from config.settings import (
+    TRANSPORT_NODE_DATA_DIR,
+    TRANSPORT_OD_DATA_DIR,
+    VOLUME_INGEST_CHUNK_ROWS,
+    VOLUME_DOWNLOAD_CHUNK_BYTES,
+    UPSTREAM_TIMEOUT
+)
+
+DAY_TYPES = ['WEEKDAY', 'WEEKENDS/HOLIDAY']
+
+# Column name -> storage dtype; station code columns hold indexes into the partition vocabulary
+VOLUME_SCHEMAS = {
+    'node': {
+        'DAY_TYPE': 'int8',
+        'TIME_PER_HOUR': 'int8',
+        'PT_CODE': 'int16',
+        'TOTAL_TAP_IN_VOLUME': 'int32',
+        'TOTAL_TAP_OUT_VOLUME': 'int32'
+    },
+    'od': {
+        'DAY_TYPE': 'int8',
+        'TIME_PER_HOUR': 'int8',
+        'ORIGIN_PT_CODE': 'int16',
+        'DESTINATION_PT_CODE': 'int16',
+        'TOTAL_TRIPS': 'int32'
+    }
+}
+STATION_COLUMNS = ('PT_CODE', 'ORIGIN_PT_CODE', 'DESTINATION_PT_CODE')
+
+# DataMall endpoint and partition directory of each dataset
+VOLUME_URL_TYPES = {'node': 'vol_by_stn', 'od': 'vol_to_fro'}
+VOLUME_DATASET_DIRS = {'node': TRANSPORT_NODE_DATA_DIR, 'od': TRANSPORT_OD_DATA_DIR}
+
+
+class _PartitionWriter:
+    """
+    Appends typed column chunks for one month into a staging directory.
+    """
+    
+    def __init__(self, dataset, month):
+        """
+        Initialize the writer.
+        
+        Args:
+            dataset (str): 'node' or 'od'
+            month (str): Partition month in 'YYYY-MM' format
+        """
+        self.dataset = dataset
+        self.month = month
+        self.schema = VOLUME_SCHEMAS[dataset]
+        self.vocab = {}
+        self.rows = 0
+        
+        dataset_dir = VOLUME_DATASET_DIRS[dataset]
+        os.makedirs(dataset_dir, exist_ok=True)
+        self.staging_dir = tempfile.mkdtemp(prefix=f".{month}.", dir=dataset_dir)
+        self.files = {
+            column: open(os.path.join(self.staging_dir, f"{column}.bin"), "wb")
+            for column in self.schema
+        }
+    
+    def _encode_stations(self, values):
+        """Map station codes to vocabulary indexes, extending the vocabulary as needed."""
+        for code in pd.unique(values):
+            if code not in self.vocab:
+                self.vocab[code] = len(self.vocab)
+        return values.map(self.vocab)
+    
+    def write(self, chunk):
+        """
+        Append a chunk of rows to the partition.
+        
+        Args:
+            chunk (DataFrame): Rows of this month in the DataMall CSV layout
+        """
+        for column, dtype in self.schema.items():
+            if column in STATION_COLUMNS:
+                values = self._encode_stations(chunk[column])
+            elif column == 'DAY_TYPE':
+                values = chunk[column].map(DAY_TYPES.index)
+            else:
+                values = chunk[column]
+            
+            self.files[column].write(values.to_numpy(dtype=np.dtype(dtype).newbyteorder('<')).tobytes())
+        
+        self.rows += len(chunk)
+    
+    def commit(self):
+        """
+        Finish the partition and swap it in for any existing partition of the same month.
+        
+        Returns:
+            str: Path to the partition directory
+        """
+        for handle in self.files.values():
+            handle.close()
+        
+        meta = {
+            'dataset': self.dataset,
+            'month': self.month,
+            'rows': self.rows,
+            'columns': self.schema,
+            'stations': sorted(self.vocab, key=self.vocab.get)
+        }
+        with open(os.path.join(self.staging_dir, "meta.json"), "w") as f:
+            json.dump(meta, f)
+        
+        # Move the old partition aside first, so the month is never missing its data for longer
+        # than the two renames and the old data is kept until the new partition is in place
+        partition_dir = volume_partition_path(self.dataset, self.month)
+        retired_dir = None
+        if os.path.isdir(partition_dir):
+            retired_dir = tempfile.mkdtemp(prefix=f".{self.month}.old.", dir=os.path.dirname(partition_dir))
+            os.rename(partition_dir, os.path.join(retired_dir, self.month))
+        
+        try:
+            os.rename(self.staging_dir, partition_dir)
+        except OSError:
+            if retired_dir is not None:
+                os.rename(os.path.join(retired_dir, self.month), partition_dir)
+                os.rmdir(retired_dir)
+            raise
+        
+        if retired_dir is not None:
+            shutil.rmtree(retired_dir, ignore_errors=True)
+        
+        return partition_dir
+    
+    def abort(self):
+        """Discard the staged partition."""
+        for handle in self.files.values():
+            handle.close()
+        shutil.rmtree(self.staging_dir, ignore_errors=True)
+
+
+def volume_partition_path(dataset, month):
+    """
+    Get the directory of a monthly partition.
+    
+    Args:
+        dataset (str): 'node' or 'od'
+        month (str): Partition month in 'YYYY-MM' format
+        
+    Returns:
+        str: Partition directory path
+    """
+    return os.path.join(VOLUME_DATASET_DIRS[dataset], month)
+
+
+def list_volume_months(dataset):
+    """
+    List the months available in the store.
+    
+    Args:
+        dataset (str): 'node' or 'od'
+        
+    Returns:
+        list: Months in 'YYYY-MM' format, oldest first
+    """
+    dataset_dir = VOLUME_DATASET_DIRS[dataset]
+    if not os.path.isdir(dataset_dir):
+        return []
+    
+    # Dot-prefixed directories are partitions being staged or retired
+    return sorted(
+        month for month in os.listdir(dataset_dir)
+        if not month.startswith(".") and os.path.isfile(os.path.join(dataset_dir, month, "meta.json"))
+    )
+
+
+def ingest_volume_csv(source, dataset):
+    """
+    Stream a passenger volume CSV into monthly partitions, one chunk at a time.
+    
+    Args:
+        source (str or file): Path or binary file object of the CSV
+        dataset (str): 'node' or 'od'
+        
+    Returns:
+        list: Months written
+    """
+    writers = {}
+    usecols = ['YEAR_MONTH'] + list(VOLUME_SCHEMAS[dataset])
+    dtypes = {column: 'string' if column in STATION_COLUMNS or column == 'DAY_TYPE' else dtype
+              for column, dtype in VOLUME_SCHEMAS[dataset].items()}
+    dtypes['YEAR_MONTH'] = 'string'
+    
+    try:
+        for chunk in pd.read_csv(source, usecols=usecols, dtype=dtypes, chunksize=VOLUME_INGEST_CHUNK_ROWS):
+            for month, month_chunk in chunk.groupby('YEAR_MONTH', sort=False):
+                if month not in writers:
+                    writers[month] = _PartitionWriter(dataset, month)
+                writers[month].write(month_chunk)
+    except Exception:
+        for writer in writers.values():
+            writer.abort()
+        raise
+    
+    for writer in writers.values():
+        writer.commit()
+    
+    return sorted(writers)
+
+
+def ingest_volume_archive(archive_path, dataset):
+    """
+    Decompress a zipped passenger volume download and stream its CSV into monthly partitions.
+    
+    Args:
+        archive_path (str): Path to the zip archive
+        dataset (str): 'node' or 'od'
+        
+    Returns:
+        list: Months written
+    """
+    months = []
+    
+    with zipfile.ZipFile(archive_path) as archive:
+        for member in archive.namelist():
+            if member.lower().endswith(".csv"):
+                with archive.open(member) as csv_file:
+                    months.extend(ingest_volume_csv(csv_file, dataset))
+    
+    return sorted(set(months))
+
+
+def download_volume_archive(url, dest_path):
+    """
+    Download a passenger volume archive to disk in fixed-size chunks.
+    
+    Args:
+        url (str): Download link returned by DataMall
+        dest_path (str): Path to write the archive to
+        
+    Returns:
+        str: dest_path
+    """
+    # The timeout bounds connecting and each read, not the whole download
+    with requests.get(url, stream=True, timeout=UPSTREAM_TIMEOUT) as response:
+        response.raise_for_status()
+        with open(dest_path, "wb") as f:
+            for block in response.iter_content(chunk_size=VOLUME_DOWNLOAD_CHUNK_BYTES):
+                f.write(block)
+    
+    return dest_path
+
+
+def ingest_volume_download(dataset, month=None):
+    """
+    Fetch a DataMall passenger volume download and ingest it into monthly partitions.
+    
+    Args:
+        dataset (str): 'node' or 'od'
+        month (str, optional): Month in 'YYYYMM' format; DataMall defaults to the latest month
+        
+    Returns:
+        list: Months written
+    """
+    from api.lta_api import get_volume_download_link
+    
+    link = get_volume_download_link(VOLUME_URL_TYPES[dataset], month)
+    if link is None:
+        raise RuntimeError(f"Failed to get the passenger volume download link for '{dataset}'.")
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        archive_path = download_volume_archive(link, os.path.join(tmp_dir, "volume.zip"))
+        return ingest_volume_archive(archive_path, dataset)
+
+
+def read_volume_partition(dataset, month):
+    """
+    Memory-map the columns of a monthly partition.
+    
+    Args:
+        dataset (str): 'node' or 'od'
+        month (str): Partition month in 'YYYY-MM' format
+        
+    Returns:
+        tuple: (dict of column name to read-only array, partition metadata)
+    """
+    partition_dir = volume_partition_path(dataset, month)
+    with open(os.path.join(partition_dir, "meta.json")) as f:
+        meta = json.load(f)
+    
+    columns = {}
+    for column, dtype in meta['columns'].items():
+        dtype = np.dtype(dtype).newbyteorder('<')
+        if meta['rows'] == 0:
+            columns[column] = np.empty(0, dtype=dtype)
+        else:
+            columns[column] = np.memmap(os.path.join(partition_dir, f"{column}.bin"),
+                                        dtype=dtype, mode='r', shape=(meta['rows'],))
+    
+    return columns, meta
+
+
+def load_volume_dataframe(dataset, month):
+    """
+    Load a monthly partition as a DataFrame in the DataMall CSV layout.
+    
+    Args:
+        dataset (str): 'node' or 'od'
+        month (str): Partition month in 'YYYY-MM' format
+        
+    Returns:
+        DataFrame: Passenger volume data
+    """
+    columns, meta = read_volume_partition(dataset, month)
+    return partition_dataframe(columns, meta)
+
+
+def partition_dataframe(columns, meta):
+    """
+    Decode the columns of a monthly partition into a DataFrame in the DataMall CSV layout.
+    
+    Args:
+        columns (dict): Column name to array, from read_volume_partition
+        meta (dict): Partition metadata, from read_volume_partition
+        
+    Returns:
+        DataFrame: Passenger volume data
+    """
+    stations = np.array(meta['stations'], dtype=object)
+    
+    data = {}
+    for column, values in columns.items():
+        if column in STATION_COLUMNS:
+            data[column] = stations[values]
+        elif column == 'DAY_TYPE':
+            data[column] = np.array(DAY_TYPES, dtype=object)[values]
+        else:
+            data[column] = np.asarray(values, dtype='int64')
+    
+    df = pd.DataFrame(data)
+    df.insert(0, 'YEAR_MONTH', meta['month'])
+    df.insert(3, 'PT_TYPE', 'TRAIN')
+    
+    return df
+
+
+
+class VolumeDataset:
+    """
+    Lazily opened view over every monthly partition of a dataset.
+    
+    A month's columns are memory-mapped the first time it is queried, so aggregating across
+    months only pages in the column data it actually reads. A month that is re-ingested is
+    mapped again on its next query.
+    """
+    
+    def __init__(self, dataset):
+        """
+        Initialize the dataset view.
+        
+        Args:
+            dataset (str): 'node' or 'od'
+        """
+        self.dataset = dataset
+        self._partitions = {}
+        self._lock = threading.Lock()
+    
+    def months(self):
+        """
+        List the available months.
+        
+        Returns:
+            list: Months in 'YYYY-MM' format, oldest first
+        """
+        return list_volume_months(self.dataset)
+    
+    def partition(self, month):
+        """
+        Get the memory-mapped columns of a month, opening them on first access or after the
+        month has been re-ingested.
+        
+        Args:
+            month (str): Partition month in 'YYYY-MM' format
+            
+        Returns:
+            tuple: (dict of column name to read-only array, partition metadata)
+        """
+        # Ingesting swaps in a new partition directory, so its metadata file changes identity
+        meta_stat = os.stat(os.path.join(volume_partition_path(self.dataset, month), "meta.json"))
+        version = (meta_stat.st_ino, meta_stat.st_mtime_ns)
+        
+        with self._lock:
+            cached = self._partitions.get(month)
+            if cached is None or cached[0] != version:
+                cached = self._partitions[month] = (version, read_volume_partition(self.dataset, month))
+            return cached[1]
+    
+    def to_dataframe(self, month):
+        """
+        Load a month as a DataFrame in the DataMall CSV layout.
+        
+        Args:
+            month (str): Partition month in 'YYYY-MM' format
+            
+        Returns:
+            DataFrame: Passenger volume data
+        """
+        return partition_dataframe(*self.partition(month))
+    
+    def station_volume(self, station_code, day_type, hour, months=None):
+        """
+        Get the tap-in plus tap-out volume of a station at an hour, for each month.
+        
+        Args:
+            station_code (str): Station code (e.g., 'NS1'); combined interchange codes match any part
+            day_type (str): 'WEEKDAY' or 'WEEKENDS/HOLIDAY'
+            hour (int): Hour of day (0-23)
+            months (list, optional): Months to include, defaults to all months
+            
+        Returns:
+            Series: Passenger volume indexed by month, for months with data
+        """
+        volumes = {}
+        
+        for month in (months if months is not None else self.months()):
+            columns, meta = self.partition(month)
+            codes = [i for i, code in enumerate(meta['stations']) if station_code in code.split('/')]
+            if not codes:
+                continue
+            
+            mask = np.isin(columns['PT_CODE'], codes) & \
+                (columns['DAY_TYPE'] == DAY_TYPES.index(day_type)) & \
+                (columns['TIME_PER_HOUR'] == hour)
+            if mask.any():
+                volumes[month] = int(columns['TOTAL_TAP_IN_VOLUME'][mask].sum() +
+                                     columns['TOTAL_TAP_OUT_VOLUME'][mask].sum())
+        
+        return pd.Series(volumes, dtype='int64', name='Passenger_Volume')
+    
+    def average_volume(self, station_code, day_type, hour, calendar_month=None):
+        """
+        Get the average volume of a station at an hour across months.
+        
+        Args:
+            station_code (str): Station code (e.g., 'NS1')
+            day_type (str): 'WEEKDAY' or 'WEEKENDS/HOLIDAY'
+            hour (int): Hour of day (0-23)
+            calendar_month (int, optional): Only average this month of the year (1-12),
+                giving a seasonal average across years
+            
+        Returns:
+            float: Average volume, or None if there is no data
+        """
+        months = self.months()
+        if calendar_month is not None:
+            months = [month for month in months if int(month[5:7]) == calendar_month]
+        
+        volumes = self.station_volume(station_code, day_type, hour, months)
+        return float(volumes.mean()) if not volumes.empty else None
+
+
+_volume_datasets_lock = threading.Lock()
+_volume_datasets = {}
+
+
+def get_volume_dataset(dataset):
+    """
+    Get the process-wide lazily loaded view of a dataset.
+    
+    Args:
+        dataset (str): 'node' or 'od'
+        
+    Returns:
+        VolumeDataset: Shared dataset view
+    """
+    with _volume_datasets_lock:
+        if dataset not in _volume_datasets:
+            _volume_datasets[dataset] = VolumeDataset(dataset)
+        return _volume_datasets[dataset]
\ No newline at end of file
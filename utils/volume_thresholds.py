@@ -0,0 +1,120 @@
+"""
+Per-station passenger volume thresholds derived from volume history.
+
+Each station and day type gets its own low/high cut-offs at fixed quantiles of its hourly
+volume, so crowd labels reflect what is normal for that station rather than the network.
+"""
+
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from config.settings import (
+    TRANSPORT_NODE_DATA_PATH,
+    PASSENGER_UPPER_THRESHOLD,
+    PASSENGER_LOWER_THRESHOLD,
+    VOLUME_LOWER_QUANTILE,
+    VOLUME_UPPER_QUANTILE
+)
+from utils.volume_store import list_volume_months, load_volume_dataframe, volume_partition_path
+
+THRESHOLDS_FILE_NAME = "station_thresholds.csv"
+
+
+def compute_station_thresholds(df):
+    """
+    Compute volume quantile thresholds for every station and day type.
+    
+    Args:
+        df (DataFrame): Volume data in the DataMall 'PV/Train' CSV layout
+        
+    Returns:
+        DataFrame: Thresholds indexed by ('PT_CODE', 'DAY_TYPE') with 'LOWER' and 'UPPER' columns
+    """
+    volume_df = pd.DataFrame({
+        'PT_CODE': df['PT_CODE'].str.split('/'),
+        'DAY_TYPE': df['DAY_TYPE'],
+        'Passenger_Volume': df['TOTAL_TAP_IN_VOLUME'] + df['TOTAL_TAP_OUT_VOLUME']
+    }).explode('PT_CODE')
+    
+    thresholds = volume_df.groupby(['PT_CODE', 'DAY_TYPE'])['Passenger_Volume'].quantile(
+        [VOLUME_LOWER_QUANTILE, VOLUME_UPPER_QUANTILE]
+    ).unstack()
+    thresholds.columns = ['LOWER', 'UPPER']
+    
+    return thresholds
+
+
+def save_station_thresholds(month):
+    """
+    Compute the thresholds of a monthly partition and store them alongside it.
+    
+    Args:
+        month (str): Partition month in 'YYYY-MM' format
+        
+    Returns:
+        DataFrame: The thresholds
+    """
+    thresholds = compute_station_thresholds(load_volume_dataframe('node', month))
+    thresholds.to_csv(os.path.join(volume_partition_path('node', month), THRESHOLDS_FILE_NAME))
+    
+    return thresholds
+
+
+_thresholds_cache = {}
+_thresholds_lock = threading.Lock()
+
+
+def get_station_thresholds(month=None):
+    """
+    Get per-station thresholds, loading them from the volume store or computing them on first use.
+    
+    Args:
+        month (str, optional): Partition month in 'YYYY-MM' format, defaults to the latest month.
+            Falls back to the bundled volume CSV when the store is empty.
+        
+    Returns:
+        DataFrame: Thresholds indexed by ('PT_CODE', 'DAY_TYPE')
+    """
+    if month is None:
+        months = list_volume_months('node')
+        month = months[-1] if months else None
+    
+    with _thresholds_lock:
+        if month not in _thresholds_cache:
+            if month is None:
+                thresholds = compute_station_thresholds(pd.read_csv(TRANSPORT_NODE_DATA_PATH))
+            else:
+                path = os.path.join(volume_partition_path('node', month), THRESHOLDS_FILE_NAME)
+                if os.path.isfile(path):
+                    thresholds = pd.read_csv(path, index_col=['PT_CODE', 'DAY_TYPE'])
+                else:
+                    thresholds = save_station_thresholds(month)
+            _thresholds_cache[month] = thresholds
+        
+        return _thresholds_cache[month]
+
+
+def classify_volume(stations, day_types, volumes, thresholds):
+    """
+    Classify station-hour volumes against per-station thresholds in one array comparison.
+    
+    Stations without history fall back to PASSENGER_LOWER_THRESHOLD/PASSENGER_UPPER_THRESHOLD.
+    
+    Args:
+        stations (array-like): Station codes
+        day_types (array-like): 'WEEKDAY' or 'WEEKENDS/HOLIDAY' per row
+        volumes (array-like): Passenger volume per row
+        thresholds (DataFrame): Thresholds from get_station_thresholds
+        
+    Returns:
+        ndarray: 'LOW', 'MODERATE' or 'HIGH' per row
+    """
+    station_thresholds = thresholds.reindex(pd.MultiIndex.from_arrays([stations, day_types]))
+    lower = station_thresholds['LOWER'].fillna(PASSENGER_LOWER_THRESHOLD).to_numpy()
+    upper = station_thresholds['UPPER'].fillna(PASSENGER_UPPER_THRESHOLD).to_numpy()
+    volumes = np.asarray(volumes)
+    
+    return np.where(volumes > upper, 'HIGH', np.where(volumes < lower, 'LOW', 'MODERATE'))
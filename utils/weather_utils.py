@@ -5,6 +5,29 @@ Utility functions for fetching and processing weather data.
 import requests
 from collections import Counter
 
+from config.settings import WEATHER_CACHE_MAX_AGE
+from utils.circuit_breaker import call_upstream, check_response
+from utils.deadline import call_timeout
+
+
+def get_weather_data(url):
+    """
+    Get a data.gov.sg weather payload through the weather circuit breaker, falling back to
+    the last good payload from the same URL while it is recent enough.
+    
+    Args:
+        url (str): Weather API URL
+        
+    Returns:
+        dict: JSON response from API
+    """
+    def fetch():
+        response = requests.get(url, timeout=call_timeout())
+        check_response(response, f"Unable to fetch weather forecast data (status code: {response.status_code}).")
+        return response.json()
+    
+    return call_upstream("datagov:weather", fetch, cache_key=url, max_age=WEATHER_CACHE_MAX_AGE)
+
 
 def get_2h_weather_forecast():
     """
@@ -14,25 +37,17 @@ def get_2h_weather_forecast():
         str: Weather forecast for the next 2 hours
     """
     try:
-        url = "https://api.data.gov.sg/v1/environment/2-hour-weather-forecast"
-        response = requests.get(url)
+        data = get_weather_data("https://api.data.gov.sg/v1/environment/2-hour-weather-forecast")
 
-        # Check if the request was successful (status code 200)
-        if response.status_code == 200:
-            # Parse JSON response
-            data = response.json()
+        # Extract forecasts
+        forecasts = data["items"][0]["forecasts"]
 
-            # Extract forecasts
-            forecasts = data["items"][0]["forecasts"]
+        # Count the occurrences of each forecast
+        forecast_counter = Counter([forecast["forecast"] for forecast in forecasts])
 
-            # Count the occurrences of each forecast
-            forecast_counter = Counter([forecast["forecast"] for forecast in forecasts])
-
-            # Get the most common forecast
-            forecast_2hrs = forecast_counter.most_common(1)[0][0]
-            return forecast_2hrs
-        else:
-            return f"Error: Unable to fetch 2-hour weather forecast data (status code: {response.status_code})."
+        # Get the most common forecast
+        forecast_2hrs = forecast_counter.most_common(1)[0][0]
+        return forecast_2hrs
     except Exception as e:
         return f"Error: {e}"
 
@@ -45,19 +60,11 @@ def get_24h_weather_forecast():
         str: Weather forecast for the next 24 hours
     """
     try:
-        url = "https://api.data.gov.sg/v1/environment/24-hour-weather-forecast"
-        response = requests.get(url)
-
-        # Check if the request was successful (status code 200)
-        if response.status_code == 200:
-            # Parse JSON response
-            data = response.json()
-
-            # Extract forecast from the "general" key
-            forecast_24hrs = data["items"][0]["general"]["forecast"]
-            return forecast_24hrs
-        else:
-            return f"Error: Unable to fetch 24-hour weather forecast data (status code: {response.status_code})."
+        data = get_weather_data("https://api.data.gov.sg/v1/environment/24-hour-weather-forecast")
+
+        # Extract forecast from the "general" key
+        forecast_24hrs = data["items"][0]["general"]["forecast"]
+        return forecast_24hrs
     except Exception as e:
         return f"Error: {e}"
 